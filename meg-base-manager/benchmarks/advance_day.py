@@ -0,0 +1,90 @@
+"""Costo di GameState.advance_day, con e senza ambasciata.
+
+Ogni ripetizione gioca DAYS giorni da una partita nuova (stesso seme
+per tutte) tra due giri di un ciclo di riferimento in Python puro. Il
+costo di un giorno è espresso in multipli del riferimento: il rapporto
+resta stabile anche quando la macchina rallenta, i microsecondi no.
+Lo script riporta entrambi (migliore delle ripetizioni) e termina con
+errore se una partita supera il suo budget.
+
+Senza ambasciata il budget è il costo misurato prima dei sistemi
+osservabili (user-037) con un margine del 10%: nessun cambiamento
+successivo deve superarlo. Con l'ambasciata la diplomazia fa più lavoro
+di allora (propagazione tra fazioni, effetti degli eventi speciali): il
+budget parte dal costo misurato dopo quei cambiamenti, con lo stesso
+margine.
+
+Uso: python benchmarks/advance_day.py [giorni]
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # I cataloghi vengono letti da data/ con percorsi relativi
+
+from game.base import GameState
+
+DAYS = 100
+REPEAT = 15
+REFERENCE_STEPS = 5000
+
+# Partita, ambasciata costruita, budget in multipli del riferimento
+SCENARIOS = (
+    ("senza ambasciata", False, 1.75),
+    ("con ambasciata", True, 2.55),
+)
+
+def new_game(seed: int, embassy: bool) -> GameState:
+    random.seed(seed)
+    game = GameState()
+    with contextlib.redirect_stdout(io.StringIO()):
+        game.new_game()
+    game.missions.verbose = False  # Niente attese di INVIO
+    if embassy:
+        game.diplomacy.embassy_built = True
+    return game
+
+def reference_cost() -> float:
+    """Secondi per 100 passi del ciclo di riferimento"""
+    totals = {}
+    start = time.perf_counter()
+    for i in range(REFERENCE_STEPS):
+        totals[i & 63] = totals.get(i & 63, 0) + i * 0.5
+    return (time.perf_counter() - start) / REFERENCE_STEPS * 100
+
+def day_cost(days: int, embassy: bool, repeat: int = REPEAT) -> tuple:
+    """Costo di un giorno: (multipli del riferimento, µs), minimi di repeat partite"""
+    ratios, micros = [], []
+    for _ in range(repeat):
+        game = new_game(days, embassy)
+        before = reference_cost()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            for _ in range(days):
+                game.advance_day()
+            elapsed = (time.perf_counter() - start) / days
+        # Il riferimento più veloce dei due è il meno disturbato
+        ratios.append(elapsed / min(before, reference_cost()))
+        micros.append(elapsed * 1e6)
+    return min(ratios), min(micros)
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else DAYS
+    print(f"{days} giorni")
+    print(f"{'Partita':<18}{'µs/giorno':>10}{'costo':>8}{'budget':>8}")
+    over = []
+    for name, embassy, budget in SCENARIOS:
+        ratio, micros = day_cost(days, embassy)
+        print(f"{name:<18}{micros:>10.1f}{ratio:>8.2f}{budget:>8.2f}")
+        if ratio > budget:
+            over.append(name)
+    if over:
+        sys.exit(f"advance_day oltre il budget: {', '.join(over)}")
+
+if __name__ == "__main__":
+    main()
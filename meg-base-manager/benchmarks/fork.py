@@ -0,0 +1,46 @@
+"""Tempi di GameState.fork, snapshot e restore.
+
+La partita è quella di una nuova partita dopo qualche giorno di gioco
+(seme fisso); ogni operazione viene ripetuta e si riporta il tempo
+migliore, il meno disturbato dal resto della macchina.
+
+Uso: python benchmarks/fork.py [giorni]
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # I cataloghi vengono letti da data/ con percorsi relativi
+
+from game.base import GameState
+
+DAYS = 10
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else DAYS
+    random.seed(0)
+    game = GameState()
+    with contextlib.redirect_stdout(io.StringIO()):
+        game.new_game()
+        game.missions.verbose = False  # Niente attese di INVIO
+        for _ in range(days):
+            game.advance_day()
+    snapshot = game.snapshot()
+    operations = {
+        "fork": game.fork,
+        "snapshot": game.snapshot,
+        "restore": lambda: game.restore(snapshot),
+    }
+    print(f"Partita dopo {days} giorni")
+    print(f"{'Operazione':<12}{'µs':>8}")
+    for name, operation in operations.items():
+        best = min(timeit.repeat(operation, number=100, repeat=30)) / 100
+        print(f"{name:<12}{best * 1e6:>8.1f}")
+
+if __name__ == "__main__":
+    main()
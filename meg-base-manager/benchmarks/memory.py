@@ -0,0 +1,74 @@
+"""Memoria occupata dallo stato di gioco, misurata con tracemalloc.
+
+Riporta i byte per istanza degli oggetti più numerosi e i byte per base:
+la partita completa (cataloghi compresi) e il solo stato mutabile
+(uno snapshot), che è ciò che resta per ogni base quando i cataloghi
+sono condivisi.
+
+Uso: python benchmarks/memory.py [basi]
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # I cataloghi vengono letti da data/ con percorsi relativi
+
+from game.base import GameState, GameStats
+from game.defense import DefenseStructure
+from game.events import Event
+from game.intel import LevelIntel
+from game.missions import Mission
+from game.roster import ROLES, Roster
+
+_roster = Roster()
+_explorer = ROLES.code_for_name("Esploratore")
+
+OBJECTS = {
+    # Gli agenti sono righe del roster: le viste Agent si creano solo quando servono
+    "Agent (riga)": lambda i: _roster.append(f"AG{i:04d}", f"Agente {i}", _explorer,
+                                             (1, 0, 70, 1, 1, 1, 1, 1)),
+    "GameStats": lambda i: GameStats(day=i),
+    "LevelIntel": lambda i: LevelIntel(f"level_{i}", "Livello", "Descrizione"),
+    "DefenseStructure": lambda i: DefenseStructure(f"Struttura {i}", defense_bonus=i),
+    "Event": lambda i: Event(f"event_{i}", "Evento", "Descrizione", {}),
+    "Mission": lambda i: Mission(f"mission_{i}", "Missione", "Descrizione", 3, {}),
+}
+
+def allocated(factory, count: int) -> float:
+    """Byte allocati in media da ogni oggetto creato da factory"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / count
+
+def played_base(i: int) -> GameState:
+    random.seed(i)
+    game = GameState()
+    with contextlib.redirect_stdout(io.StringIO()):
+        game.new_game()
+        for _ in range(30):
+            game.advance_day()
+    return game
+
+def main():
+    bases = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"{'Oggetto':<18}{'byte/istanza':>14}")
+    for name, factory in OBJECTS.items():
+        print(f"{name:<18}{allocated(factory, 10000):>14.0f}")
+
+    games = [played_base(i) for i in range(bases)]
+    print()
+    print(f"{'Base (' + str(bases) + ' partite)':<28}{'byte/base':>12}")
+    print(f"{'partita completa':<28}{allocated(played_base, bases):>12.0f}")
+    print(f"{'stato mutabile (snapshot)':<28}{allocated(lambda i: games[i].snapshot(), bases):>12.0f}")
+
+if __name__ == "__main__":
+    main()
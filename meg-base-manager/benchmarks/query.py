@@ -0,0 +1,101 @@
+"""Tempi di Personnel.query su roster grandi, confrontati con la
+ricerca lineare sulle viste Agent che sostituisce.
+
+Il roster viene riempito con agenti casuali (ruoli di roles.json,
+circa un quinto in missione) e ogni interrogazione viene ripetuta
+finché il tempo misurato non è stabile. L'ultima colonna misura la
+prima interrogazione dopo la morte di un agente: gli indici devono
+aggiornarsi senza essere ricostruiti.
+
+Uso: python benchmarks/query.py [agenti]
+"""
+import math
+import os
+import random
+import sys
+import time
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # I cataloghi vengono letti da data/ con percorsi relativi
+
+from game.personnel import Personnel
+from game.roster import ROLES, SKILLS, AgentStatus
+
+QUERIES = {
+    "miglior medico disponibile": dict(role="medic", status="available",
+                                       order_by="-medical", limit=1),
+    "3 medici, medical>=4, per livello": dict(role="medic", status="available",
+                                             min_skill={"medical": 4}, order_by="-level", limit=3),
+    "10 disponibili, combat>=8": dict(status="available", min_skill={"combat": 8},
+                                      order_by="-combat", limit=10),
+    "disponibili, survival>=9": dict(status="available", min_skill={"survival": 9}),
+    "ricognitori in missione": dict(role="scout", status="on_mission"),
+}
+
+def linear(personnel: Personnel, role=None, status=None, min_skill=None, order_by=None, limit=None):
+    """La stessa interrogazione come list comprehension sulle viste"""
+    agents = [
+        a for a in personnel.agents
+        if (role is None or a.role_id == role)
+        and (status is None or a.state == AgentStatus[status.upper()])
+        and all(getattr(a, name) >= value for name, value in (min_skill or {}).items())
+    ]
+    if order_by:
+        name = order_by.lstrip("-")
+        agents.sort(key=lambda a: getattr(a, name), reverse=order_by.startswith("-"))
+    return agents[:limit]
+
+def filled_personnel(count: int) -> Personnel:
+    random.seed(count)
+    personnel = Personnel()
+    personnel.max_agents = count
+    roles = [ROLES.by_id[role_id] for role_id in personnel.roles]
+    for i in range(count):
+        values = [random.randint(1, 10), 0, random.randint(40, 100)]
+        values += [random.randint(0, 10) for _ in SKILLS]
+        status = AgentStatus.ON_MISSION if random.random() < 0.2 else AgentStatus.AVAILABLE
+        personnel.roster.append(f"agent_{i + 1}", f"Agente {i + 1}", random.choice(roles),
+                                values, status)
+    personnel._roster_changed()
+    return personnel
+
+def best_time(function, repeat: int = 5) -> float:
+    """Microsecondi per chiamata, migliore di repeat misure"""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number * 1e6
+
+def after_death(personnel: Personnel, arguments: dict, deaths: int = 50) -> float:
+    """Microsecondi della prima interrogazione dopo la morte di un agente a caso, la migliore"""
+    rng = random.Random(len(personnel.roster))
+    roster = personnel.roster
+    best = math.inf
+    for _ in range(deaths):
+        personnel.remove_agent(roster.ids[rng.randrange(len(roster))])
+        start = time.perf_counter()
+        personnel.query(**arguments)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    personnel = filled_personnel(count)
+    personnel.query(status="available")  # Costruisce gli indici
+    print(f"{count} agenti")
+    print(f"{'Interrogazione':<36}{'query µs':>10}{'lineare µs':>12}{'dopo morte µs':>15}")
+    for name, arguments in QUERIES.items():
+        expected = [a.id for a in linear(personnel, **arguments)]
+        found = [a.id for a in personnel.query(**arguments)]
+        if found != expected:
+            raise AssertionError(f"Risultati diversi per {name}")
+        indexed = best_time(lambda: personnel.query(**arguments))
+        scanned = best_time(lambda: linear(personnel, **arguments), repeat=3)
+        died = after_death(personnel, arguments)
+        if [a.id for a in personnel.query(**arguments)] != [a.id for a in linear(personnel, **arguments)]:
+            raise AssertionError(f"Risultati diversi dopo le morti per {name}")
+        print(f"{name:<36}{indexed:>10.1f}{scanned:>12.0f}{died:>15.1f}")
+
+if __name__ == "__main__":
+    main()
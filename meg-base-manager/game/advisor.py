@@ -0,0 +1,257 @@
+import hashlib
+import os
+import random
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .snapshots import GameSnapshot
+
+@dataclass
+class MissionEstimate:
+    """Stima aggregata delle simulazioni per una coppia missione × agente"""
+    mission_number: int
+    mission_title: str
+    agent_id: str
+    agent_name: str
+    samples: int = 0
+    survivals: int = 0
+    reward_totals: Dict[str, float] = field(default_factory=dict)
+    base_loss_total: float = 0.0
+    # Rischio giornaliero minimo/massimo dalla tabella della partita (None senza livello)
+    daily_risk: Optional[Tuple[float, float]] = None
+
+    @property
+    def survival_chance(self) -> float:
+        return self.survivals / self.samples if self.samples else 0.0
+
+    @property
+    def expected_rewards(self) -> Dict[str, float]:
+        if not self.samples:
+            return {}
+        return {key: total / self.samples for key, total in self.reward_totals.items()}
+
+    @property
+    def base_risk(self) -> float:
+        """Perdita media di morale e prestigio della base (morte dell'agente)"""
+        return self.base_loss_total / self.samples if self.samples else 0.0
+
+    def merge(self, samples: int, survivals: int, reward_totals: Dict[str, float], base_loss: float):
+        self.samples += samples
+        self.survivals += survivals
+        for key, total in reward_totals.items():
+            self.reward_totals[key] = self.reward_totals.get(key, 0.0) + total
+        self.base_loss_total += base_loss
+
+PairKey = Tuple[int, str]
+
+# Errori di una simulazione che scartano solo la coppia interessata:
+# missione non più in elenco, voce di catalogo mancante, effetto non valido
+SIMULATION_ERRORS = (IndexError, KeyError, ValueError)
+
+def _report_failure(pair: PairKey, error: Exception):
+    print(f"[red]Simulazione della missione {pair[0]} con {pair[1]} non riuscita: {error}[/]")
+
+def simulate_pair(sim, snapshot: GameSnapshot, mission_number: int, agent_id: str,
+                  rollouts: int) -> Optional[tuple]:
+    """Esegue rollouts simulazioni della missione partendo dallo snapshot.
+
+    sim è una copia della partita riservata alle simulazioni (vedi
+    GameState.fork): viene riportata allo snapshot prima di ogni rollout.
+    Restituisce None se la missione non può essere avviata con l'agente.
+    """
+    survivals = 0
+    reward_totals = defaultdict(float)
+    base_loss = 0.0
+    for _ in range(rollouts):
+        sim.restore(snapshot)
+        missions = sim.missions
+        mission = missions.daily_missions[mission_number - 1]
+        resources_before = dict(sim.resources.resources)
+        prestige_before = sim.stats.prestige
+        morale_before = sim.stats.morale
+        intel_before = sum(level.intel_points for level in sim.intel.levels_intel.values())
+
+        result = missions.start_mission(mission_number, agent_id, sim)
+        if not result["success"]:
+            return None
+        # Solo la missione scelta avanza: le altre attive non sporcano la stima
+        missions.set_active_missions([mission])
+        for _ in range(mission.duration):
+            if not missions.active_missions:
+                break
+            missions.update_missions(sim)
+
+        if sim.personnel.get_agent(agent_id) is not None:
+            survivals += 1
+        for resource, amount in sim.resources.resources.items():
+            delta = amount - resources_before.get(resource, 0)
+            if delta:
+                reward_totals[resource] += delta
+        prestige_delta = sim.stats.prestige - prestige_before
+        morale_delta = sim.stats.morale - morale_before
+        reward_totals["prestige"] += prestige_delta
+        reward_totals["morale"] += morale_delta
+        reward_totals["intel_points"] += (
+            sum(level.intel_points for level in sim.intel.levels_intel.values()) - intel_before)
+        base_loss += max(0, -prestige_delta) + max(0, -morale_delta)
+    return rollouts, survivals, dict(reward_totals), base_loss
+
+# Stato dei processi worker: ogni processo carica i cataloghi una sola volta
+_worker_sim = None
+
+def _init_worker():
+    global _worker_sim
+    from .base import GameState
+    _worker_sim = GameState()
+    _worker_sim.missions.verbose = False
+
+def _worker_task(snapshot: GameSnapshot, mission_number: int, agent_id: str,
+                 rollouts: int, seed: int) -> tuple:
+    # Con fork i processi ereditano lo stesso stato del generatore casuale
+    random.seed(seed)
+    # Gli errori arrivano al processo principale con future.result()
+    return mission_number, agent_id, simulate_pair(_worker_sim, snapshot, mission_number,
+                                                  agent_id, rollouts)
+
+class MissionAdvisor:
+    """Consigli sulle missioni tramite simulazioni Monte Carlo in parallelo.
+
+    Le stime vengono prodotte in modo incrementale: un primo giro rapido
+    nel processo principale, poi giri sempre più lunghi nel pool di worker
+    finché non scade il budget di tempo. I risultati sono memorizzati per
+    impronta dello stato, così riaprire il menu non ricalcola nulla.
+    Il generatore casuale della partita non viene toccato: chiedere un
+    consiglio non cambia l'esito dei tiri successivi.
+    """
+
+    def __init__(self, workers: int = None, initial_rollouts: int = 4,
+                 batch_rollouts: int = 16, cache_size: int = 32):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.initial_rollouts = initial_rollouts
+        self.batch_rollouts = batch_rollouts
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict[PairKey, MissionEstimate]]" = OrderedDict()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._seeds = random.Random()  # Semi dei worker, separati da quelli della partita
+
+    def warm_up(self):
+        """Avvia il pool in anticipo, così la prima richiesta non paga l'avvio dei processi"""
+        if self.workers > 0 and self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+            for _ in range(self.workers):
+                self._pool.submit(int)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    @staticmethod
+    def fingerprint(snapshot: GameSnapshot) -> str:
+        return hashlib.blake2b(repr(snapshot).encode("utf-8"), digest_size=16).hexdigest()
+
+    def _pairs(self, game_state) -> List[MissionEstimate]:
+        agents = game_state.personnel.query(status="available")
+        manager = game_state.missions
+        return [
+            MissionEstimate(number, mission.title, agent.id, agent.name,
+                            daily_risk=manager.get_risk_range(mission, agent, game_state))
+            for number, mission in enumerate(manager.daily_missions, 1)
+            for agent in agents
+        ]
+
+    def stream(self, game_state, budget_ms: float = 200) -> Iterator[Dict[PairKey, MissionEstimate]]:
+        """Produce stime sempre più precise entro budget_ms millisecondi.
+
+        Ogni valore prodotto è il dizionario (missione, agente) -> stima delle
+        coppie già simulate; le coppie che non possono partire vengono scartate.
+        """
+        deadline = time.perf_counter() + budget_ms / 1000
+        snapshot = game_state.snapshot()
+        key = self.fingerprint(snapshot)
+
+        estimates = self._cache.get(key)
+        if estimates is None:
+            estimates = {(e.mission_number, e.agent_id): e for e in self._pairs(game_state)}
+            # Primo giro nel processo principale: poche simulazioni per coppia
+            # bastano a mostrare subito una stima indicativa. Le simulazioni
+            # usano il generatore globale, che alla fine torna com'era
+            sim = game_state.fork()
+            sim.missions.verbose = False
+            complete = True
+            state = random.getstate()
+            try:
+                for pair, estimate in list(estimates.items()):
+                    if time.perf_counter() >= deadline:
+                        complete = False  # Le coppie rimaste passano ai worker
+                        break
+                    try:
+                        result = simulate_pair(sim, snapshot, pair[0], pair[1], self.initial_rollouts)
+                    except SIMULATION_ERRORS as e:
+                        _report_failure(pair, e)
+                        result = None
+                    if result is None:
+                        del estimates[pair]
+                    else:
+                        estimate.merge(*result)
+            finally:
+                random.setstate(state)
+            if complete:
+                self._remember(key, estimates)
+        else:
+            self._cache.move_to_end(key)
+        yield self._simulated(estimates)
+
+        if self.workers <= 0 or not estimates:
+            return
+        self.warm_up()
+        rollouts = self.batch_rollouts
+        while time.perf_counter() < deadline:
+            jobs = {
+                self._pool.submit(_worker_task, snapshot, mission_number, agent_id,
+                                  rollouts, self._seeds.getrandbits(64)): (mission_number, agent_id)
+                for mission_number, agent_id in estimates
+            }
+            pending = set(jobs)
+            while pending:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    for future in pending:
+                        future.cancel()
+                    return
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        mission_number, agent_id, result = future.result()
+                    except SIMULATION_ERRORS as e:
+                        _report_failure(jobs[future], e)
+                        continue
+                    if result is None:
+                        estimates.pop((mission_number, agent_id), None)
+                    else:
+                        estimates[(mission_number, agent_id)].merge(*result)
+                if done:
+                    yield self._simulated(estimates)
+            # Giro completato: il prossimo raddoppia le simulazioni per coppia
+            rollouts *= 2
+
+    @staticmethod
+    def _simulated(estimates: Dict[PairKey, MissionEstimate]) -> Dict[PairKey, MissionEstimate]:
+        if all(estimate.samples for estimate in estimates.values()):
+            return estimates
+        return {pair: estimate for pair, estimate in estimates.items() if estimate.samples}
+
+    def estimate(self, game_state, budget_ms: float = 200) -> Dict[PairKey, MissionEstimate]:
+        """Versione bloccante di stream: restituisce le stime allo scadere del budget"""
+        estimates = {}
+        for estimates in self.stream(game_state, budget_ms):
+            pass
+        return estimates
+
+    def _remember(self, key: str, estimates: Dict[PairKey, MissionEstimate]):
+        self._cache[key] = estimates
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
@@ -0,0 +1,335 @@
+from dataclasses import dataclass
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+
+from .squads import MAX_SQUAD, MIN_SQUAD, PROTECTIVE_SKILLS, RISK_SYNERGY, REWARD_SYNERGY, squad_factors
+
+# Valore di ogni unità di ricompensa rispetto a un'unità di risorsa
+REWARD_WEIGHTS = {
+    "prestige": 2.0,
+    "morale": 1.0,
+    "intel_points": 0.5,
+}
+
+# Abilità utili per ogni tipo di ricompensa: un agente portato per la
+# missione ne ottiene un piccolo bonus nel punteggio
+REWARD_SKILLS = {
+    "resources": ("survival",),
+    "intel_points": ("research",),
+    "prestige": ("diplomacy", "combat"),
+    "morale": ("medical", "diplomacy"),
+}
+
+@dataclass
+class Assignment:
+    """Assegnazione proposta: un agente su una missione giornaliera"""
+    mission_number: int
+    mission_title: str
+    agent_id: str
+    agent_name: str
+    level_id: Optional[str]
+    survival_chance: float
+    expected_value: float
+
+@dataclass
+class SquadSuggestion:
+    """Squadra proposta per una missione giornaliera"""
+    mission_number: int
+    mission_title: str
+    agent_ids: Tuple[str, ...]
+    agent_names: Tuple[str, ...]
+    level_id: Optional[str]
+    risk_factor: float        # Moltiplicatore del rischio giornaliero
+    reward_multiplier: float
+    survival_chance: float    # Probabilità che almeno un agente torni
+    expected_value: float
+
+def hungarian(cost: List[List[float]]) -> List[int]:
+    """Assegnamento a costo minimo (algoritmo ungherese, O(n²·m)).
+
+    cost è una matrice n × m con n <= m; restituisce per ogni riga
+    la colonna assegnata.
+    """
+    n = len(cost)
+    m = len(cost[0]) if n else 0
+    if n > m:
+        raise ValueError("La matrice dei costi deve avere almeno tante colonne quante righe")
+    inf = float("inf")
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    owner = [0] * (m + 1)  # owner[j]: riga (1-based) assegnata alla colonna j
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        owner[0] = i
+        j0 = 0
+        minv = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            row = cost[i0 - 1]
+            ui0 = u[i0]
+            delta = inf
+            j1 = 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    reduced = row[j - 1] - ui0 - v[j]
+                    if reduced < minv[j]:
+                        minv[j] = reduced
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[owner[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+    result = [0] * n
+    for j in range(1, m + 1):
+        if owner[j]:
+            result[owner[j] - 1] = j - 1
+    return result
+
+class AssignmentSolver:
+    """Sceglie quale agente mandare su quale missione, e in quale livello.
+
+    Ogni terna (agente, missione, livello) riceve un valore atteso:
+    ricompense pesate per la probabilità di sopravvivere a tutta la
+    missione, meno le perdite causate dalla morte dell'agente. Le
+    ricompense dipendono solo da missione e livello e vengono calcolate
+    una volta sola; il rischio arriva dalla tabella precalcolata di
+    MissionManager (DeathRiskTable). L'assegnazione migliore
+    si ottiene con l'algoritmo ungherese; un agente resta a riposo se
+    nessuna missione ha valore atteso positivo.
+    """
+
+    def __init__(self, reward_weights: Dict[str, float] = None, skill_weight: float = 0.1):
+        self.reward_weights = reward_weights or REWARD_WEIGHTS
+        self.skill_weight = skill_weight
+
+    def reward_value(self, rewards: Dict) -> float:
+        value = sum(amount * self.reward_weights.get(resource, 1.0)
+                    for resource, amount in rewards.get("resources", {}).items())
+        value += sum(amount * self.reward_weights.get(stat, 1.0)
+                     for stat, amount in rewards.get("stats", {}).items())
+        value += rewards.get("intel_points", 0) * self.reward_weights["intel_points"]
+        return value
+
+    def affinity(self, skill_level: float) -> float:
+        """Bonus nel punteggio per il livello medio nelle abilità utili alla missione"""
+        return 1.0 + self.skill_weight * (skill_level - 2) / 2
+
+    def death_cost(self, mission, agent) -> float:
+        """Perdite della base se l'agente muore (vedi MissionManager.update_missions)"""
+        morale_loss = 30 + agent.level * 5
+        prestige_loss = 10 + agent.level * 2
+        recovery = (5 + mission.duration) + (3 + mission.duration) + (5 + mission.duration)
+        return (morale_loss * self.reward_weights["morale"]
+                + prestige_loss * self.reward_weights["prestige"]
+                + recovery)
+
+    @staticmethod
+    def mission_skills(mission) -> Tuple[str, ...]:
+        skills = []
+        for category in mission.rewards:
+            if category == "stats":
+                for stat in mission.rewards["stats"]:
+                    skills.extend(REWARD_SKILLS.get(stat, ()))
+            else:
+                skills.extend(REWARD_SKILLS.get(category, ()))
+        return tuple(skills)
+
+    def _mission_options(self, mission, game_state) -> List[Tuple[Optional[str], float]]:
+        """Livelli possibili della missione con le relative ricompense (indipendenti dall'agente)"""
+        intel = game_state.intel
+        return [
+            (level_id, self.reward_value(mission.calculate_rewards(
+                intel.get_known_difficulty(level_id) if level_id else 1)))
+            for level_id in game_state.missions.get_valid_levels(mission, game_state) or [None]
+        ]
+
+    def score_matrix(self, game_state) -> Tuple[list, list, List[List[Tuple[float, Optional[str], float]]]]:
+        """Matrice agenti × missioni di (valore atteso, livello migliore, sopravvivenza).
+
+        Restituisce anche gli agenti disponibili e le coppie (numero, missione)
+        avviabili, nello stesso ordine di righe e colonne.
+        """
+        manager = game_state.missions
+        agents = game_state.personnel.query(status="available")
+        missions = [
+            (number, mission)
+            for number, mission in enumerate(manager.daily_missions, 1)
+            if manager.check_prerequisites(mission, game_state)[0]
+        ]
+        options = [self._mission_options(mission, game_state) for _, mission in missions]
+        skills = [self.mission_skills(mission) for _, mission in missions]
+
+        survival = manager.death_risk.survival
+        intel = game_state.intel
+        matrix = []
+        for agent in agents:
+            row = []
+            for (_, mission), mission_options, mission_skills in zip(missions, options, skills):
+                affinity = 1.0
+                if mission_skills:
+                    affinity = self.affinity(
+                        sum(getattr(agent, skill) for skill in mission_skills) / len(mission_skills))
+                loss = self.death_cost(mission, agent)
+                best = None
+                for level_id, value in mission_options:
+                    chance = survival(intel, level_id, mission.duration, agent.exp)
+                    score = chance * value * affinity - (1 - chance) * loss
+                    if best is None or score > best[0]:
+                        best = (score, level_id, chance)
+                row.append(best)
+            matrix.append(row)
+        return agents, missions, matrix
+
+    def solve(self, game_state) -> List[Assignment]:
+        """Assegnazione che massimizza il valore atteso totale della giornata"""
+        agents, missions, matrix = self.score_matrix(game_state)
+        if not agents or not missions:
+            return []
+        # Una colonna di riposo per agente (valore 0): chi non conviene
+        # mandare in missione resta alla base
+        idle = [0.0] * len(agents)
+        cost = [[-cell[0] for cell in row] + idle for row in matrix]
+        assignments = []
+        for row, column in enumerate(hungarian(cost)):
+            if column >= len(missions):
+                continue
+            value, level_id, survival = matrix[row][column]
+            if value <= 0:
+                continue
+            number, mission = missions[column]
+            agent = agents[row]
+            assignments.append(Assignment(number, mission.title, agent.id, agent.name,
+                                          level_id, survival, value))
+        assignments.sort(key=lambda a: a.mission_number)
+        return assignments
+
+    def apply(self, game_state, assignments: List[Assignment]) -> List[Dict]:
+        """Avvia le missioni proposte e restituisce i risultati di start_mission"""
+        results = []
+        # Avviare una missione la toglie dalla lista giornaliera: si procede
+        # dall'ultima per non spostare i numeri di quelle ancora da avviare
+        for assignment in sorted(assignments, key=lambda a: a.mission_number, reverse=True):
+            results.append(game_state.missions.start_mission(
+                assignment.mission_number, assignment.agent_id, game_state,
+                level_id=assignment.level_id))
+        results.reverse()
+        return results
+
+class SquadPlanner:
+    """Propone le squadre migliori per una missione giornaliera.
+
+    Il valore atteso di una squadra è quello di AssignmentSolver esteso a
+    più agenti: le ricompense arrivano se almeno un membro sopravvive,
+    ogni membro che muore costa come una perdita singola, e la squadra
+    modifica rischio e ricompense con squad_factors. Le squadre possibili
+    crescono in modo combinatorio, quindi:
+
+    - i candidati sono pochi agenti scelti dagli indici del roster (i
+      migliori disponibili per ogni abilità utile e per ogni ruolo con
+      una sinergia), non tutto il personale;
+    - per ogni candidato si calcolano una volta colonne di abilità, costo
+      della morte e rischio base per livello, così valutare una squadra
+      è solo aritmetica su indici;
+    - la ricerca parte da tutte le coppie e allarga a ogni passo solo le
+      beam_width squadre migliori (beam search).
+    """
+
+    def __init__(self, solver: AssignmentSolver = None, beam_width: int = 16, per_skill: int = 4):
+        self.solver = solver or AssignmentSolver()
+        self.beam_width = beam_width
+        self.per_skill = per_skill
+
+    def candidates(self, personnel, skills: Tuple[str, ...]) -> list:
+        """Agenti disponibili più promettenti per le abilità indicate"""
+        found = {}
+        for skill in dict.fromkeys(skills + PROTECTIVE_SKILLS):
+            for agent in personnel.query(status="available", order_by=f"-{skill}", limit=self.per_skill):
+                found.setdefault(agent.id, agent)
+        for role_id in dict.fromkeys(list(RISK_SYNERGY) + list(REWARD_SYNERGY)):
+            for agent in personnel.query(role=role_id, status="available", order_by="-level", limit=1):
+                found.setdefault(agent.id, agent)
+        return list(found.values())
+
+    def suggest(self, game_state, mission_number: int, top: int = 3,
+                max_size: int = MAX_SQUAD) -> List[SquadSuggestion]:
+        """Le top squadre (da MIN_SQUAD a max_size agenti) per valore atteso decrescente"""
+        manager = game_state.missions
+        if not 1 <= mission_number <= len(manager.daily_missions):
+            return []
+        mission = manager.daily_missions[mission_number - 1]
+        if not manager.check_prerequisites(mission, game_state)[0]:
+            return []
+        mission_skills = self.solver.mission_skills(mission)
+        agents = self.candidates(game_state.personnel, mission_skills)
+        if len(agents) < MIN_SQUAD:
+            return []
+
+        # Colonne per candidato, calcolate una volta sola
+        intel = game_state.intel
+        duration = mission.duration
+        options = self.solver._mission_options(mission, game_state)
+        roles = [agent.role_id for agent in agents]
+        columns = {skill: [getattr(agent, skill) for agent in agents]
+                   for skill in dict.fromkeys(PROTECTIVE_SKILLS + mission_skills)}
+        costs = [self.solver.death_cost(mission, agent) for agent in agents]
+        risks = [
+            [(manager.death_risk.get(intel, level_id, duration, agent.exp) or 0.0) if level_id else 0.0
+             for agent in agents]
+            for level_id, _ in options
+        ]
+
+        def score(members: Tuple[int, ...]) -> tuple:
+            best_skills = {skill: max(column[i] for i in members) for skill, column in columns.items()}
+            risk_factor, multiplier = squad_factors((roles[i] for i in members), best_skills)
+            gain = multiplier
+            if mission_skills:
+                gain *= self.solver.affinity(
+                    sum(best_skills[skill] for skill in mission_skills) / len(mission_skills))
+            best = None
+            for (level_id, value), level_risks in zip(options, risks):
+                all_lost = 1.0
+                expected_loss = 0.0
+                for i in members:
+                    death = 1 - (1 - min(1.0, level_risks[i] * risk_factor)) ** duration
+                    all_lost *= death
+                    expected_loss += death * costs[i]
+                expected = (1 - all_lost) * value * gain - expected_loss
+                if best is None or expected > best[0]:
+                    best = (expected, level_id, 1 - all_lost)
+            return best + (risk_factor, multiplier)
+
+        scored: Dict[Tuple[int, ...], tuple] = {}
+        frontier = list(combinations(range(len(agents)), MIN_SQUAD))
+        for size in range(MIN_SQUAD, min(max_size, len(agents)) + 1):
+            for members in frontier:
+                scored[members] = score(members)
+            if size == max_size:
+                break
+            beam = sorted(frontier, key=lambda members: scored[members][0], reverse=True)[:self.beam_width]
+            frontier = sorted({
+                tuple(sorted(members + (i,)))
+                for members in beam
+                for i in range(len(agents)) if i not in members
+            })
+
+        ranked = sorted(scored.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        return [
+            SquadSuggestion(mission_number, mission.title,
+                            tuple(agents[i].id for i in members), tuple(agents[i].name for i in members),
+                            level_id, risk_factor, multiplier, survival, expected)
+            for members, (expected, level_id, survival, risk_factor, multiplier) in ranked
+        ]
@@ -10,14 +10,25 @@ from .defense import DefenseSystem
 from .intel import IntelSystem
 from .diplomacy import DiplomaticSystem
 from .market import Market
+from .counters import GameCounters
+from .endings import EndingManager
+from .saves import SaveManager, SaveStore
+from .migrations import SAVE_VERSION, migrate_save
+from .observable import ObservableFields, observed_fields
+from .snapshots import GameSnapshot, shallow_copy
 
-@dataclass
-class GameStats:
+@observed_fields
+@dataclass(slots=True)
+class GameStats(ObservableFields):
     day: int = 1
     prestige: int = 50
     morale: int = 70
     defense_rating: int = 50  # Rating difensivo base
     rank: str = "Recluta"  # Rank iniziale
+    corruption_level: int = 0  # Corruzione della base da 0 a 100
+    
+    def __post_init__(self):
+        self._init_observers()
     
     def calculate_rank(self) -> str:
         if self.prestige >= 150:  # Aumentato da 90
@@ -51,24 +62,40 @@ class GameStats:
 class GameState:
     def __init__(self):
         self.stats = GameStats()
+        self.counters = GameCounters()
         self.resources = Resources()
         self.personnel = Personnel()
         self.events = EventManager()
-        self.missions = MissionManager()
-        self.defense = DefenseSystem()
         self.intel = IntelSystem()
+        self.missions = MissionManager(self.intel)
+        self.defense = DefenseSystem()
         self.diplomacy = DiplomaticSystem()
         self.market = Market()
+        self.endings = EndingManager()
+        # Colonne di mercato fisse: guardare i prezzi di una fazione non aggiunge stato
+        self.market.supply.register(self.diplomacy.organizations)
         self.current_level = "level_0"  # Livello iniziale
+        self._bind_counters()
+        self.endings.bind(self)
+        
+    def _bind_counters(self):
+        """Fa condividere ai sottosistemi il registro dei contatori della partita"""
+        for system in (self.personnel, self.events, self.missions, self.intel):
+            system.counters = self.counters
+        self.intel.recount()
+        self.counters.alive_agents = len(self.personnel.agents)
         
     def new_game(self):
-        self.stats = GameStats()  # Inizializza con i valori predefiniti
+        self.stats.restore(GameStats().snapshot())  # Valori predefiniti
+        self.counters.reset()
         self.resources.reset()
+        self.intel.reset()
         self.personnel.reset()
         self.events.reset()
         self.missions.reset()
         self.diplomacy.reset()
         self.defense.reset()
+        self.endings.reset()
         
         # Aggiungi agenti iniziali
         self.personnel.hire_agent("Gray", "medic")
@@ -89,6 +116,7 @@ class GameState:
                 self.missions.update_missions(self)
                 self.defense.daily_update(self)
                 self.diplomacy.daily_update(self)
+                self.market.daily_update()
                 
                 # Controlla se è stato raggiunto un nuovo rank
                 if self.stats.update_rank():
@@ -108,62 +136,144 @@ class GameState:
             if hasattr(self.stats, 'day'):
                 self.stats.day += 1
         
-    def save_game(self, filename: str):
+    def snapshot(self) -> GameSnapshot:
+        """Copia dello stato mutabile, da usare per annulla/ripeti o simulazioni"""
+        return GameSnapshot(
+            stats=self.stats.snapshot(),
+            current_level=self.current_level,
+            resources=self.resources.snapshot(),
+            personnel=self.personnel.snapshot(),
+            events=self.events.snapshot(),
+            missions=self.missions.snapshot(),
+            defense=self.defense.snapshot(),
+            intel=self.intel.snapshot(),
+            diplomacy=self.diplomacy.snapshot(),
+            market=self.market.snapshot(),
+            counters=self.counters.snapshot(),
+            endings=self.endings.snapshot()
+        )
+        
+    def restore(self, snapshot: GameSnapshot):
+        """Ripristina uno snapshot; lo snapshot resta riutilizzabile"""
+        self.stats.restore(snapshot.stats)
+        self.current_level = snapshot.current_level
+        self.counters.restore(snapshot.counters)
+        self.resources.restore(snapshot.resources)
+        self.personnel.restore(snapshot.personnel)
+        self.events.restore(snapshot.events)
+        self.missions.restore(snapshot.missions)
+        self.personnel.link_missions(self.missions.active_missions)
+        self.defense.restore(snapshot.defense)
+        self.intel.restore(snapshot.intel)
+        self.diplomacy.restore(snapshot.diplomacy)
+        self.market.restore(snapshot.market)
+        self.endings.restore(snapshot.endings)
+        
+    def fork(self) -> "GameState":
+        """Ramo indipendente della partita per simulare scelte alternative.
+
+        I cataloghi caricati dai file JSON sono condivisi con l'originale,
+        lo stato mutabile viene copiato.
+        """
+        snapshot = self.snapshot()
+        clone = shallow_copy(self)
+        clone.stats = GameStats()
+        clone.resources = self.resources.fork()
+        clone.personnel = shallow_copy(self.personnel)
+        clone.events = shallow_copy(self.events)
+        clone.defense = shallow_copy(self.defense)
+        clone.intel = self.intel.fork()
+        clone.diplomacy = shallow_copy(self.diplomacy)
+        clone.market = shallow_copy(self.market)
+        clone.counters = GameCounters()  # Iscrizioni proprie, valori dallo snapshot
+        clone.endings = self.endings.fork()
+        clone.endings.bind(clone)
+        clone.missions = self.missions.fork()
+        clone.missions.bind_intel(clone.intel, rebuild=False)
+        clone._bind_counters()
+        clone.restore(snapshot)
+        return clone
+        
+    def to_dict(self) -> Dict:
+        """Stato serializzabile della partita, diviso per sottosistema"""
+        return {
+            "version": SAVE_VERSION,
+            "stats": {
+                "day": self.stats.day,
+                "prestige": self.stats.prestige,
+                "morale": self.stats.morale,
+                "defense_rating": self.stats.defense_rating,
+                "corruption_level": self.stats.corruption_level
+            },
+            "resources": self.resources.to_dict(),
+            "personnel": self.personnel.to_dict(),
+            "missions": self.missions.to_dict(),
+            "intel": self.intel.to_dict(),
+            "defense": self.defense.to_dict(),
+            "diplomacy": self.diplomacy.to_dict(),
+            "market": self.market.to_dict(),
+            "counters": self.counters.to_dict(),
+            "endings": self.endings.to_dict()
+        }
+
+    def from_dict(self, data: Dict):
+        """Ripristina la partita da un salvataggio già migrato alla versione corrente"""
+        # Reset dello stato prima del caricamento
+        self.events.reset()
+        self.missions.reset()
+        self.diplomacy.reset()
+        
+        # Caricamento dei dati
+        stats = data["stats"]
+        loaded = GameStats(
+            day=stats["day"],
+            prestige=stats["prestige"],
+            morale=stats["morale"],
+            defense_rating=stats["defense_rating"],
+            corruption_level=stats["corruption_level"]
+        )
+        loaded.rank = loaded.calculate_rank()
+        self.stats.restore(loaded.snapshot())
+        
+        # Prima i contatori storici: quelli derivati vengono ricalcolati
+        # dai sottosistemi durante il caricamento
+        self.counters.from_dict(data["counters"])
+        self.resources.from_dict(data["resources"])
+        self.personnel.from_dict(data["personnel"])
+        self.missions.from_dict(data["missions"])
+        self.personnel.link_missions(self.missions.active_missions)
+        self.intel.from_dict(data["intel"])
+        self.defense.from_dict(data["defense"])
+        self.diplomacy.from_dict(data["diplomacy"])
+        self.market.from_dict(data["market"])
+        self.market.supply.register(self.diplomacy.organizations)
+        self.endings.from_dict(data["endings"])
+        
+    def save_game(self, filename: str, save_manager: SaveStore = None):
+        """Salva la partita usando il backend indicato (file JSON se assente)"""
         try:
-            # Assicuriamoci che la cartella saves esista
-            import os
-            if not os.path.exists("saves"):
-                os.makedirs("saves")
-                
-            save_data = {
-                "stats": {
-                    "day": self.stats.day,
-                    "prestige": self.stats.prestige,
-                    "morale": self.stats.morale,
-                    "defense_rating": self.stats.defense_rating
-                },
-                "resources": self.resources.to_dict(),
-                "personnel": self.personnel.to_dict(),
-                "missions": self.missions.to_dict(),
-                "intel": self.intel.to_dict()
-            }
-            
-            save_path = f"saves/{filename}.json"
-            with open(save_path, "w", encoding="utf-8") as f:
-                json.dump(save_data, f, ensure_ascii=False, indent=4)
+            save_manager = save_manager or SaveManager()
+            save_path = save_manager.write_save(filename, self.to_dict())
             print(f"Partita salvata con successo in: {save_path}")
         except Exception as e:
             print(f"Errore durante il salvataggio: {e}")
             raise ValueError("Impossibile salvare la partita")
             
-    def load_game(self, filename: str):
+    def load_game(self, filename: str, save_manager: SaveStore = None):
         try:
-            save_path = f"saves/{filename}.json"
-            if not os.path.exists(save_path):
-                raise FileNotFoundError(f"File di salvataggio non trovato: {save_path}")
-                
-            with open(save_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                
-            # Reset dello stato prima del caricamento
-            self.events.reset()
-            self.missions.reset()
-            self.diplomacy.reset()
-            
-            # Caricamento dei dati
-            self.stats = GameStats(
-                day=data["stats"]["day"],
-                prestige=data["stats"]["prestige"],
-                morale=data["stats"]["morale"],
-                defense_rating=data["stats"]["defense_rating"]
-            )
+            save_manager = save_manager or SaveManager()
+            data, upgraded = migrate_save(save_manager.read_save(filename))
+            self.from_dict(data)
             
-            self.resources.from_dict(data["resources"])
-            self.personnel.from_dict(data["personnel"])
-            self.missions.from_dict(data["missions"])
-            self.intel.from_dict(data["intel"])
+            # Migrazione pigra: lo slot viene riscritto nel formato corrente
+            # la prima volta che viene caricato
+            if upgraded:
+                try:
+                    save_manager.write_save(filename, data)
+                except OSError as e:
+                    print(f"Impossibile aggiornare il formato del salvataggio: {e}")
             
-            print(f"Partita caricata con successo da: {save_path}")
+            print(f"Partita caricata con successo da: {filename}")
         except FileNotFoundError as e:
             print(f"Errore: {e}")
             raise ValueError("Salvataggio non trovato")
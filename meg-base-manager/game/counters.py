@@ -0,0 +1,50 @@
+from dataclasses import dataclass, fields
+from typing import Dict
+from .observable import ObservableFields, observed_fields
+
+# Contatori che crescono con le ricompense delle missioni e gli effetti
+# "counters" degli eventi, non con la chiusura di un sottosistema
+REWARD_COUNTERS = ("classified_documents", "reality_fragments", "dream_resonance")
+
+@observed_fields
+@dataclass
+class GameCounters(ObservableFields):
+    """Contatori globali della partita.
+
+    Ogni sottosistema aggiorna i propri contatori nel momento in cui
+    modifica lo stato, così prerequisiti e finali li leggono in O(1)
+    invece di ricalcolarli scorrendo livelli e agenti. I contatori
+    derivati (intel, agenti, segreti) vengono ricalcolati dai
+    sottosistemi dopo un caricamento; quelli storici esistono solo qui.
+    Come GameStats sono osservabili: i finali si iscrivono invece di
+    rileggerli a ogni controllo.
+    """
+    total_intel: int = 0          # Somma dei punti intel di tutti i livelli
+    alive_agents: int = 0         # Agenti attualmente nella base
+    lost_agents: int = 0          # Agenti morti o dispersi in missione
+    failed_missions: int = 0      # Missioni terminate con la morte dell'agente
+    entity_encounters: int = 0    # Eventi con entità ostili
+    dark_events: int = 0          # Eventi oscuri subiti dalla base
+    temporal_anomalies: int = 0   # Eventi di distorsione temporale
+    transcendence_events: int = 0 # Eventi di breccia nella realtà
+    discovered_secrets: int = 0   # Segreti scoperti in tutti i livelli
+    classified_documents: int = 0 # Documenti classificati recuperati
+    reality_fragments: int = 0    # Frammenti di realtà raccolti
+    dream_resonance: int = 0      # Risonanza onirica accumulata
+
+    def __post_init__(self):
+        self._init_observers()
+
+    def add(self, name: str, amount: int = 1):
+        setattr(self, name, getattr(self, name) + amount)
+
+    def to_dict(self) -> Dict:
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+    def from_dict(self, data: Dict):
+        for f in fields(self):
+            setattr(self, f.name, data.get(f.name, 0))
+
+    def reset(self):
+        # Aggiornamento in place: i sottosistemi tengono un riferimento a questo oggetto
+        self.restore(GameCounters().snapshot())
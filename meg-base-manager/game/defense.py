@@ -1,13 +1,13 @@
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 import random
-from dataclasses import dataclass
-from typing import Dict, List, Optional
-import random
+from array import array
 from .events import Event, EventManager  # Importazione corretta di Event ed EventManager
+from .resources import RESOURCES
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DefenseStructure:
+    """Definizione di una struttura dal catalogo: condivisa e mai modificata"""
     name: str
     level: int = 1
     defense_bonus: int = 0     # Bonus difesa base
@@ -27,6 +27,7 @@ class DefenseSystem:
         self.defense_rating: int = 10
         self.structures: List[DefenseStructure] = []
         self.research_progress: float = 0.0  # Progresso verso il prossimo punto intel
+        self._production_cache = None  # Vedi production_totals
         
         # Strutture disponibili
         self.available_structures = {
@@ -252,60 +253,44 @@ class DefenseSystem:
             "event_probability": self.alert_level * 0.1  # Probabilità di eventi casuali
         }
         
+    def _specialist_bonus(self, personnel, bonus: str) -> float:
+        """Bonus degli specialisti: ogni agente del ruolo giusto moltiplica il bonus della struttura.
+
+        Usa i conteggi per ruolo tenuti dal roster, quindi il costo dipende
+        dalle strutture e non dal numero di agenti.
+        """
+        total = 0
+        for structure in self.structures:
+            base = getattr(structure, bonus)
+            if structure.specialist_bonus and base:
+                for role_id, multiplier in structure.specialist_bonus.items():
+                    total += base * (multiplier - 1) * personnel.count_role(role_id)
+        return total
+        
     def get_research_bonus(self, personnel) -> int:
         """Calcola il bonus totale alla ricerca considerando le strutture e le specializzazioni"""
         base_bonus = sum(s.research_bonus for s in self.structures)
-        specialist_bonus = 0
-        for structure in self.structures:
-            if structure.specialist_bonus:
-                for agent in personnel.agents:
-                    if agent.role.lower() in structure.specialist_bonus:
-                        specialist_bonus += structure.research_bonus * (structure.specialist_bonus[agent.role.lower()] - 1)
-        return base_bonus + int(specialist_bonus)
+        return base_bonus + int(self._specialist_bonus(personnel, "research_bonus"))
         
     def get_medical_bonus(self, personnel) -> int:
         """Calcola il bonus medico totale"""
         base_bonus = sum(s.medical_bonus for s in self.structures)
-        specialist_bonus = 0
-        for structure in self.structures:
-            if structure.specialist_bonus:
-                for agent in personnel.agents:
-                    if agent.role.lower() in structure.specialist_bonus:
-                        specialist_bonus += structure.medical_bonus * (structure.specialist_bonus[agent.role.lower()] - 1)
-        return base_bonus + int(specialist_bonus)
+        return base_bonus + int(self._specialist_bonus(personnel, "medical_bonus"))
         
     def get_diplomatic_bonus(self, personnel) -> int:
         """Calcola il bonus diplomatico totale"""
         base_bonus = sum(s.diplomatic_bonus for s in self.structures)
-        specialist_bonus = 0
-        for structure in self.structures:
-            if structure.specialist_bonus:
-                for agent in personnel.agents:
-                    if agent.role.lower() in structure.specialist_bonus:
-                        specialist_bonus += structure.diplomatic_bonus * (structure.specialist_bonus[agent.role.lower()] - 1)
-        return base_bonus + int(specialist_bonus)
+        return base_bonus + int(self._specialist_bonus(personnel, "diplomatic_bonus"))
         
     def get_survival_bonus(self, personnel) -> int:
         """Calcola il bonus alla sopravvivenza totale"""
         base_bonus = sum(s.survival_bonus for s in self.structures)
-        specialist_bonus = 0
-        for structure in self.structures:
-            if structure.specialist_bonus:
-                for agent in personnel.agents:
-                    if agent.role.lower() in structure.specialist_bonus:
-                        specialist_bonus += structure.survival_bonus * (structure.specialist_bonus[agent.role.lower()] - 1)
-        return base_bonus + int(specialist_bonus)
+        return base_bonus + int(self._specialist_bonus(personnel, "survival_bonus"))
         
     def get_morale_bonus(self, personnel) -> int:
         """Calcola il bonus al morale totale"""
         base_bonus = sum(s.morale_bonus for s in self.structures)
-        specialist_bonus = 0
-        for structure in self.structures:
-            if structure.specialist_bonus:
-                for agent in personnel.agents:
-                    if agent.role.lower() in structure.specialist_bonus:
-                        specialist_bonus += structure.morale_bonus * (structure.specialist_bonus[agent.role.lower()] - 1)
-        return base_bonus + int(specialist_bonus)
+        return base_bonus + int(self._specialist_bonus(personnel, "morale_bonus"))
         
     def get_structure_by_number(self, number: int) -> Optional[DefenseStructure]:
         """Ottieni una struttura dal suo numero (1-based)"""
@@ -341,7 +326,7 @@ class DefenseSystem:
         self.defense_rating += structure.defense_bonus
         
         # Aggiorna anche gli altri bonus
-        game_state.stats.morale += structure.morale_bonus
+        game_state.stats.adjust("morale", structure.morale_bonus)
         
         # Se viene costruita l'ambasciata, abilita la diplomazia
         if structure.name == "Ambasciata":
@@ -370,26 +355,64 @@ class DefenseSystem:
     def from_dict(self, data: Dict):
         self.alert_level = data["alert_level"]
         self.defense_rating = data["defense_rating"]
+        # Le strutture costruite vengono ricollegate al catalogo per nome,
+        # così bonus e produzione giornaliera tornano quelli completi
+        by_name = {s.name: s for s in self.available_structures.values()}
         self.structures = [
-            DefenseStructure(
+            by_name.get(s["name"]) or DefenseStructure(
                 s["name"],
                 s["level"],
-                s["defense_bonus"],
-                {}  # I costi non sono necessari per strutture già costruite
+                defense_bonus=s["defense_bonus"]
             )
             for s in data["structures"]
         ]
         
+    def snapshot(self) -> tuple:
+        # Le strutture costruite sono le definizioni del catalogo, mai modificate
+        return (self.alert_level, self.defense_rating, self.research_progress, tuple(self.structures))
+        
+    def restore(self, state: tuple):
+        self.alert_level, self.defense_rating, self.research_progress, structures = state
+        self.structures = list(structures)
+        
     def reset(self):
         self.__init__()
+        
+    def production_totals(self) -> tuple:
+        """Produzione giornaliera complessiva delle strutture costruite.
+
+        Restituisce (produzione, consumo, morale, [(struttura, intel)]), con
+        produzione e consumo come vettori allineati al registro delle risorse.
+        Il risultato cambia solo quando cambiano le strutture e viene
+        memorizzato fino ad allora.
+        """
+        key = tuple(map(id, self.structures))
+        cached = self._production_cache
+        if cached is not None and cached[0] == key and len(cached[1]) == len(RESOURCES):
+            return cached[1:]
+        production = array("d", bytes(8 * len(RESOURCES)))
+        consumption = array("d", bytes(8 * len(RESOURCES)))
+        morale = 0
+        intel_sources = []
+        for structure in self.structures:
+            for resource, amount in structure.daily_production.items():
+                if resource == "morale":
+                    morale += amount
+                elif resource == "intel_points":
+                    intel_sources.append((structure.name, amount))
+                elif resource in RESOURCES:
+                    target = production if amount >= 0 else consumption
+                    target[RESOURCES.index[resource]] += amount
+        self._production_cache = (key, production, consumption, morale, intel_sources)
+        return production, consumption, morale, intel_sources
+        
     def daily_update(self, game_state):
         """Aggiorna il progresso della ricerca, genera intel points e gestisce produzione"""
         # Ottieni effetti dell'allerta
         alert_effects = self.get_alert_effects()
         
         # Applica effetti dell'allerta al morale
-        game_state.stats.morale = max(0, min(100, 
-            game_state.stats.morale + alert_effects["morale_effect"]))
+        game_state.stats.adjust("morale", alert_effects["morale_effect"], 0, 100)
         
         # Gestione ricerca (modificata dall'allerta)
         research_power = sum(s.research_bonus for s in self.structures)
@@ -402,20 +425,19 @@ class DefenseSystem:
                 game_state.intel.add_intel_points("level_0", 5, "Ricerca")
                 
         # Produzione giornaliera delle strutture (influenzata dall'allerta)
-        for structure in self.structures:
-            for resource, amount in structure.daily_production.items():
-                if resource == "morale":
-                    final_amount = amount * (2 - alert_effects["resource_multiplier"])
-                    game_state.stats.morale = min(100, 
-                        game_state.stats.morale + final_amount)
-                elif resource == "intel_points":
-                    game_state.intel.add_intel_points("level_0", amount, 
-                        f"Produzione {structure.name}")
-                else:
-                    # Consumo risorse aumenta con l'allerta alta
-                    if amount < 0:  # Se è un consumo
-                        amount = amount * alert_effects["resource_multiplier"]
-                    game_state.resources.modify(resource, amount)
+        if self.structures:  # Senza strutture i totali sono tutti zero
+            production, consumption, morale, intel_sources = self.production_totals()
+            multiplier = alert_effects["resource_multiplier"]
+            if morale:
+                game_state.stats.adjust("morale", morale * (2 - multiplier), high=100)
+            for name, amount in intel_sources:
+                game_state.intel.add_intel_points("level_0", amount, f"Produzione {name}")
+            # Consumo risorse aumenta con l'allerta alta
+            if any(consumption):
+                game_state.resources.apply_deltas(array("d", (
+                    produced + consumed * multiplier for produced, consumed in zip(production, consumption))))
+            elif any(production):
+                game_state.resources.apply_deltas(production)
                 
         # Sistema di infiltrazione
         if random.random() < 0.1:  # 10% di chance giornaliera di infiltrazione
@@ -436,7 +458,7 @@ class DefenseSystem:
                         {"resources": {resource: -amount}}
                     ), game_state)
                 elif target == "morale":
-                    game_state.stats.morale = max(0, game_state.stats.morale - damage * 5)
+                    game_state.stats.adjust("morale", -damage * 5, low=0)
                     game_state.events.trigger_event(Event(
                         "infiltration",
                         "Infiltrazione",
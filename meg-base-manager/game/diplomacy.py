@@ -1,6 +1,21 @@
+from array import array
+from bisect import bisect_right
 from dataclasses import dataclass, field
-from typing import Dict, List
+from typing import Callable, Dict, Tuple
+import json
 import random
+from .effects import compile_effects
+from .factions import FactionGraph
+from .roster import sampled_rows
+from .snapshots import shallow_copy
+
+# Soglie di relationship_threshold in ordine crescente e status corrispondenti:
+# bisect_right(soglie, attitudine) è l'indice dello status in STATUS_NAMES
+THRESHOLD_KEYS = ("hostile", "unfriendly", "neutral", "friendly", "allied")
+STATUS_NAMES = ("ostile", "poco amichevole", "neutrale", "amichevole", "alleato", "alleato fidato")
+HOSTILE_LEVELS = 2    # Ostile e poco amichevole: le relazioni tendono a peggiorare
+FRIENDLY_LEVEL = 3    # Da amichevole in su: tendono a migliorare e arrivano eventi speciali
+DRIFT_CHANCE = 0.1    # Probabilità giornaliera che la relazione cambi da sola
 
 @dataclass
 class Organization:
@@ -22,6 +37,13 @@ class Organization:
         # Sopra 90: alleato fidato
     })
 
+@dataclass(frozen=True)
+class OrganizationEffects:
+    """Effetti di un'organizzazione da organizations.json, già compilati"""
+    help: Dict[str, Tuple[str, Callable]]  # Tipo di aiuto -> (messaggio, effetti)
+    event_title: str
+    event: Callable
+
 class DiplomaticSystem:
     def __init__(self):
         self.organizations = {
@@ -92,6 +114,37 @@ class DiplomaticSystem:
         }
         self.embassy_built = False
         self.active_treaties = []
+        catalog = self.load_catalog()
+        self.effects = self.compile_effects(catalog)
+        self.graph = FactionGraph(self.organizations,
+                                  {entry["id"]: entry.get("relations", {}) for entry in catalog["organizations"]})
+        # Variazioni di attitudine della giornata, propagate ai vicini da daily_update
+        self.pending_changes: Dict[str, float] = {}
+        
+        # Soglie di tutte le organizzazioni in un array piatto, len(THRESHOLD_KEYS)
+        # per organizzazione; le righe si aggiungono alla prima richiesta
+        self._threshold_rows: Dict[str, int] = {}
+        self._thresholds = array("d")
+        self._daily_plan = None
+
+    def load_catalog(self) -> Dict:
+        with open("data/organizations.json", encoding="utf-8") as f:
+            return json.load(f)
+
+    def compile_effects(self, catalog: Dict) -> Dict[str, OrganizationEffects]:
+        """Compila una volta sola aiuti ed eventi speciali delle organizzazioni"""
+        effects = {}
+        for entry in catalog["organizations"]:
+            org_id = entry["id"]
+            help_effects = {
+                help_type: (help_data["message"],
+                            compile_effects(help_data["effects"], entry["intel_source"], org_id))
+                for help_type, help_data in entry["help"].items()
+            }
+            event = entry["special_event"]
+            effects[org_id] = OrganizationEffects(
+                help_effects, event["title"], compile_effects(event["effects"], event["title"], org_id))
+        return effects
 
     def has_embassy(self) -> bool:
         return self.embassy_built
@@ -118,24 +171,37 @@ class DiplomaticSystem:
     def modify_relation(self, organization_id: str, amount: int) -> bool:
         if not self.can_interact(organization_id):
             return False
+        return self._shift_attitude(self.organizations[organization_id], amount)
 
-        org = self.organizations[organization_id]
+    def _shift_attitude(self, org: Organization, amount: float, propagate: bool = True) -> bool:
         old_attitude = org.attitude
-        org.attitude = max(0, min(100, org.attitude + amount))
+        attitude = org.attitude = max(0, min(100, old_attitude + amount))
 
         # Aggiorna bonus in base all'attitudine
-        if org.attitude >= 80 and not org.intel_sharing:
-            org.intel_sharing = True
-        elif org.attitude < 80 and org.intel_sharing:
-            org.intel_sharing = False
+        org.intel_sharing = attitude >= 80
+        org.military_support = attitude >= 90
+        org.trade_bonus = 1.0 + (attitude / 100)
+        
+        if attitude == old_attitude:
+            return False
+        # Conta la variazione effettiva, dopo i limiti 0-100
+        if propagate:
+            self.pending_changes[org.id] = self.pending_changes.get(org.id, 0) + attitude - old_attitude
+        return True
 
-        if org.attitude >= 90 and not org.military_support:
-            org.military_support = True
-        elif org.attitude < 90 and org.military_support:
-            org.military_support = False
+    def propagate_relations(self) -> Dict[str, float]:
+        """Applica ai vicini nel grafo le variazioni accumulate dall'ultima propagazione.
 
-        org.trade_bonus = 1.0 + (org.attitude / 100)
-        return org.attitude != old_attitude
+        Le variazioni indotte non si propagano a loro volta: ogni cambiamento
+        raggiunge solo i vicini diretti, il giorno dopo.
+        """
+        if not self.pending_changes:
+            return {}
+        changes, self.pending_changes = self.pending_changes, {}
+        induced = self.graph.propagate(changes)
+        for org_id, amount in induced.items():
+            self._shift_attitude(self.organizations[org_id], amount, propagate=False)
+        return induced
 
     def request_help(self, organization_id: str, help_type: str, game_state) -> Dict:
         if not self.can_interact(organization_id):
@@ -154,71 +220,12 @@ class DiplomaticSystem:
         if success:
             self.modify_relation(organization_id, -5)  # Diminuisce leggermente il rapporto per ogni richiesta
             
-            # Effetti speciali in base all'organizzazione
+            # Effetti speciali in base all'organizzazione (l'intel copre ogni richiesta non militare)
             special_effects = ""
-            if org.id == "partygoers":
-                if help_type == "military":
-                    game_state.defense.defense_rating += 5
-                    special_effects = "Bonus difesa temporaneo ottenuto"
-                else:
-                    game_state.intel.add_intel_points("level_0", 15, "Festaioli")
-                    special_effects = "Informazioni sul Livello Fun ottenute"
-                    
-            elif org.id == "meg":
-                if help_type == "military":
-                    game_state.resources.modify("supplies", 20)
-                    special_effects = "Rifornimenti extra ricevuti"
-                else:
-                    game_state.intel.add_intel_points("level_0", 10, "M.E.G. Centrale")
-                    special_effects = "Database M.E.G. consultato"
-                    
-            elif org.id == "bluestar":
-                if help_type == "military":
-                    game_state.resources.modify("medical", 15)
-                    special_effects = "Tecnologie mediche avanzate ricevute"
-                else:
-                    game_state.intel.add_intel_points("level_0", 20, "Stella Blu")
-                    special_effects = "Analisi anomalie effettuata"
-                    
-            elif org.id == "crimson":
-                if help_type == "military":
-                    game_state.defense.defense_rating += 10
-                    special_effects = "Squadra d'assalto inviata"
-                else:
-                    game_state.intel.add_intel_points("level_0", 5, "Ordine Cremisi")
-                    special_effects = "Rapporto situazionale ricevuto"
-                    
-            elif org.id == "library":
-                if help_type == "military":
-                    game_state.resources.modify("almond_water", 10)
-                    special_effects = "Scorte di emergenza condivise"
-                else:
-                    game_state.intel.add_intel_points("level_0", 25, "Biblioteca")
-                    special_effects = "Archivi consultati"
-                    
-            elif org.id == "wanderers":
-                if help_type == "military":
-                    game_state.resources.modify("fuel", 15)
-                    special_effects = "Carburante extra ricevuto"
-                else:
-                    game_state.intel.add_intel_points("level_0", 15, "Vagabondi")
-                    special_effects = "Nuove rotte commerciali scoperte"
-                    
-            elif org.id == "eyes":
-                if help_type == "military":
-                    game_state.stats.prestige += 5
-                    special_effects = "Prestigio aumentato"
-                else:
-                    game_state.intel.add_intel_points("level_0", 30, "Gli Occhi")
-                    special_effects = "Informazioni segrete ottenute"
-                    
-            elif org.id == "facelings":
-                if help_type == "military":
-                    game_state.defense.defense_rating += 15
-                    special_effects = "Protezione sovrannaturale ottenuta"
-                else:
-                    game_state.intel.add_intel_points("level_0", 35, "Senza Volto")
-                    special_effects = "Conoscenza antica rivelata"
+            org_effects = self.effects.get(org.id)
+            if org_effects is not None:
+                special_effects, apply = org_effects.help["military" if help_type == "military" else "intel"]
+                apply(game_state)
 
             return {
                 "success": True,
@@ -228,8 +235,8 @@ class DiplomaticSystem:
         else:
             # Penalità più severe per infiltrazioni fallite
             self.modify_relation(organization_id, -15)  # Diminuisce maggiormente le relazioni
-            game_state.stats.morale -= 5  # Impatta il morale della base
-            game_state.stats.prestige -= 3  # Danneggia il prestigio
+            game_state.stats.adjust("morale", -5)  # Impatta il morale della base
+            game_state.stats.adjust("prestige", -3)  # Danneggia il prestigio
             if random.random() < 0.2:  # 20% di chance di perdere risorse
                 game_state.resources.modify("supplies", -10)
                 game_state.resources.modify("medical", -5)
@@ -242,26 +249,27 @@ class DiplomaticSystem:
                 "message": f"{org.name} ha rifiutato la richiesta"
             }
 
+    def _threshold_start(self, org: Organization) -> int:
+        start = self._threshold_rows.get(org.id)
+        if start is None:
+            thresholds = [org.relationship_threshold[key] for key in THRESHOLD_KEYS]
+            if thresholds != sorted(thresholds):
+                raise ValueError(f"Soglie di relazione non crescenti per {org.id}")
+            start = self._threshold_rows[org.id] = len(self._thresholds)
+            self._thresholds.extend(thresholds)
+        return start
+
+    def relationship_level(self, organization_id: str) -> int:
+        """Indice dello status in STATUS_NAMES, da 0 (ostile) a 5 (alleato fidato)"""
+        org = self.organizations[organization_id]
+        start = self._threshold_start(org)
+        return bisect_right(self._thresholds, org.attitude, start, start + len(THRESHOLD_KEYS)) - start
+
     def get_relationship_status(self, organization_id: str) -> str:
         """Determina lo status della relazione con un'organizzazione"""
         if not self.can_interact(organization_id):
             return "non disponibile"
-            
-        org = self.organizations[organization_id]
-        attitude = org.attitude
-        
-        if attitude >= org.relationship_threshold["allied"]:
-            return "alleato fidato"
-        elif attitude >= org.relationship_threshold["friendly"]:
-            return "alleato"
-        elif attitude >= org.relationship_threshold["neutral"]:
-            return "amichevole"
-        elif attitude >= org.relationship_threshold["unfriendly"]:
-            return "neutrale"
-        elif attitude >= org.relationship_threshold["hostile"]:
-            return "poco amichevole"
-        else:
-            return "ostile"
+        return STATUS_NAMES[self.relationship_level(organization_id)]
             
     def trigger_special_event(self, organization_id: str, game_state) -> Dict:
         """Attiva un evento speciale basato sull'organizzazione"""
@@ -269,110 +277,23 @@ class DiplomaticSystem:
             return {"success": False, "message": "Organizzazione non disponibile"}
             
         org = self.organizations[organization_id]
-        status = self.get_relationship_status(organization_id)
         
         # Solo organizzazioni amichevoli o meglio possono triggerare eventi positivi
-        if status in ["ostile", "poco amichevole", "neutrale"]:
+        if self.relationship_level(organization_id) < FRIENDLY_LEVEL:
             return {"success": False, "message": "Relazioni insufficienti per eventi speciali"}
             
         if random.random() > org.special_event_chance:
             return {"success": False, "message": "Nessun evento speciale attivato"}
             
         # Eventi specifici per organizzazione
-        special_events = {
-            "partygoers": {
-                "title": "Festa Interdimensionale",
-                "effects": {
-                    "morale": 20,
-                    "corruption": 5,
-                    "resources": {"almond_water": 10, "food": 15}
-                }
-            },
-            "meg": {
-                "title": "Supporto Centrale M.E.G.",
-                "effects": {
-                    "defense": 10,
-                    "resources": {"supplies": 30, "medical": 15}
-                }
-            },
-            "bluestar": {
-                "title": "Breakthrough Tecnologico",
-                "effects": {
-                    "research": 15,
-                    "defense": 5,
-                    "resources": {"reality_stabilizer": 1}
-                }
-            },
-            "crimson": {
-                "title": "Operazione Congiunta",
-                "effects": {
-                    "defense": 20,
-                    "morale": 10,
-                    "resources": {"fuel": 20}
-                }
-            },
-            "library": {
-                "title": "Rivelazione Antica",
-                "effects": {
-                    "intel": 25,
-                    "research": 10,
-                    "resources": {"ancient_text": 1}
-                }
-            },
-            "wanderers": {
-                "title": "Rotta Commerciale Segreta",
-                "effects": {
-                    "trade_bonus": 0.2,
-                    "resources": {"supplies": 25, "fuel": 15}
-                }
-            },
-            "eyes": {
-                "title": "Visione del Futuro",
-                "effects": {
-                    "intel": 30,
-                    "defense": 15,
-                    "corruption": -5
-                }
-            },
-            "facelings": {
-                "title": "Benedizione dei Senza Volto",
-                "effects": {
-                    "defense": 25,
-                    "corruption": 10,
-                    "resources": {"faceling_mask": 1}
-                }
-            }
-        }
-        
-        event = special_events[organization_id]
-        effects = event["effects"]
-        
+        org_effects = self.effects.get(organization_id)
+        if org_effects is None:
+            return {"success": False, "message": "Nessun evento speciale attivato"}
+            
         # Applica gli effetti
-        message = f"[bold]{event['title']}[/]\n"
-        for effect, value in effects.items():
-            if effect == "morale":
-                game_state.stats.morale = min(100, game_state.stats.morale + value)
-                message += f"Morale {value:+}\n"
-            elif effect == "corruption":
-                game_state.stats.corruption_level = max(0, min(100, 
-                    game_state.stats.corruption_level + value))
-                message += f"Corruzione {value:+}\n"
-            elif effect == "defense":
-                game_state.defense.defense_rating += value
-                message += f"Difesa {value:+}\n"
-            elif effect == "research":
-                # Implementa bonus ricerca
-                message += f"Ricerca {value:+}\n"
-            elif effect == "intel":
-                game_state.intel.add_intel_points("level_0", value, event["title"])
-                message += f"Intel {value:+}\n"
-            elif effect == "trade_bonus":
-                org.trade_bonus += value
-                message += f"Bonus Commercio {value:+.1f}\n"
-            elif effect == "resources":
-                for resource, amount in value.items():
-                    game_state.resources.modify(resource, amount)
-                    message += f"{resource.replace('_', ' ').title()} {amount:+}\n"
+        message = f"[bold]{org_effects.event_title}[/]\n"
+        for line in org_effects.event(game_state):
+            message += f"{line}\n"
                     
         return {
             "success": True,
@@ -380,24 +301,57 @@ class DiplomaticSystem:
         }
 
     def daily_update(self, game_state):
-        """Aggiorna le relazioni diplomatiche giornalmente"""
-        for org in self.organizations.values():
-            # Base chance di cambiamento giornaliero
-            if random.random() < 0.1:
-                # Più probabile migliorare relazioni se amichevole, peggiorarle se ostile
-                status = self.get_relationship_status(org.id)
-                if status in ["alleato fidato", "alleato", "amichevole"]:
-                    change = random.randint(-1, 3)  # Più probabile migliorare
-                elif status in ["ostile", "poco amichevole"]:
-                    change = random.randint(-3, 1)  # Più probabile peggiorare
-                else:
-                    change = random.randint(-2, 2)  # Neutrale
-                    
-                self.modify_relation(org.id, change)
+        """Aggiorna le relazioni diplomatiche giornalmente.
+
+        Invece di un tiro per organizzazione si estraggono direttamente
+        quelle coinvolte (sampled_rows): con centinaia di fazioni il costo
+        segue i cambiamenti del giorno, non il numero di organizzazioni.
+        """
+        # Senza ambasciata relazioni ed eventi non possono cambiare
+        if not self.embassy_built:
+            return
+            
+        # Prima le reazioni delle altre fazioni a quanto successo ieri
+        self.propagate_relations()
+        
+        organizations, org_ids, starts, chances, max_chance = self._plan()
+        thresholds, width = self._thresholds, len(THRESHOLD_KEYS)
+        for row in sampled_rows(len(org_ids), DRIFT_CHANCE):
+            org = organizations[org_ids[row]]
+            # Più probabile migliorare relazioni se amichevole, peggiorarle se ostile
+            start = starts[row]
+            level = bisect_right(thresholds, org.attitude, start, start + width) - start
+            if level >= FRIENDLY_LEVEL:
+                lowest = -1  # Più probabile migliorare
+            elif level < HOSTILE_LEVELS:
+                lowest = -3  # Più probabile peggiorare
+            else:
+                lowest = -2  # Neutrale
+            # Uno dei cinque valori da lowest a lowest + 4, come randint ma con un solo tiro
+            self._shift_attitude(org, lowest + int(random.random() * 5))
+            
+        # Chance di evento speciale: si estraggono le righe con la probabilità
+        # massima e si tiene ognuna con chance / max_chance (diradamento)
+        for row in sampled_rows(len(org_ids), max_chance):
+            if random.random() * max_chance < chances[row]:
+                self.trigger_special_event(org_ids[row], game_state)
                 
-            # Chance di evento speciale
-            if random.random() < org.special_event_chance:
-                self.trigger_special_event(org.id, game_state)
+    def _plan(self) -> Tuple[Dict[str, Organization], Tuple[str, ...], Tuple[int, ...],
+                             Tuple[float, ...], float]:
+        """Id delle organizzazioni, inizio delle loro soglie e probabilità degli eventi speciali.
+
+        Ricalcolato solo quando cambia il dizionario delle organizzazioni (restore,
+        caricamento, nuove fazioni): le probabilità sono configurazione e non
+        vengono rilette ogni giorno.
+        """
+        organizations = self.organizations
+        plan = self._daily_plan
+        if plan is None or plan[0] is not organizations or len(plan[1]) != len(organizations):
+            starts = tuple(self._threshold_start(org) for org in organizations.values())
+            chances = tuple(org.special_event_chance for org in organizations.values())
+            plan = self._daily_plan = (organizations, tuple(organizations), starts,
+                                       chances, max(chances, default=0.0))
+        return plan
 
     def to_dict(self) -> Dict:
         return {
@@ -410,11 +364,13 @@ class DiplomaticSystem:
                     "trade_bonus": org.trade_bonus
                 }
                 for org_id, org in self.organizations.items()
-            }
+            },
+            "pending_changes": dict(self.pending_changes)
         }
 
     def from_dict(self, data: Dict):
         self.embassy_built = data["embassy_built"]
+        self.pending_changes = dict(data["pending_changes"])
         for org_id, org_data in data["organizations"].items():
             if org_id in self.organizations:
                 org = self.organizations[org_id]
@@ -437,6 +393,30 @@ class DiplomaticSystem:
             }
         }
 
+    def snapshot(self) -> tuple:
+        return (
+            self.embassy_built,
+            tuple(self.active_treaties),
+            tuple((org.id, org.attitude, org.trade_bonus, org.intel_sharing, org.military_support)
+                  for org in self.organizations.values()),
+            tuple(self.pending_changes.items())
+        )
+
+    def restore(self, state: tuple):
+        self.embassy_built, treaties, org_states, pending_changes = state
+        self.pending_changes = dict(pending_changes)
+        self.active_treaties = list(treaties)
+        # Nuovi oggetti Organization: descrizioni e soglie restano condivise
+        organizations = {}
+        for org_id, attitude, trade_bonus, intel_sharing, military_support in org_states:
+            org = shallow_copy(self.organizations[org_id])
+            org.attitude = attitude
+            org.trade_bonus = trade_bonus
+            org.intel_sharing = intel_sharing
+            org.military_support = military_support
+            organizations[org_id] = org
+        self.organizations = organizations
+
     def reset(self):
         self.__init__()
 
@@ -0,0 +1,141 @@
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional
+from .counters import REWARD_COUNTERS
+from .resources import RESOURCES
+
+# Effetto compilato: applica le modifiche alla partita e restituisce
+# la riga del resoconto (None se non c'è niente da mostrare)
+Applier = Callable[[Any], Optional[str]]
+
+class EffectContext(NamedTuple):
+    source: str = ""                        # Origine mostrata nei registri (intel)
+    organization_id: Optional[str] = None   # Organizzazione coinvolta, se c'è
+
+_COMPILERS: Dict[str, Callable[[Any, EffectContext], Applier]] = {}
+
+def effect(name: str):
+    """Registra il compilatore di un effetto: riceve valore e contesto, restituisce l'applier"""
+    def register(compiler):
+        if name in _COMPILERS:
+            raise ValueError(f"Effetto {name} già registrato")
+        _COMPILERS[name] = compiler
+        return compiler
+    return register
+
+def compile_effects(spec: Mapping[str, Any], source: str = "",
+                    organization_id: Optional[str] = None) -> Callable[[Any], List[str]]:
+    """Trasforma un dizionario di effetti del catalogo in una funzione game_state -> righe.
+
+    La ricerca degli effetti avviene qui, una volta sola: la funzione
+    restituita chiama solo gli applier, nell'ordine del dizionario.
+    """
+    context = EffectContext(source, organization_id)
+    appliers = []
+    for name, value in spec.items():
+        compiler = _COMPILERS.get(name)
+        if compiler is None:
+            raise ValueError(f"Effetto sconosciuto: {name}")
+        appliers.append(compiler(value, context))
+    appliers = tuple(appliers)
+
+    def apply(game_state) -> List[str]:
+        lines = []
+        for applier in appliers:
+            line = applier(game_state)
+            if line:
+                lines.append(line)
+        return lines
+    return apply
+
+@effect("resources")
+def _resources(amounts: Mapping[str, int], context: EffectContext) -> Applier:
+    deltas = RESOURCES.vector(amounts)
+    line = "\n".join(f"{name.replace('_', ' ').title()} {amount:+}" for name, amount in amounts.items())
+
+    def apply(game_state):
+        game_state.resources.apply_deltas(deltas)
+        return line
+    return apply
+
+@effect("stats")
+def _stats(amounts: Mapping[str, int], context: EffectContext) -> Applier:
+    changes = tuple(amounts.items())
+
+    def apply(game_state):
+        for stat, amount in changes:
+            try:
+                # Assicuriamoci che i valori rimangano in un range sensato
+                game_state.stats.adjust(stat, amount, 0, 100)
+            except Exception as e:
+                print(f"[red]Errore nell'aggiornamento della statistica {stat}: {e}[/]")
+        return None
+    return apply
+
+@effect("counters")
+def _counters(amounts: Mapping[str, int], context: EffectContext) -> Applier:
+    unknown = set(amounts) - set(REWARD_COUNTERS)
+    if unknown:
+        raise ValueError(f"Contatori non modificabili dagli effetti: {', '.join(sorted(unknown))}")
+    changes = tuple(amounts.items())
+    line = "\n".join(f"{name.replace('_', ' ').title()} {amount:+}" for name, amount in changes)
+
+    def apply(game_state):
+        for name, amount in changes:
+            game_state.counters.add(name, amount)
+        return line
+    return apply
+
+@effect("morale")
+def _morale(value: int, context: EffectContext) -> Applier:
+    def apply(game_state):
+        game_state.stats.adjust("morale", value, high=100)
+        return f"Morale {value:+}"
+    return apply
+
+@effect("prestige")
+def _prestige(value: int, context: EffectContext) -> Applier:
+    def apply(game_state):
+        game_state.stats.adjust("prestige", value)
+        return f"Prestigio {value:+}"
+    return apply
+
+@effect("corruption")
+def _corruption(value: int, context: EffectContext) -> Applier:
+    def apply(game_state):
+        game_state.stats.adjust("corruption_level", value, 0, 100)
+        return f"Corruzione {value:+}"
+    return apply
+
+@effect("defense")
+def _defense(value: int, context: EffectContext) -> Applier:
+    def apply(game_state):
+        game_state.defense.defense_rating += value
+        return f"Difesa {value:+}"
+    return apply
+
+@effect("research")
+def _research(value: int, context: EffectContext) -> Applier:
+    def apply(game_state):
+        # Implementa bonus ricerca
+        return f"Ricerca {value:+}"
+    return apply
+
+@effect("intel")
+def _intel(value: int, context: EffectContext) -> Applier:
+    source = context.source
+
+    def apply(game_state):
+        game_state.intel.add_intel_points("level_0", value, source)
+        return f"Intel {value:+}"
+    return apply
+
+@effect("trade_bonus")
+def _trade_bonus(value: float, context: EffectContext) -> Applier:
+    organization_id = context.organization_id
+    if organization_id is None:
+        raise ValueError("L'effetto trade_bonus richiede un'organizzazione")
+
+    def apply(game_state):
+        # Letta dalla partita a ogni chiamata: le copie hanno le proprie organizzazioni
+        game_state.diplomacy.organizations[organization_id].trade_bonus += value
+        return f"Bonus Commercio {value:+.1f}"
+    return apply
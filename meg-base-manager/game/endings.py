@@ -1,14 +1,93 @@
-from typing import Dict, List
-import random
+from typing import Any, Callable, Dict, List, Tuple
+import operator
+from .observable import ANY_FIELD
+from .snapshots import shallow_copy
 
 class Ending:
     def __init__(self, id: str, title: str, description: str, conditions: Dict):
         self.id = id
         self.title = title
         self.description = description
+        # Soglia semplice (>=, o == per i booleani) oppure {"operator": ..., "value": ...}
+        # come le condizioni di events.json
         self.conditions = conditions
         self.triggered = False
 
+def _research_complete(game_state) -> bool:
+    research_lab = game_state.defense.available_structures["research_lab"].name
+    return any(s.name == research_lab for s in game_state.defense.structures)
+
+def _visited_omega(game_state) -> bool:
+    omega = game_state.intel.levels_intel.get("level_omega")
+    return bool(omega and omega.intel_points > 0)
+
+# Valori letti dalle condizioni dei finali: nome -> (dipendenza, lettura).
+# La dipendenza indica quale parte della partita deve cambiare perché il
+# valore possa cambiare; più condizioni possono condividerla.
+ENDING_INPUTS: Dict[str, Tuple[str, Callable[[Any], Any]]] = {
+    "days_survived": ("stats.day", lambda gs: gs.stats.day),
+    "prestige": ("stats.prestige", lambda gs: gs.stats.prestige),
+    "morale": ("stats.morale", lambda gs: gs.stats.morale),
+    "corruption_level": ("stats.corruption_level", lambda gs: gs.stats.corruption_level),
+    "active_agents": ("counters.alive_agents", lambda gs: gs.counters.alive_agents),
+    "intel_points": ("counters.total_intel", lambda gs: gs.counters.total_intel),
+    "discovered_secrets": ("counters.discovered_secrets", lambda gs: gs.counters.discovered_secrets),
+    "entity_encounters": ("counters.entity_encounters", lambda gs: gs.counters.entity_encounters),
+    "failed_missions": ("counters.failed_missions", lambda gs: gs.counters.failed_missions),
+    "lost_agents": ("counters.lost_agents", lambda gs: gs.counters.lost_agents),
+    "dark_events": ("counters.dark_events", lambda gs: gs.counters.dark_events),
+    "temporal_anomalies": ("counters.temporal_anomalies", lambda gs: gs.counters.temporal_anomalies),
+    "transcendence_events": ("counters.transcendence_events", lambda gs: gs.counters.transcendence_events),
+    "resources_critical": ("resources", lambda gs: all(amount <= 10 for amount in gs.resources.resources.values())),
+    "classified_documents": ("counters.classified_documents", lambda gs: gs.counters.classified_documents),
+    "reality_fragments": ("counters.reality_fragments", lambda gs: gs.counters.reality_fragments),
+    "dream_resonance": ("counters.dream_resonance", lambda gs: gs.counters.dream_resonance),
+    "research_complete": ("defense.structures", _research_complete),
+    # Cambia solo se cambiano i punti intel, e quindi il totale
+    "visited_omega": ("counters.total_intel", _visited_omega),
+}
+
+# Il valore di ogni dipendenza, usato per capire se è cambiata dall'ultimo controllo
+DEPENDENCY_READERS: Dict[str, Callable[[Any], Any]] = {
+    "stats.day": lambda gs: gs.stats.day,
+    "stats.prestige": lambda gs: gs.stats.prestige,
+    "stats.morale": lambda gs: gs.stats.morale,
+    "stats.corruption_level": lambda gs: gs.stats.corruption_level,
+    "resources": lambda gs: tuple(gs.resources.resources.items()),
+    "defense.structures": lambda gs: len(gs.defense.structures),
+}
+
+OPERATORS = {">=": operator.ge, "<=": operator.le, "==": operator.eq}
+
+_UNSEEN = object()  # Dipendenza mai letta: il primo controllo la considera cambiata
+
+class Condition:
+    """Condizione compilata di un finale: lettura, confronto e dipendenza"""
+
+    def __init__(self, key: str, spec):
+        if key not in ENDING_INPUTS:
+            raise ValueError(f"Condizione sconosciuta per i finali: {key}")
+        if isinstance(spec, dict):
+            op, target = spec.get("operator", ">="), spec["value"]
+        else:
+            op, target = ("==" if isinstance(spec, bool) else ">="), spec
+        self.key = key
+        self.operator = op
+        self.target = target
+        self.dependency, self.read = ENDING_INPUTS[key]
+        self.compare = OPERATORS[op]
+
+    def progress(self, value) -> float:
+        """Quanto manca alla soglia, da 0 (lontano) a 1 (raggiunta)"""
+        if self.compare(value, self.target):
+            return 1.0
+        if isinstance(self.target, bool) or self.operator == "==":
+            return 0.0
+        if self.operator == ">=":
+            return max(0.0, value / self.target) if self.target > 0 else 0.0
+        # <=: il valore deve scendere fino alla soglia
+        return self.target / value if value > 0 else 0.0
+
 class EndingManager:
     def __init__(self):
         self.endings = {
@@ -23,7 +102,8 @@ class EndingManager:
                     "days_survived": 50,      # Sopravvivere 50 giorni
                     "prestige": 75,           # Alto prestigio
                     "morale": 70,             # Buon morale generale
-                    "active_agents": 5        # Mantenere un team completo
+                    "active_agents": 5,       # Mantenere un team completo
+                    "resources_critical": False  # Un avamposto prospero non è a secco
                 }
             ),
             # Finale Cattivo - Collasso della base
@@ -34,10 +114,10 @@ class EndingManager:
                 "i sopravvissuti sono dispersi e le entità ora vagano liberamente " \
                 "tra i corridoi abbandonati.",
                 {
-                    "morale": 20,             # Morale bassissimo
-                    "resources_critical": True, # Risorse quasi esaurite
-                    "active_agents": 2,        # Quasi tutti gli agenti persi
-                    "prestige": 10            # Prestigio ai minimi
+                    "morale": {"operator": "<=", "value": 20},        # Morale bassissimo
+                    "resources_critical": True,                        # Risorse quasi esaurite
+                    "active_agents": {"operator": "<=", "value": 2},  # Quasi tutti gli agenti persi
+                    "prestige": {"operator": "<=", "value": 10}       # Prestigio ai minimi
                 }
             ),
             # Finale Nascosto - Scoperta di una verità nascosta
@@ -84,56 +164,148 @@ class EndingManager:
                 }
             )
         }
+        # Dipendenze notificate da GameStats, GameCounters e Resources (vedi bind):
+        # non serve rileggerle a ogni controllo
+        self._observed = frozenset()
+        self.compile()
+        
+    def compile(self):
+        """Compila le condizioni dei finali e l'indice dipendenza -> finali"""
+        self._conditions: Dict[str, List[Condition]] = {
+            ending_id: [Condition(key, spec) for key, spec in ending.conditions.items()]
+            for ending_id, ending in self.endings.items()
+        }
+        self._dependents: Dict[str, List[str]] = {}
+        for ending_id, conditions in self._conditions.items():
+            for dependency in {c.dependency for c in conditions}:
+                self._dependents.setdefault(dependency, []).append(ending_id)
+        self._build_polling()
+        self.invalidate()
+        
+    def bind(self, game_state):
+        """Si iscrive alle modifiche di statistiche, contatori e risorse della partita"""
+        observed = set()
+        for dependency in self._dependents:
+            source, _, name = dependency.partition(".")
+            if source == "stats":
+                game_state.stats.subscribe(name, self._on_stats_changed)
+            elif source == "counters":
+                game_state.counters.subscribe(name, self._on_counters_changed)
+            elif source == "resources":
+                game_state.resources.subscribe(ANY_FIELD, self._on_resources_changed)
+            else:
+                continue
+            observed.add(dependency)
+        self._observed = frozenset(observed)
+        self._build_polling()
+        self.invalidate()
+        
+    def _on_stats_changed(self, stats, name: str):
+        self._dirty.update(self._dependents.get("stats." + name, ()))
+        
+    def _on_counters_changed(self, counters, name: str):
+        self._dirty.update(self._dependents.get("counters." + name, ()))
+        
+    def _on_resources_changed(self, resources, name: str):
+        self._dirty.update(self._dependents["resources"])
+        
+    def invalidate(self):
+        """Forza la rivalutazione di tutti i finali (caricamento, ripristino)"""
+        self._dirty = set(self.endings)
+        self._last_inputs: Dict[str, Any] = {}
+        # ending_id -> tutte le condizioni soddisfatte
+        self._met: Dict[str, bool] = {}
+        
+    def _build_polling(self):
+        """Dipendenze da rileggere a ogni controllo: (nome, lettura, finali)"""
+        self._polled: List[Tuple[str, Callable[[Any], Any], List[str]]] = [
+            (dependency,
+             # counters.<nome> si legge direttamente dal registro
+             DEPENDENCY_READERS.get(dependency) or operator.attrgetter(dependency),
+             ending_ids)
+            for dependency, ending_ids in self._dependents.items()
+            if dependency not in self._observed
+        ]
+        
+    def _refresh(self, game_state):
+        """Segna come da rivalutare i finali con almeno un ingresso cambiato, e li rivaluta"""
+        for dependency, read, ending_ids in self._polled:
+            value = read(game_state)
+            if self._last_inputs.get(dependency, _UNSEEN) != value:
+                self._last_inputs[dependency] = value
+                self._dirty.update(ending_ids)
+        endings, met = self.endings, self._met
+        for ending_id in self._dirty:
+            if endings[ending_id].triggered:
+                continue  # Già raggiunto: restore e reset rimettono tutto da rivalutare
+            # Ci si ferma alla prima condizione non soddisfatta
+            met[ending_id] = all(condition.compare(condition.read(game_state), condition.target)
+                                 for condition in self._conditions[ending_id])
+        self._dirty.clear()
     
     def check_endings(self, game_state) -> Dict:
         """Verifica se sono state raggiunte le condizioni per un finale"""
+        self._refresh(game_state)
+        met = self._met
         for ending_id, ending in self.endings.items():
-            if not ending.triggered and self._check_conditions(ending, game_state):
+            if not ending.triggered and met[ending_id]:
                 ending.triggered = True
                 return {
                     "triggered": True,
                     "ending": ending
                 }
         return {"triggered": False}
-    
-    def _check_conditions(self, ending: Ending, game_state) -> bool:
-        """Verifica le condizioni specifiche per ogni finale"""
-        try:
-            # Condizioni per il finale classico
-            if ending.id == "survival":
-                return (game_state.stats.days_survived >= ending.conditions["days_survived"] and
-                        game_state.stats.prestige >= ending.conditions["prestige"] and
-                        game_state.stats.morale >= ending.conditions["morale"] and
-                        len([a for a in game_state.personnel.agents if a.status != "morto"]) >= ending.conditions["active_agents"])
-            
-            # Condizioni per il finale del collasso
-            elif ending.id == "collapse":
-                critical_resources = all(amount <= 10 for amount in game_state.resources.resources.values())
-                return (game_state.stats.morale <= ending.conditions["morale"] and
-                        critical_resources and
-                        len([a for a in game_state.personnel.agents if a.status != "morto"]) <= ending.conditions["active_agents"])
-            
-            # Condizioni per il finale della verità
-            elif ending.id == "truth":
-                return (game_state.intel.total_points >= ending.conditions["intel_points"] and
-                        len(game_state.intel.discovered_secrets) >= ending.conditions["discovered_secrets"] and
-                        game_state.intel.classified_documents >= ending.conditions["classified_documents"])
-            
-            # Condizioni per il finale dell'orrore
-            elif ending.id == "horror":
-                return (game_state.stats.corruption_level >= ending.conditions["corruption_level"] and
-                        game_state.stats.entity_encounters >= ending.conditions["entity_encounters"] and
-                        game_state.missions.failed_missions >= ending.conditions["failed_missions"] and
-                        game_state.personnel.lost_agents >= ending.conditions["lost_agents"])
-            
-            # Condizioni per il finale criptico
-            elif ending.id == "ascension":
-                return (game_state.resources.get("reality_fragments", 0) >= ending.conditions["reality_fragments"] and
-                        game_state.stats.temporal_anomalies >= ending.conditions["temporal_anomalies"] and
-                        game_state.intel.visited_omega and
-                        game_state.events.transcendence_count >= ending.conditions["transcendence_events"])
-            
-            return False
-        except Exception as e:
-            print(f"[red]Errore nel controllo delle condizioni per il finale {ending.id}: {e}[/]")
-            return False
+        
+    def get_progress(self, game_state) -> List[Dict]:
+        """Distanza da ogni finale: condizioni soddisfatte e avanzamento complessivo"""
+        progress = []
+        for ending_id, ending in self.endings.items():
+            conditions = []
+            for condition in self._conditions[ending_id]:
+                value = condition.read(game_state)
+                met = condition.compare(value, condition.target)
+                conditions.append({
+                    "key": condition.key,
+                    "value": value,
+                    "operator": condition.operator,
+                    "target": condition.target,
+                    "met": met,
+                    "progress": condition.progress(value)
+                })
+            progress.append({
+                "ending": ending,
+                "met": sum(c["met"] for c in conditions),
+                "total": len(conditions),
+                "progress": sum(c["progress"] for c in conditions) / len(conditions) if conditions else 0.0,
+                "conditions": conditions
+            })
+        return progress
+        
+    def to_dict(self) -> Dict:
+        return {"triggered": [e.id for e in self.endings.values() if e.triggered]}
+        
+    def from_dict(self, data: Dict):
+        triggered = set(data.get("triggered", []))
+        for ending in self.endings.values():
+            ending.triggered = ending.id in triggered
+        self.invalidate()
+        
+    def snapshot(self) -> tuple:
+        return tuple(e.triggered for e in self.endings.values())
+        
+    def restore(self, state: tuple):
+        for ending, triggered in zip(self.endings.values(), state):
+            ending.triggered = triggered
+        self.invalidate()
+        
+    def fork(self) -> "EndingManager":
+        """Copia con stato dei finali proprio; definizioni e condizioni compilate condivise"""
+        clone = shallow_copy(self)
+        clone.endings = {ending_id: shallow_copy(ending) for ending_id, ending in self.endings.items()}
+        clone.invalidate()
+        return clone
+        
+    def reset(self):
+        for ending in self.endings.values():
+            ending.triggered = False
+        self.invalidate()
@@ -1,10 +1,28 @@
 import random
 import json
-from typing import List, Dict
+from itertools import accumulate
+from typing import List, Dict, Tuple
+from .counters import GameCounters
+from .effects import compile_effects
+
+# Contatore globale incrementato quando scatta un evento con il tag
+TAG_COUNTERS = {
+    "entity": "entity_encounters",
+    "dark": "dark_events",
+    "temporal": "temporal_anomalies",
+    "transcendence": "transcendence_events",
+}
+
+# Combinazioni di livello e valori conservate prima di svuotare la cache
+MAX_ELIGIBLE_CACHE = 256
 
 class Event:
+    __slots__ = ("id", "title", "description", "effects", "level", "weight",
+                 "conditions", "tags")
+    
     def __init__(self, id: str, title: str, description: str, effects: Dict,
-                 level: str = "all", weight: float = 1.0, conditions: Dict = None):
+                 level: str = "all", weight: float = 1.0, conditions: Dict = None,
+                 tags: List[str] = None):
         self.id = id
         self.title = title
         self.description = description
@@ -12,11 +30,21 @@ class Event:
         self.level = level    # Livello specifico o "all" per eventi generici
         self.weight = weight  # Probabilità relativa dell'evento
         self.conditions = conditions or {}  # Condizioni per il trigger dell'evento
+        self.tags = tuple(tags) if tags else ()  # Categorie dell'evento (entity, dark...)
 
 class EventManager:
     def __init__(self):
         self.events = self.load_events()
+        # Effetti compilati per id, con lo stesso compilatore delle organizzazioni:
+        # fuori dagli Event, che restano copiabili negli snapshot
+        self.effects = {event.id: compile_effects(event.effects, event.title) for event in self.events}
+        self._catalog = {event.id: event for event in self.events}
         self.active_events = []
+        self.counters = GameCounters()  # Sostituito da quello condiviso di GameState
+        # Valori letti dalle condizioni di tutti gli eventi, in ordine fisso
+        self._condition_stats = tuple(sorted({stat for event in self.events for stat in event.conditions}))
+        # (livello, valori letti) -> eventi validi e pesi cumulati; condivisa dalle copie
+        self._eligible: Dict[tuple, tuple] = {}
         
     def load_events(self) -> List[Event]:
         with open("data/events.json") as f:
@@ -26,30 +54,17 @@ class EventManager:
     def check_events(self, game_state):
         if random.random() < 0.3:  # 30% chance per day
             try:
-                # Filtra eventi basati sulle condizioni e livello
-                valid_events = []
                 current_level = game_state.current_level
+                valid_events, cum_weights = self.eligible_events(game_state)
                 
-                # Log per debug
-                print(f"\n[cyan]DEBUG: Checking events for level {current_level}[/]")
-                
-                for event in self.events:
-                    # Verifica se l'evento è valido per il livello corrente o è un evento generico
-                    is_valid_level = (
-                        event.level == "all" or 
-                        event.level == current_level or 
-                        (isinstance(event.level, list) and current_level in event.level)
-                    )
-                    
-                    if is_valid_level:
-                        if self._check_conditions(event, game_state):
-                            valid_events.append(event)
-                            print(f"[cyan]DEBUG: Found valid event {event.id} for level {current_level}[/]")
+                # Log per debug, in una sola scrittura
+                print("\n".join([f"\n[cyan]DEBUG: Checking events for level {current_level}[/]"]
+                                + [f"[cyan]DEBUG: Found valid event {event.id} for level {current_level}[/]"
+                                   for event in valid_events]))
                 
                 if valid_events:
                     # Selezione pesata degli eventi
-                    weights = [e.weight for e in valid_events]
-                    selected_event = random.choices(valid_events, weights=weights, k=1)[0]
+                    selected_event = random.choices(valid_events, cum_weights=cum_weights, k=1)[0]
                     
                     print(f"\n[green]EVENT: Triggering {selected_event.id} ({selected_event.title}) for level {current_level}[/]")
                     print(f"[blue]Description: {selected_event.description}[/]")
@@ -63,20 +78,45 @@ class EventManager:
                 print(f"[red]{traceback.format_exc()}[/]")
                 return
                 
+    def eligible_events(self, game_state) -> Tuple[Tuple[Event, ...], Tuple[float, ...]]:
+        """Eventi validi per il livello corrente, con i pesi cumulati.
+
+        La validità dipende solo dal livello e dai valori letti dalle
+        condizioni: finché non cambiano la lista non viene ricalcolata.
+        """
+        values = tuple(self._condition_value(stat, game_state) for stat in self._condition_stats)
+        key = (game_state.current_level, values)
+        eligible = self._eligible.get(key)
+        if eligible is None:
+            if len(self._eligible) >= MAX_ELIGIBLE_CACHE:
+                self._eligible.clear()
+            current_level = game_state.current_level
+            valid_events = tuple(
+                event for event in self.events
+                # Evento del livello corrente o evento generico
+                if (event.level == "all" or event.level == current_level
+                    or (isinstance(event.level, list) and current_level in event.level))
+                and self._check_conditions(event, game_state)
+            )
+            eligible = self._eligible[key] = (valid_events, tuple(accumulate(e.weight for e in valid_events)))
+        return eligible
+                
+    def _condition_value(self, stat: str, game_state):
+        # Controllo statistiche
+        if hasattr(game_state.stats, stat):
+            return getattr(game_state.stats, stat)
+        # Controllo risorse
+        if stat in game_state.resources.resources:
+            return game_state.resources.get(stat)
+        return 0
+                
     def _check_conditions(self, event: Event, game_state) -> bool:
         """Verifica se le condizioni dell'evento sono soddisfatte"""
         if not event.conditions:
             return True
             
         for stat, condition in event.conditions.items():
-            current_value = 0
-            
-            # Controllo statistiche
-            if hasattr(game_state.stats, stat):
-                current_value = getattr(game_state.stats, stat)
-            # Controllo risorse
-            elif stat in game_state.resources.resources:
-                current_value = game_state.resources.get(stat)
+            current_value = self._condition_value(stat, game_state)
                 
             # Verifica condizione
             operator = condition.get("operator", ">=")
@@ -97,25 +137,16 @@ class EventManager:
     def trigger_event(self, event: Event, game_state):
         try:
             self.active_events.append(event)
-            # Gestione risorse
-            for resource, amount in event.effects.get("resources", {}).items():
-                try:
-                    game_state.resources.modify(resource, amount)
-                except Exception as e:
-                    print(f"[red]Errore nella modifica della risorsa {resource}: {e}[/]")
-                    continue
-            
-            # Gestione statistiche
-            for stat, amount in event.effects.get("stats", {}).items():
-                try:
-                    current_value = getattr(game_state.stats, stat, 0)
-                    new_value = current_value + amount
-                    # Assicuriamoci che i valori rimangano in un range sensato
-                    new_value = max(0, min(100, new_value))
-                    setattr(game_state.stats, stat, new_value)
-                except Exception as e:
-                    print(f"[red]Errore nell'aggiornamento della statistica {stat}: {e}[/]")
-                    continue
+            for tag in event.tags:
+                if tag in TAG_COUNTERS:
+                    self.counters.add(TAG_COUNTERS[tag])
+            # Risorse e statistiche
+            if self._catalog.get(event.id) is event:
+                apply = self.effects[event.id]
+            else:
+                # Eventi creati al momento (infiltrazioni): stesso id, valori diversi ogni volta
+                apply = compile_effects(event.effects, event.title)
+            apply(game_state)
                     
             # Verifica condizioni per i finali dopo ogni evento significativo
             ending_result = game_state.endings.check_endings(game_state)
@@ -130,5 +161,12 @@ class EventManager:
             
         return {"ending_triggered": False}
             
+    def snapshot(self) -> tuple:
+        return tuple(self.active_events)
+        
+    def restore(self, state: tuple):
+        # Gli eventi sono definizioni immutabili: basta copiare la lista
+        self.active_events = list(state)
+            
     def reset(self):
         self.active_events = []
@@ -0,0 +1,57 @@
+from array import array
+from typing import Dict, Iterable, Mapping
+
+# Variazioni indotte più piccole di così non vengono applicate
+MIN_PROPAGATED = 0.01
+
+class FactionGraph:
+    """Influenze tra organizzazioni come matrice sparsa (formato CSR).
+
+    La riga di un'organizzazione elenca i vicini e il peso con cui
+    reagiscono ai cambiamenti della sua attitudine: con peso -0.3 ogni
+    punto guadagnato con lei ne fa perdere 0.3 con il vicino. Solo gli
+    archi esistenti occupano memoria, quindi il costo della propagazione
+    dipende dai vicini delle organizzazioni cambiate e non dal numero
+    di fazioni.
+    """
+    def __init__(self, organization_ids: Iterable[str], relations: Mapping[str, Mapping[str, float]]):
+        self.ids = tuple(organization_ids)
+        self.index = {org_id: i for i, org_id in enumerate(self.ids)}
+        self.indptr = array("l", [0])  # Riga i: indices[indptr[i]:indptr[i + 1]]
+        self.indices = array("l")
+        self.weights = array("d")
+        for org_id in self.ids:
+            for neighbor, weight in relations.get(org_id, {}).items():
+                target = self.index.get(neighbor)
+                if target is None:
+                    raise ValueError(f"Relazione di {org_id} con un'organizzazione sconosciuta: {neighbor}")
+                if neighbor == org_id:
+                    raise ValueError(f"{org_id} non può influenzare se stessa")
+                self.indices.append(target)
+                self.weights.append(weight)
+            self.indptr.append(len(self.indices))
+
+    def neighbors(self, organization_id: str) -> Dict[str, float]:
+        """Vicini di un'organizzazione con il loro peso"""
+        row = self.index.get(organization_id)
+        if row is None:
+            return {}
+        start, end = self.indptr[row], self.indptr[row + 1]
+        return {self.ids[self.indices[k]]: self.weights[k] for k in range(start, end)}
+
+    def propagate(self, changes: Mapping[str, float]) -> Dict[str, float]:
+        """Prodotto sparso vettore × matrice: variazione indotta su ogni vicino.
+
+        changes contiene solo le organizzazioni cambiate (vettore sparso);
+        le organizzazioni fuori dal grafo non influenzano nessuno.
+        """
+        indptr, indices, weights = self.indptr, self.indices, self.weights
+        totals: Dict[int, float] = {}
+        for org_id, change in changes.items():
+            row = self.index.get(org_id)
+            if row is None or not change:
+                continue
+            for k in range(indptr[row], indptr[row + 1]):
+                target = indices[k]
+                totals[target] = totals.get(target, 0.0) + weights[k] * change
+        return {self.ids[target]: total for target, total in totals.items() if abs(total) >= MIN_PROPAGATED}
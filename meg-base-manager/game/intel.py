@@ -1,9 +1,12 @@
 from dataclasses import dataclass, field
-from typing import Dict, List
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
 import random
 import json
+from .counters import GameCounters
+from .snapshots import shallow_copy
 
-@dataclass
+@dataclass(slots=True)
 class LevelIntel:
     level_id: str
     name: str = ""
@@ -25,17 +28,52 @@ class LevelIntel:
                 return True
         return False
 
+@dataclass(frozen=True)
+class LevelData:
+    """Dati statici di un livello da levels.json (condivisi, mai modificati)"""
+    id: str
+    name: str
+    description: str
+    difficulty: int = 1
+    danger_level: str = ""
+    entities: Tuple[str, ...] = ()
+    resources: Tuple[str, ...] = ()
+    special_items: Tuple[str, ...] = ()
+
 class IntelSystem:
     def __init__(self):
         self.levels_intel: Dict[str, LevelIntel] = {}
+        self.level_index: Dict[str, LevelData] = {}
+        # level_id -> (LevelIntel, knowledge_level, segreti noti, vista)
+        self._info_views: Dict[str, tuple] = {}
+        # Chiamati con (intel, level_id) quando cambia un livello di conoscenza;
+        # level_id è None quando cambiano tutti i livelli insieme (caricamento, reset)
+        self._knowledge_listeners: List[Callable[["IntelSystem", Optional[str]], None]] = []
+        self.counters = GameCounters()  # Sostituito da quello condiviso di GameState
         self.load_levels()
         
-    def get_level_info(self, level_id: str) -> Dict:
-        """Ottiene informazioni sul livello in base al livello di conoscenza"""
+    def add_knowledge_listener(self, listener: Callable[["IntelSystem", Optional[str]], None]):
+        self._knowledge_listeners.append(listener)
+        
+    def _notify_knowledge(self, level_id: Optional[str] = None):
+        for listener in self._knowledge_listeners:
+            listener(self, level_id)
+        
+    def get_level_info(self, level_id: str) -> Optional[Mapping]:
+        """Ottiene informazioni sul livello in base al livello di conoscenza
+        
+        Restituisce una vista in sola lettura condivisa tra le chiamate: viene
+        ricostruita solo quando cambiano conoscenza o segreti scoperti.
+        """
         level = self.levels_intel.get(level_id)
         if not level:
             return None
             
+        cached = self._info_views.get(level_id)
+        if (cached is not None and cached[0] is level and cached[1] == level.knowledge_level
+                and cached[2] == len(level.discovered_secrets)):
+            return cached[3]
+            
         info = {
             "name": level.name,
             "description": level.description,
@@ -43,24 +81,42 @@ class IntelSystem:
         }
         
         # Aggiunge informazioni in base al livello di conoscenza
-        if level.knowledge_level >= 2:
-            info["difficulty"] = "Alta"
-            info["danger_level"] = "Elevato"
-            
-        if level.knowledge_level >= 3:
-            info["entities"] = ["Entity 1", "Entity 2"]
-            
-        if level.knowledge_level >= 4:
-            info["resources"] = ["Resource 1", "Resource 2"]
-            info["special_items"] = ["Item 1", "Item 2"]
+        data = self.level_index.get(level_id)
+        if data:
+            if level.knowledge_level >= 2:
+                info["difficulty"] = data.difficulty
+                info["danger_level"] = data.danger_level
+                
+            if level.knowledge_level >= 3:
+                info["entities"] = data.entities
+                
+            if level.knowledge_level >= 4:
+                info["resources"] = data.resources
+                info["special_items"] = data.special_items
             
         if level.knowledge_level >= 5:
-            info["discovered_secrets"] = level.discovered_secrets
+            info["discovered_secrets"] = tuple(level.discovered_secrets)
             
-        return info
+        view = MappingProxyType(info)
+        self._info_views[level_id] = (level, level.knowledge_level, len(level.discovered_secrets), view)
+        return view
+        
+    def get_known_difficulty(self, level_id: str) -> int:
+        """Difficoltà del livello come la conosce la base (1 finché non è studiato)"""
+        level = self.levels_intel.get(level_id)
+        data = self.level_index.get(level_id)
+        if level and data and level.knowledge_level >= 2:
+            return data.difficulty
+        return 1
         
-    def add_intel_points(self, level_id: str, points: int) -> Dict:
-        """Aggiunge punti intelligence per un livello"""
+    def add_intel_points(self, level_id: str, points: int, source: str = "") -> Dict:
+        """Aggiunge punti intelligence per un livello
+
+        Args:
+            level_id: Il livello a cui assegnare i punti
+            points: Punti da aggiungere (negativi per le perdite)
+            source: Origine dei punti (missione, ricerca, commercio...)
+        """
         if level_id not in self.levels_intel:
             return {
                 "success": False,
@@ -68,26 +124,46 @@ class IntelSystem:
             }
             
         level = self.levels_intel[level_id]
+        self.counters.total_intel += points
         if level.add_intel(points):
+            self._notify_knowledge(level_id)
             return {
                 "success": True,
-                "message": f"Aumentato livello conoscenza a {level.knowledge_level}!"
+                "message": f"Aumentato livello conoscenza a {level.knowledge_level}!",
+                "source": source
             }
             
         return {
             "success": True,
-            "message": f"Aggiunti {points} punti intel"
+            "message": f"Aggiunti {points} punti intel",
+            "source": source
         }
         
+    def spend_intel(self, level_id: str, points: int) -> bool:
+        """Sottrae punti intel (costi e perdite) senza toccare il livello di conoscenza"""
+        level = self.levels_intel.get(level_id)
+        if not level:
+            return False
+        level.intel_points -= points
+        self.counters.total_intel -= points
+        return True
+        
     def discover_secret(self, level_id: str, secret: str) -> bool:
         """Aggiunge un segreto scoperto alla lista"""
         if level_id in self.levels_intel:
             level = self.levels_intel[level_id]
             if secret not in level.discovered_secrets:
                 level.discovered_secrets.append(secret)
+                self.counters.discovered_secrets += 1
                 return True
         return False
         
+    def recount(self):
+        """Ricalcola i contatori globali dell'intelligence dopo un cambio in blocco"""
+        self.counters.total_intel = sum(level.intel_points for level in self.levels_intel.values())
+        self.counters.discovered_secrets = sum(len(level.discovered_secrets)
+                                               for level in self.levels_intel.values())
+        
     def save_intel(self) -> Dict:
         """Salva lo stato dell'intelligence"""
         intel_data = {}
@@ -116,6 +192,14 @@ class IntelSystem:
             intel.corruption_level = data.get("corruption_level", 0)
             intel.suspicious_agents = data.get("suspicious_agents", [])
             self.levels_intel[level_id] = intel
+        self.recount()
+        self._notify_knowledge()
+            
+    def to_dict(self) -> Dict:
+        return self.save_intel()
+        
+    def from_dict(self, data: Dict):
+        self.load_intel(data)
             
     def load_levels(self):
         """Carica le informazioni base dei livelli"""
@@ -123,6 +207,16 @@ class IntelSystem:
             with open("data/levels.json", "r", encoding="utf-8") as f:
                 data = json.load(f)
                 for level in data["levels"]:
+                    self.level_index[level["id"]] = LevelData(
+                        id=level["id"],
+                        name=level["name"],
+                        description=level["description"],
+                        difficulty=level.get("difficulty", 1),
+                        danger_level=level.get("danger_level", ""),
+                        entities=tuple(level.get("entities", ())),
+                        resources=tuple(level.get("resources", ())),
+                        special_items=tuple(level.get("special_items", ()))
+                    )
                     self.levels_intel[level["id"]] = LevelIntel(
                         level_id=level["id"],
                         name=level["name"],
@@ -132,6 +226,37 @@ class IntelSystem:
             print("File levels.json non trovato")
         except json.JSONDecodeError:
             print("Errore nel parsing del file levels.json")
+        self.recount()
+        self._notify_knowledge()
+            
+    def snapshot(self) -> tuple:
+        return tuple(self._copy_level(level) for level in self.levels_intel.values())
+        
+    def restore(self, state: tuple):
+        previous = self.levels_intel
+        self.levels_intel = {level.level_id: self._copy_level(level) for level in state}
+        self.recount()
+        # Annulla e simulazioni ripristinano spesso: si avvisa solo dei livelli cambiati
+        if previous.keys() != self.levels_intel.keys():
+            self._notify_knowledge()
+            return
+        for level_id, level in self.levels_intel.items():
+            if previous[level_id].knowledge_level != level.knowledge_level:
+                self._notify_knowledge(level_id)
+        
+    def fork(self) -> "IntelSystem":
+        """Copia per GameState.fork: indice dei livelli condiviso, viste e ascoltatori propri"""
+        clone = shallow_copy(self)
+        clone._info_views = {}
+        clone._knowledge_listeners = []
+        return clone
+        
+    @staticmethod
+    def _copy_level(level: LevelIntel) -> LevelIntel:
+        clone = shallow_copy(level)
+        clone.discovered_secrets = level.discovered_secrets.copy()
+        clone.suspicious_agents = level.suspicious_agents.copy()
+        return clone
             
     def reset(self):
         """Resetta il sistema di intelligence"""
@@ -150,7 +275,7 @@ class IntelSystem:
             }
             
         # Riduce i punti intelligence
-        level_intel.intel_points -= intel_cost
+        self.spend_intel(current_level, intel_cost)
         
         # Controlla se l'agente è corrotto (30% di chance di scoprire se è corrotto)
         agent = game_state.personnel.get_agent(agent_id)
@@ -1,7 +1,14 @@
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 import random
 
+from .pricing import SupplyDemand
+from .resources import RESOURCES
+from .snapshots import shallow_copy
+
+# Ogni scambio della giornata rende gli acquisti successivi più cari
+TRADE_PRESSURE = 0.02
+
 @dataclass
 class TradeGood:
     name: str
@@ -11,6 +18,13 @@ class TradeGood:
     special_effects: Dict[str, int] = field(default_factory=dict)  # Effetti speciali (morale, difesa, etc)
     infiltration_risk: float = 0.05  # Rischio base di infiltrazione
 
+@dataclass
+class OrderLine:
+    """Riga di un ordine multiplo: un bene, la quantità e il verso dello scambio"""
+    good_id: str
+    quantity: int
+    is_buying: bool = True
+
 class Market:
     def __init__(self):
         self.trade_goods = {
@@ -96,6 +110,78 @@ class Market:
         self.daily_trades = 0  # Reset giornaliero
         self.infiltration_multiplier = 1.0  # Aumenta con più scambi
         
+        # Scorte e domanda delle organizzazioni, aggiornate ogni giorno
+        self.supply = SupplyDemand(self.trade_goods, self._static_price)
+        
+        # Riduzioni del rischio per organizzazione, valide finché difesa e
+        # attitudini restano quelle della chiave; poi la tabella completa
+        self._protections: Tuple[tuple, Dict[str, float]] = ((), {})
+        self._risks: Tuple[tuple, Dict[str, Dict[str, List[float]]]] = ((), {})
+        
+        # Prezzi statici (base × rarità × organizzazione) per (organizzazione,
+        # acquisto/vendita): una riga della matrice beni × organizzazioni,
+        # calcolata alla prima richiesta e scartata solo quando cambiano i
+        # bonus. Domanda e offerta si applicano alla lettura.
+        self._quotes: Dict[Tuple[str, bool], List[float]] = {}
+        
+    @staticmethod
+    def _price_multipliers(good: TradeGood, organization_id: str, is_buying: bool) -> Tuple[float, float]:
+        """Moltiplicatori di rarità e organizzazione di un bene"""
+        rarity_multiplier = 1 + (good.rarity - 1) * 0.2
+        org_multiplier = (good.organization_bonus.get(organization_id, 1.0) if is_buying 
+                         else good.organization_bonus.get(organization_id, 1.0) * 0.8)
+        return rarity_multiplier, org_multiplier
+        
+    @classmethod
+    def _static_price(cls, good: TradeGood, organization_id: str, is_buying: bool = True) -> float:
+        """Prezzo unitario senza domanda e offerta"""
+        rarity_multiplier, org_multiplier = cls._price_multipliers(good, organization_id, is_buying)
+        return good.base_price * rarity_multiplier * org_multiplier
+        
+    def _static_prices(self, organization_id: str, is_buying: bool) -> List[float]:
+        key = (organization_id, is_buying)
+        prices = self._quotes.get(key)
+        if prices is None:
+            prices = self._quotes[key] = [self._static_price(good, organization_id, is_buying)
+                                          for good in self.trade_goods.values()]
+        return prices
+        
+    def _market_multipliers(self, organization_id: str, is_buying: bool) -> List[float]:
+        """Moltiplicatori di domanda e offerta di tutti i beni, con la pressione degli scambi del giorno"""
+        multipliers = self.supply.multipliers(organization_id)
+        if is_buying and self.daily_trades:
+            pressure = 1 + TRADE_PRESSURE * self.daily_trades
+            multipliers = [multiplier * pressure for multiplier in multipliers]
+        return multipliers
+        
+    def _unit_prices(self, organization_id: str, is_buying: bool) -> Dict[str, int]:
+        static = self._static_prices(organization_id, is_buying)
+        market_multipliers = self._market_multipliers(organization_id, is_buying)
+        return {good_id: int(price * multiplier)
+                for good_id, price, multiplier in zip(self.trade_goods, static, market_multipliers)}
+        
+    def set_organization_bonus(self, good_id: str, organization_id: str, multiplier: Optional[float]):
+        """Imposta (o rimuove, con None) il moltiplicatore di prezzo di un bene per un'organizzazione"""
+        bonus = self.trade_goods[good_id].organization_bonus
+        # Lo storico dei giorni già trascorsi usa i prezzi di quei giorni
+        self.supply.register(self.supply.organizations)
+        if multiplier is None:
+            bonus.pop(organization_id, None)
+        else:
+            bonus[organization_id] = multiplier
+        self.invalidate_prices()
+        
+    def invalidate_prices(self):
+        """Da chiamare dopo ogni modifica ai beni che influisce sui prezzi statici"""
+        self._quotes = {}
+        
+    def quote_catalog(self, organization_id: str, is_buying: bool = True, quantity: int = 1) -> Dict[str, int]:
+        """Prezzo di tutti i beni con un'organizzazione, in una sola chiamata"""
+        prices = self._unit_prices(organization_id, is_buying)
+        if quantity == 1:
+            return prices
+        return {good_id: price * quantity for good_id, price in prices.items()}
+        
     def get_price_details(self, good_id: str, organization_id: str, quantity: int = 1, is_buying: bool = True) -> Dict:
         """Calcola e restituisce i dettagli del prezzo di un bene"""
         if good_id not in self.trade_goods:
@@ -105,12 +191,11 @@ class Market:
         base_price = good.base_price
         
         # Calcola i vari modificatori
-        rarity_multiplier = 1 + (good.rarity - 1) * 0.2
-        org_multiplier = (good.organization_bonus.get(organization_id, 1.0) if is_buying 
-                         else good.organization_bonus.get(organization_id, 1.0) * 0.8)
+        rarity_multiplier, org_multiplier = self._price_multipliers(good, organization_id, is_buying)
+        market_multiplier = self._market_multipliers(organization_id, is_buying)[self.supply.good_index[good_id]]
         
         # Calcola il prezzo finale
-        final_price = int(base_price * rarity_multiplier * org_multiplier * quantity)
+        final_price = int(base_price * rarity_multiplier * org_multiplier * market_multiplier * quantity)
         
         return {
             "success": True,
@@ -118,6 +203,7 @@ class Market:
                 "base_price": base_price,
                 "rarity_multiplier": rarity_multiplier,
                 "org_multiplier": org_multiplier,
+                "market_multiplier": market_multiplier,
                 "quantity": quantity,
                 "final_price": final_price,
                 "currency": "supplies",  # Specifica la valuta usata
@@ -126,36 +212,166 @@ class Market:
         }
         
     def get_price(self, good_id: str, organization_id: str, is_buying: bool = True) -> int:
-        """Versione semplificata che restituisce solo il prezzo finale"""
-        price_details = self.get_price_details(good_id, organization_id, 1, is_buying)
-        return price_details["details"]["final_price"] if price_details["success"] else 0
+        """Versione semplificata che restituisce solo il prezzo unitario finale"""
+        g = self.supply.good_index.get(good_id)
+        if g is None:
+            return 0
+        multiplier = self.supply.multipliers(organization_id)[g]
+        if is_buying and self.daily_trades:
+            multiplier *= 1 + TRADE_PRESSURE * self.daily_trades
+        return int(self._static_prices(organization_id, is_buying)[g] * multiplier)
         
-    def calculate_infiltration_risk(self, good: TradeGood, organization_id: str, game_state) -> float:
-        """Calcola il rischio di infiltrazione per uno scambio considerando vari fattori"""
-        base_risk = good.infiltration_risk
+    def price_history(self, good_id: str, organization_id: str) -> List[int]:
+        """Prezzi di acquisto degli ultimi giorni, dal più vecchio al più recente"""
+        if good_id not in self.trade_goods:
+            return []
+        return self.supply.price_history(organization_id, good_id)
+        
+    @staticmethod
+    def _protection(attitude: float, defense: int) -> float:
+        """Riduzione del rischio data dall'attitudine dell'organizzazione e dalla difesa della base"""
+        # Riduce il rischio in base all'attitudine dell'organizzazione
+        attitude_modifier = max(0.5, 1 - (attitude / 200))  # Max 50% riduzione
+        
+        # Il sistema di difesa della base riduce il rischio
+        defense_modifier = max(0.3, 1 - (defense / 150))  # Max 70% riduzione
+        return attitude_modifier * defense_modifier
         
+    def _trade_protection(self, organization_id: str, game_state) -> float:
+        return self._protection(game_state.diplomacy.organizations[organization_id].attitude,
+                                game_state.defense.get_total_defense())
+        
+    def _base_risk(self, good: TradeGood) -> float:
         # Aumenta con il numero di scambi giornalieri
-        risk = base_risk * self.infiltration_multiplier
+        risk = good.infiltration_risk * self.infiltration_multiplier
         
         # Aumenta con la rarità del bene
-        risk *= (1 + (good.rarity - 1) * 0.1)
+        return risk * (1 + (good.rarity - 1) * 0.1)
         
-        # Riduce il rischio in base all'attitudine dell'organizzazione
-        org_attitude = game_state.diplomacy.organizations[organization_id].attitude
-        attitude_modifier = max(0.5, 1 - (org_attitude / 200))  # Max 50% riduzione
-        risk *= attitude_modifier
+    def _infiltration_risk(self, good: TradeGood, daily_trades: int, protection: float) -> float:
+        risk = self._base_risk(good)
         
         # Aumenta il rischio se gli scambi sono troppo frequenti
-        frequency_penalty = 1 + (self.daily_trades * 0.15)  # +15% per ogni scambio
+        frequency_penalty = 1 + (daily_trades * 0.15)  # +15% per ogni scambio
         risk *= frequency_penalty
         
-        # Il sistema di difesa della base riduce il rischio
-        defense_bonus = game_state.defense.get_total_defense()
-        defense_modifier = max(0.3, 1 - (defense_bonus / 150))  # Max 70% riduzione
-        risk *= defense_modifier
+        risk *= protection
         
         return min(risk, 0.75)  # Max 75% di rischio
         
+    def calculate_infiltration_risk(self, good: TradeGood, organization_id: str, game_state) -> float:
+        """Calcola il rischio di infiltrazione per uno scambio considerando vari fattori"""
+        return self._infiltration_risk(good, self.daily_trades,
+                                       self._trade_protection(organization_id, game_state))
+        
+    def _organization_protections(self, game_state) -> Tuple[tuple, Dict[str, float]]:
+        """_protection di tutte le organizzazioni, ricalcolata solo se difesa o attitudini cambiano"""
+        organizations = game_state.diplomacy.organizations
+        key = (game_state.defense.get_total_defense(),
+               tuple((org_id, org.attitude) for org_id, org in organizations.items()))
+        if key != self._protections[0]:
+            defense = key[0]
+            self._protections = (key, {org_id: self._protection(attitude, defense)
+                                       for org_id, attitude in key[1]})
+        return self._protections
+        
+    def risk_table(self, game_state, trades_ahead: int = 1) -> Dict[str, Dict[str, List[float]]]:
+        """Rischio di infiltrazione di ogni bene con ogni organizzazione.
+
+        table[org_id][good_id][k] è il rischio se lo scambio è il (k+1)-esimo
+        a partire da ora, tenendo conto degli scambi già fatti oggi: il
+        primo valore è quello che userebbe trade. Il risultato resta in cache
+        finché non cambiano scambi del giorno, difesa o attitudini.
+        """
+        inputs, protections = self._organization_protections(game_state)
+        key = (inputs, self.daily_trades, self.infiltration_multiplier, trades_ahead)
+        if key == self._risks[0]:
+            return self._risks[1]
+            
+        goods = self.trade_goods
+        bases = [self._base_risk(good) for good in goods.values()]
+        penalties = [1 + ((self.daily_trades + k) * 0.15) for k in range(1, trades_ahead + 1)]
+        table = {}
+        for org_id, protection in protections.items():
+            # Righe per numero di scambi, poi trasposte per bene
+            rows = [[min(base * penalty * protection, 0.75) for base in bases] for penalty in penalties]
+            table[org_id] = {good_id: list(column) for good_id, column in zip(goods, zip(*rows))}
+        self._risks = (key, table)
+        return table
+        
+    def _apply_infiltration(self, good: TradeGood, organization_id: str, relation_bonus: float,
+                            game_state) -> Tuple[int, str]:
+        """Danni di un'infiltrazione avvenuta durante uno scambio: (severità, resoconto)"""
+        # Calcola la severità dell'infiltrazione
+        severity = random.randint(1, 3)  # 1: Minore, 2: Moderata, 3: Grave
+        damage_multiplier = severity * good.rarity
+        
+        # Seleziona target basato sulla severità
+        if severity == 1:
+            targets = ["resources"]
+        elif severity == 2:
+            targets = ["resources", "morale"]
+        else:
+            targets = ["resources", "morale", "intel"]
+            
+        infiltration_message = f"Infiltrazione di livello {severity} rilevata!\n"
+        
+        for target in targets:
+            if target == "resources":
+                resources = list(game_state.resources.resources.keys())
+                resource = random.choice(resources)
+                amount = random.randint(5, 10) * damage_multiplier
+                game_state.resources.modify(resource, -amount)
+                infiltration_message += f"- Persi {amount} {resource}\n"
+            elif target == "morale":
+                penalty = 5 * damage_multiplier
+                game_state.stats.adjust("morale", -penalty, low=0)
+                infiltration_message += f"- Morale diminuito di {penalty}\n"
+            else:
+                penalty = 3 * damage_multiplier
+                game_state.intel.add_intel_points("level_0", -penalty, "Infiltrazione")
+                infiltration_message += f"- Persi {penalty} punti intel\n"
+                
+        # Peggiora le relazioni in caso di infiltrazione grave
+        if severity == 3:
+            penalty = relation_bonus * 2
+            game_state.diplomacy.modify_relation(organization_id, -penalty)
+            infiltration_message += f"- Relazioni peggiorate di {int(penalty)} punti\n"
+                
+        return severity, infiltration_message
+        
+    @staticmethod
+    def _apply_special_effects(good: TradeGood, game_state):
+        """Effetti speciali di un bene scambiato"""
+        for effect, value in good.special_effects.items():
+            if effect == "morale":
+                game_state.stats.adjust("morale", value, high=100)
+            elif effect == "defense_bonus":
+                game_state.defense.defense_rating += value
+            elif effect == "intel_bonus":
+                game_state.intel.add_intel_points("level_0", value, 
+                    f"Bonus commercio {good.name}")
+            elif effect == "medical_bonus":
+                # Implementa bonus medico
+                pass
+            elif effect == "corruption":
+                game_state.stats.adjust("corruption_level", value)
+            elif effect == "sanity":
+                # Implementa effetti sanità mentale
+                pass
+        
+    @staticmethod
+    def _reactions(organization_id: str, attitude_before: float, game_state) -> Tuple[Dict[str, float], str]:
+        """Variazioni che lo scambio provocherà domani nelle fazioni vicine (grafo della diplomazia)"""
+        diplomacy = game_state.diplomacy
+        change = diplomacy.organizations[organization_id].attitude - attitude_before
+        reactions = diplomacy.graph.propagate({organization_id: change})
+        if not reactions:
+            return reactions, ""
+        names = ", ".join(f"{diplomacy.organizations[org_id].name} {amount:+.1f}"
+                          for org_id, amount in reactions.items())
+        return reactions, f"\nReazioni attese: {names}"
+        
     def trade(self, good_id: str, organization_id: str, quantity: int, 
              is_buying: bool, game_state) -> Dict:
         """Esegue uno scambio commerciale"""
@@ -189,28 +405,13 @@ class Market:
         else:
             game_state.resources.modify(good_id, -quantity)
             game_state.resources.modify("supplies", int(price * 0.8))  # 20% di perdita nella vendita
+        self.supply.record_trade(organization_id, good_id, quantity, is_buying)
             
         # Applica effetti speciali
-        if good.special_effects:
-            for effect, value in good.special_effects.items():
-                if effect == "morale":
-                    game_state.stats.morale = min(100, 
-                        game_state.stats.morale + value)
-                elif effect == "defense_bonus":
-                    game_state.defense.defense_rating += value
-                elif effect == "intel_bonus":
-                    game_state.intel.add_intel_points("level_0", value, 
-                        f"Bonus commercio {good.name}")
-                elif effect == "medical_bonus":
-                    # Implementa bonus medico
-                    pass
-                elif effect == "corruption":
-                    game_state.stats.corruption_level += value
-                elif effect == "sanity":
-                    # Implementa effetti sanità mentale
-                    pass
+        self._apply_special_effects(good, game_state)
                     
         # Aumenta attitudine dell'organizzazione
+        attitude_before = game_state.diplomacy.organizations[organization_id].attitude
         attitude_gain = good.rarity * (2 if is_buying else 1)
         game_state.diplomacy.modify_relation(organization_id, attitude_gain)
         
@@ -233,71 +434,174 @@ class Market:
         # Gestione infiltrazione con nuovo sistema
         infiltration_risk = self.calculate_infiltration_risk(good, organization_id, game_state)
         if random.random() < infiltration_risk:
-            # Calcola la severità dell'infiltrazione
-            severity = random.randint(1, 3)  # 1: Minore, 2: Moderata, 3: Grave
-            damage_multiplier = severity * good.rarity
-            
-            # Seleziona target basato sulla severità
-            if severity == 1:
-                targets = ["resources"]
-            elif severity == 2:
-                targets = ["resources", "morale"]
-            else:
-                targets = ["resources", "morale", "intel"]
-                
-            infiltration_message = f"Infiltrazione di livello {severity} rilevata!\n"
-            
-            for target in targets:
-                if target == "resources":
-                    resources = list(game_state.resources.resources.keys())
-                    resource = random.choice(resources)
-                    amount = random.randint(5, 10) * damage_multiplier
-                    game_state.resources.modify(resource, -amount)
-                    infiltration_message += f"- Persi {amount} {resource}\n"
-                elif target == "morale":
-                    penalty = 5 * damage_multiplier
-                    game_state.stats.morale = max(0, game_state.stats.morale - penalty)
-                    infiltration_message += f"- Morale diminuito di {penalty}\n"
-                else:
-                    penalty = 3 * damage_multiplier
-                    game_state.intel.add_intel_points("level_0", -penalty, "Infiltrazione")
-                    infiltration_message += f"- Persi {penalty} punti intel\n"
-                    
-            # Peggiora le relazioni in caso di infiltrazione grave
-            if severity == 3:
-                penalty = relation_bonus * 2
-                game_state.diplomacy.modify_relation(organization_id, -penalty)
-                infiltration_message += f"- Relazioni peggiorate di {int(penalty)} punti\n"
-                
+            _, infiltration_message = self._apply_infiltration(good, organization_id, relation_bonus, game_state)
+            reactions, reactions_line = self._reactions(organization_id, attitude_before, game_state)
             return {
                 "success": True,
                 "message": f"Scambio completato con {game_state.diplomacy.organizations[organization_id].name}\n" \
                           f"{'Acquistati' if is_buying else 'Venduti'} {quantity} {good.name}\n" \
-                          f"Costo: {price} rifornimenti\n" \
-                          f"⚠️ {infiltration_message}"
+                          f"Costo: {price} rifornimenti{reactions_line}\n" \
+                          f"⚠️ {infiltration_message}",
+                "reactions": reactions
             }
             
+        reactions, reactions_line = self._reactions(organization_id, attitude_before, game_state)
         return {
             "success": True,
             "message": f"Scambio completato con {game_state.diplomacy.organizations[organization_id].name}\n" \
                       f"{'Acquistati' if is_buying else 'Venduti'} {quantity} {good.name}\n" \
-                      f"Costo: {price} rifornimenti"
+                      f"Costo: {price} rifornimenti{reactions_line}",
+            "reactions": reactions
+        }
+        
+    def trade_basket(self, organization_id: str, lines: Sequence, game_state) -> Dict:
+        """Esegue più scambi con la stessa organizzazione come un unico ordine.
+
+        Le righe (OrderLine o tuple good_id, quantità, acquisto) vengono
+        verificate tutte prima di modificare la partita: se una non è valida
+        o il saldo netto dell'ordine non è coperto, non cambia nulla. Le
+        risorse si muovono con un solo vettore, le relazioni con le due
+        modifiche di trade (attitudine, poi bonus relazione), ognuna
+        limitata a 0-100, e l'infiltrazione viene tirata una volta sul rischio
+        complessivo delle righe. Tutte le righe usano i prezzi in vigore
+        al momento dell'ordine.
+        """
+        orders = [(line.good_id, line.quantity, line.is_buying) if isinstance(line, OrderLine)
+                  else tuple(line) for line in lines]
+        if not orders:
+            return {"success": False, "message": "Nessun bene nell'ordine"}
+        organization = game_state.diplomacy.organizations.get(organization_id)
+        if organization is None:
+            return {"success": False, "message": f"Organizzazione sconosciuta: {organization_id}"}
+            
+        buy_prices = self._unit_prices(organization_id, True)
+        sell_prices = self._unit_prices(organization_id, False)
+        deltas: Dict[str, int] = {}
+        results = []
+        relation_bonuses = []
+        cost = revenue = 0
+        attitude_gain = 0.0
+        for good_id, quantity, is_buying in orders:
+            good = self.trade_goods.get(good_id)
+            if good is None:
+                return {"success": False, "message": f"Bene non disponibile per il commercio: {good_id}"}
+            if quantity <= 0:
+                return {"success": False, "message": f"Quantità non valida per {good.name}"}
+                
+            # Arrotondamenti e bonus per riga, come in trade
+            relation_bonus = good.rarity * quantity * 0.5
+            if is_buying:
+                price = buy_prices[good_id] * quantity
+                cost += price
+                deltas["supplies"] = deltas.get("supplies", 0) - price
+                deltas[good_id] = deltas.get(good_id, 0) + quantity
+                attitude_gain += good.rarity * 2
+            else:
+                price = int(sell_prices[good_id] * quantity * 0.8)
+                revenue += price
+                deltas["supplies"] = deltas.get("supplies", 0) + price
+                deltas[good_id] = deltas.get(good_id, 0) - quantity
+                attitude_gain += good.rarity
+                relation_bonus *= 1.2
+            if organization_id in good.organization_bonus:
+                relation_bonus *= 1.5
+            relation_bonuses.append(relation_bonus)
+            results.append({"good_id": good_id, "quantity": quantity,
+                            "is_buying": is_buying, "price": price})
+            
+        # Il saldo è netto: quanto si vende nell'ordine può pagare quanto si compra
+        resources = game_state.resources
+        for name, delta in deltas.items():
+            if delta < 0 and resources.get(name) + delta < 0:
+                if name == "supplies":
+                    message = "Rifornimenti insufficienti per l'ordine"
+                else:
+                    message = f"{self.trade_goods[name].name} insufficiente per la vendita"
+                return {"success": False, "message": message}
+        resources.apply_deltas(RESOURCES.vector(deltas))
+        for good_id, quantity, is_buying in orders:
+            self.supply.record_trade(organization_id, good_id, quantity, is_buying)
+        
+        goods = [self.trade_goods[good_id] for good_id, _, _ in orders]
+        for good in goods:
+            if good.special_effects:
+                self._apply_special_effects(good, game_state)
+        attitude_before = organization.attitude
+        # Due passi come in trade: il limite a 100 si applica dopo ciascuno
+        game_state.diplomacy.modify_relation(organization_id, attitude_gain)
+        game_state.diplomacy.modify_relation(organization_id, sum(relation_bonuses))
+        
+        # Ogni riga conta come uno scambio della giornata; l'ordine viene
+        # scoperto se almeno una riga lo sarebbe stata da sola
+        protection = self._trade_protection(organization_id, game_state)
+        risks = []
+        for good in goods:
+            self.daily_trades += 1
+            risks.append(self._infiltration_risk(good, self.daily_trades, protection))
+        safe = 1.0
+        for risk in risks:
+            safe *= 1 - risk
+        infiltration_risk = 1 - safe
+        
+        summary = "\n".join(
+            f"{'Acquistati' if line['is_buying'] else 'Venduti'} {line['quantity']} "
+            f"{good.name}: {line['price']} rifornimenti"
+            for good, line in zip(goods, results)
+        )
+        message = (f"Ordine completato con {organization.name}\n{summary}\n"
+                   f"Costo: {cost} rifornimenti, ricavo: {revenue} rifornimenti")
+        infiltration = None
+        if random.random() < infiltration_risk:
+            i = random.choices(range(len(goods)), weights=risks)[0]
+            infiltration, infiltration_message = self._apply_infiltration(
+                goods[i], organization_id, relation_bonuses[i], game_state)
+            message += f"\n⚠️ {infiltration_message}"
+        reactions, reactions_line = self._reactions(organization_id, attitude_before, game_state)
+        message += reactions_line
+            
+        return {
+            "success": True,
+            "message": message,
+            "lines": results,
+            "cost": cost,
+            "revenue": revenue,
+            "infiltration_risk": infiltration_risk,
+            "infiltration": infiltration,
+            "reactions": reactions,
         }
         
     def daily_update(self):
-        """Reset giornaliero del sistema di mercato"""
+        """Reset giornaliero del sistema di mercato.
+
+        Scorte, domanda e storico dei prezzi di un'organizzazione si
+        aggiornano alla prima lettura successiva (vedi SupplyDemand): il
+        giorno costa lo stesso con o senza ambasciata e organizzazioni.
+        """
         self.daily_trades = 0
         self.infiltration_multiplier = 1.0
+        self.supply.advance()
         
     def to_dict(self) -> Dict:
         return {
             "daily_trades": self.daily_trades,
-            "infiltration_multiplier": self.infiltration_multiplier
+            "infiltration_multiplier": self.infiltration_multiplier,
+            "supply": self.supply.to_dict()
         }
         
     def from_dict(self, data: Dict):
         self.daily_trades = data["daily_trades"]
         self.infiltration_multiplier = data["infiltration_multiplier"]
+        self.supply = SupplyDemand(self.trade_goods, self._static_price, data["supply"]["seed"])
+        self.supply.from_dict(data["supply"])
+        
+    def snapshot(self) -> tuple:
+        return (self.daily_trades, self.infiltration_multiplier, self.supply.snapshot())
+        
+    def restore(self, state: tuple):
+        self.daily_trades, self.infiltration_multiplier, supply = state
+        # Oggetto nuovo: un fork non deve condividere gli array con l'originale
+        self.supply = shallow_copy(self.supply)
+        self.supply.restore(supply)
         
     def reset(self):
         self.__init__()
@@ -0,0 +1,181 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from .saves import SaveManager, SQLiteSaveManager
+
+# Versione corrente del formato dei salvataggi. Ogni modifica allo schema
+# incrementa questo numero e registra un passo di migrazione qui sotto.
+SAVE_VERSION = 8
+
+_MIGRATIONS: Dict[int, Callable[[Dict], Dict]] = {}
+
+def migration(from_version: int):
+    """Registra una funzione che porta un salvataggio da from_version a from_version + 1"""
+    def register(func: Callable[[Dict], Dict]) -> Callable[[Dict], Dict]:
+        if from_version in _MIGRATIONS:
+            raise ValueError(f"Migrazione dalla versione {from_version} già registrata")
+        _MIGRATIONS[from_version] = func
+        return func
+    return register
+
+def get_save_version(data: Dict) -> int:
+    """I salvataggi precedenti al versionamento non hanno il campo e valgono 0"""
+    return data.get("version", 0)
+
+def migrate_save(data: Dict) -> Tuple[Dict, bool]:
+    """Aggiorna un salvataggio alla versione corrente.
+
+    Restituisce i dati aggiornati e True se è stata applicata almeno una migrazione.
+    """
+    version = get_save_version(data)
+    if version > SAVE_VERSION:
+        raise ValueError(f"Salvataggio in formato {version}, più recente del gioco ({SAVE_VERSION})")
+    upgraded = version < SAVE_VERSION
+    while version < SAVE_VERSION:
+        step = _MIGRATIONS.get(version)
+        if step is None:
+            raise ValueError(f"Nessuna migrazione disponibile dalla versione {version}")
+        data = step(data)
+        version += 1
+        data["version"] = version
+    return data, upgraded
+
+@migration(0)
+def _add_base_sections(data: Dict) -> Dict:
+    """v0 -> v1: difesa, diplomazia e mercato entrano nel salvataggio"""
+    stats = data.setdefault("stats", {})
+    stats.setdefault("day", 1)
+    stats.setdefault("prestige", 50)
+    stats.setdefault("morale", 70)
+    stats.setdefault("defense_rating", 50)
+    data.setdefault("defense", {"alert_level": 1, "defense_rating": 10, "structures": []})
+    data.setdefault("diplomacy", {"embassy_built": False, "organizations": {}})
+    data.setdefault("market", {"daily_trades": 0, "infiltration_multiplier": 1.0})
+    return data
+
+@migration(1)
+def _add_counters(data: Dict) -> Dict:
+    """v1 -> v2: contatori globali; quelli storici partono da zero"""
+    data.setdefault("counters", {})
+    return data
+
+@migration(2)
+def _add_endings(data: Dict) -> Dict:
+    """v2 -> v3: livello di corruzione della base e finali già raggiunti"""
+    data.setdefault("stats", {}).setdefault("corruption_level", 0)
+    data.setdefault("endings", {"triggered": []})
+    return data
+
+@migration(3)
+def _add_squads(data: Dict) -> Dict:
+    """v3 -> v4: le missioni attive hanno una lista di agenti (squadre)"""
+    for mission in data.get("missions", {}).get("active_missions", []):
+        agent_id = mission.pop("assigned_agent", None)
+        mission["assigned_agents"] = [agent_id] if agent_id else []
+        mission.setdefault("risk_factor", 1.0)
+    return data
+
+@migration(4)
+def _add_market_supply(data: Dict) -> Dict:
+    """v4 -> v5: scorte, domanda e storico dei prezzi delle organizzazioni"""
+    data.setdefault("market", {}).setdefault("supply", {"day": 0, "organizations": {}})
+    return data
+
+@migration(5)
+def _add_relation_graph(data: Dict) -> Dict:
+    """v5 -> v6: variazioni di attitudine in attesa di propagarsi alle altre fazioni"""
+    data.setdefault("diplomacy", {}).setdefault("pending_changes", {})
+    return data
+
+@migration(6)
+def _add_supply_seed(data: Dict) -> Dict:
+    """v6 -> v7: seme del rumore di domanda, indipendente dal generatore della partita"""
+    data.setdefault("market", {}).setdefault("supply", {}).setdefault("seed", 0)
+    return data
+
+@migration(7)
+def _add_agent_id_counter(data: Dict) -> Dict:
+    """v7 -> v8: contatore degli id degli agenti; gli id ripetuti ricevono un numero nuovo"""
+    personnel = data.setdefault("personnel", {})
+    agents = personnel.setdefault("agents", [])
+    numbers = [int(agent["id"][6:]) for agent in agents
+               if agent["id"].startswith("agent_") and agent["id"][6:].isdigit()]
+    next_id = max(numbers + [len(agents)]) + 1
+    seen = set()
+    for agent in agents:
+        if agent["id"] in seen:
+            # Prima nessuna ricerca per id arrivava a questo agente: le
+            # missioni indicano il primo, quindi torna disponibile
+            agent["id"] = f"agent_{next_id}"
+            agent["status"] = "disponibile"
+            next_id += 1
+        seen.add(agent["id"])
+    personnel["next_agent_id"] = next_id
+    return data
+
+def _migrate_file(path: str) -> Tuple[str, str]:
+    """Migra un singolo file JSON (eseguita nei processi worker)"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        data, upgraded = migrate_save(data)
+        if not upgraded:
+            return path, "current"
+        save_path = Path(path)
+        SaveManager(save_path.parent).write_save(save_path.stem, data)
+        return path, "migrated"
+    except (OSError, ValueError) as e:
+        return path, f"error: {e}"
+
+def migrate_saves_dir(saves_dir: str = "saves", workers: int = None) -> Dict:
+    """Riscrive in parallelo tutti i salvataggi JSON di una cartella nel formato corrente"""
+    paths = [str(p) for p in sorted(Path(saves_dir).glob("*.json"))]
+    summary = {"migrated": 0, "current": 0, "failed": []}
+    if not paths:
+        return summary
+    workers = workers or min(len(paths), os.cpu_count() or 1)
+    chunksize = max(1, len(paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, outcome in pool.map(_migrate_file, paths, chunksize=chunksize):
+            if outcome in ("migrated", "current"):
+                summary[outcome] += 1
+            else:
+                summary["failed"].append(f"{Path(path).name}: {outcome}")
+    return summary
+
+def migrate_sqlite_store(store: SQLiteSaveManager) -> Dict:
+    """Aggiorna gli slot di un database SQLite rimasti a versioni precedenti"""
+    summary = {"migrated": 0, "failed": []}
+    for name in store.get_saves_below_version(SAVE_VERSION):
+        try:
+            data, upgraded = migrate_save(store.read_save(name))
+            if upgraded:
+                store.write_save(name, data)
+                summary["migrated"] += 1
+        except ValueError as e:
+            summary["failed"].append(f"{name}: {e}")
+    return summary
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Migra i salvataggi al formato corrente")
+    parser.add_argument("saves_dir", nargs="?", default="saves", help="cartella dei salvataggi JSON")
+    parser.add_argument("--workers", type=int, default=None, help="numero di processi")
+    parser.add_argument("--sqlite", default=None, help="database SQLite da migrare al posto dei file JSON")
+    args = parser.parse_args(argv)
+
+    if args.sqlite:
+        summary = migrate_sqlite_store(SQLiteSaveManager(args.sqlite))
+    else:
+        summary = migrate_saves_dir(args.saves_dir, args.workers)
+    print(f"Salvataggi migrati alla versione {SAVE_VERSION}: {summary['migrated']}")
+    if "current" in summary:
+        print(f"Già aggiornati: {summary['current']}")
+    for failure in summary["failed"]:
+        print(f"Errore: {failure}")
+
+if __name__ == "__main__":
+    main()
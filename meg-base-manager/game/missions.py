@@ -1,8 +1,19 @@
 import random
 import json
-from typing import List, Dict
+from collections import Counter, defaultdict
+from typing import Iterable, List, Dict, Optional, Sequence, Tuple
+from .counters import REWARD_COUNTERS, GameCounters
+from .roster import AgentStatus
+from .snapshots import shallow_copy
+from .squads import MAX_SQUAD, MIN_SQUAD, agent_factors, scale_rewards
 
 class Mission:
+    __slots__ = ("id", "title", "description", "duration", "rewards", "valid_levels",
+                 "level_requirements", "difficulty_multiplier", "chain_mission",
+                 "prerequisites", "days_left", "completed", "assigned_agents",
+                 "selected_level", "catalog_index", "adjusted_rewards", "completed_today",
+                 "risk_factor")
+    
     def __init__(self, id: str, title: str, description: str, duration: int,
                  rewards: Dict, valid_levels: str | List[str] | None = None,
                  level_requirements: Dict = None, difficulty_multiplier: Dict = None,
@@ -19,8 +30,21 @@ class Mission:
         self.prerequisites = prerequisites or {}
         self.days_left = duration
         self.completed = False
-        self.assigned_agent = None
+        self.assigned_agents = ()  # Id degli agenti in missione: uno solo o una squadra
+        self.risk_factor = 1.0     # Moltiplicatore del rischio giornaliero della squadra
         self.selected_level = None
+        self.catalog_index = None  # Posizione nel catalogo, usata da snapshot e fork
+        self.adjusted_rewards = None  # Ricompense calcolate all'avvio della missione
+        self.completed_today = None   # Diventa False quando la missione viene offerta
+        
+    def get_state(self) -> tuple:
+        """Stato mutabile della missione (la definizione resta nel catalogo condiviso)"""
+        return (self.days_left, self.completed, self.assigned_agents, self.selected_level,
+                self.adjusted_rewards, self.completed_today, self.risk_factor)
+        
+    def set_state(self, state: tuple):
+        (self.days_left, self.completed, self.assigned_agents, self.selected_level,
+         self.adjusted_rewards, self.completed_today, self.risk_factor) = state
         
     def calculate_rewards(self, level_difficulty: int) -> Dict:
         """Calcola le ricompense basate sulla difficoltà del livello"""
@@ -46,15 +70,282 @@ class Mission:
             adjusted_rewards["intel_points"] = int(self.rewards["intel_points"] * 
                                               (1 + (level_difficulty - 1) * (multiplier - 1) / 4))
             
+        # Documenti e frammenti sono pezzi unici: non dipendono dalla difficoltà
+        counters = {name: self.rewards[name] for name in REWARD_COUNTERS if name in self.rewards}
+        if counters:
+            adjusted_rewards["counters"] = counters
+            
         return adjusted_rewards
 
+class SamplingPool:
+    """Insieme con inserimento, rimozione ed estrazione casuale in O(1)"""
+
+    def __init__(self, items: Iterable = ()):
+        self.items: list = []
+        self.positions: Dict = {}
+        for item in items:
+            self.add(item)
+
+    def add(self, item):
+        if item not in self.positions:
+            self.positions[item] = len(self.items)
+            self.items.append(item)
+
+    def discard(self, item):
+        position = self.positions.pop(item, None)
+        if position is None:
+            return
+        # L'ultimo elemento prende il posto di quello rimosso
+        last = self.items.pop()
+        if position < len(self.items):
+            self.items[position] = last
+            self.positions[last] = position
+
+    def choice(self):
+        return random.choice(self.items) if self.items else None
+
+    def sample(self, k: int) -> list:
+        """k elementi distinti a caso, in O(k) (Fisher-Yates parziale)"""
+        items = self.items
+        positions = self.positions
+        k = min(k, len(items))
+        for i in range(k):
+            j = random.randrange(i, len(items))
+            items[i], items[j] = items[j], items[i]
+            positions[items[i]] = i
+            positions[items[j]] = j
+        return items[:k]
+
+    def copy(self) -> "SamplingPool":
+        clone = SamplingPool.__new__(SamplingPool)
+        clone.items = self.items.copy()
+        clone.positions = self.positions.copy()
+        return clone
+
+    def __contains__(self, item) -> bool:
+        return item in self.positions
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+class MissionGraph:
+    """Catene e prerequisiti del catalogo compilati in archi tra indici.
+
+    Gli id in missions.json non sono univoci: ogni arco punta a tutte le
+    voci del catalogo con l'id indicato. Per ogni relazione c'è anche
+    l'arco inverso (chi porta a una missione, chi la richiede).
+    """
+
+    def __init__(self, missions: List["Mission"]):
+        by_id = defaultdict(list)
+        for mission in missions:
+            by_id[mission.id].append(mission.catalog_index)
+        self.by_id: Dict[str, Tuple[int, ...]] = {key: tuple(value) for key, value in by_id.items()}
+        
+        # Prossime missioni della catena
+        self.chain_next: List[Tuple[int, ...]] = [
+            self.by_id.get(mission.chain_mission.get("next_mission"), ()) if mission.chain_mission else ()
+            for mission in missions
+        ]
+        # Successori messi in testa alle missioni giornaliere mentre la
+        # missione è attiva: solo quelli che proseguono a loro volta la catena
+        self.frontier_next: List[Tuple[int, ...]] = [
+            tuple(index for index in successors if missions[index].chain_mission)
+            for successors in self.chain_next
+        ]
+        # Missioni da completare: per ogni id richiesto, le voci che lo soddisfano
+        self.requirements: List[Tuple[Tuple[str, Tuple[int, ...]], ...]] = [
+            tuple((required_id, self.by_id.get(required_id, ()))
+                  for required_id in mission.prerequisites.get("completed_missions", ()))
+            for mission in missions
+        ]
+        
+        # Archi inversi: missioni della catena che portano qui e missioni
+        # che richiedono di completare questa
+        chain_prev = [[] for _ in missions]
+        for index, successors in enumerate(self.chain_next):
+            for successor in successors:
+                chain_prev[successor].append(index)
+        required_by = [[] for _ in missions]
+        for index, requirements in enumerate(self.requirements):
+            for _, required in requirements:
+                for required_index in required:
+                    required_by[required_index].append(index)
+        self.chain_prev: List[Tuple[int, ...]] = [tuple(value) for value in chain_prev]
+        self.required_by: List[Tuple[int, ...]] = [tuple(value) for value in required_by]
+
+class DeathRiskTable:
+    """Probabilità di morte giornaliera precalcolata per livello.
+
+    Il rischio dipende solo da difficoltà e conoscenza del livello, durata
+    della missione ed esperienza dell'agente. Per ogni livello viene tenuta
+    una tabella densa durata × esperienza, ricostruita quando cambia il
+    livello di conoscenza (che modifica sia il bonus intel sia la
+    difficoltà nota).
+    """
+
+    MAX_EXP = 100  # L'esperienza si azzera a ogni passaggio di livello
+
+    def __init__(self, max_duration: int):
+        self.max_duration = max_duration
+        # level_id -> (knowledge_level, difficoltà, tabella)
+        self._rows: Dict[str, Tuple[int, int, List[float]]] = {}
+
+    @staticmethod
+    def probability(difficulty: int, duration: int, exp: int, knowledge_level: int) -> float:
+        # Aumentata la probabilità base per ogni livello di difficoltà
+        base_probability = difficulty * 0.05  # 5% per livello di difficoltà
+        
+        # La durata della missione influisce maggiormente
+        mission_modifier = duration * 0.02  # 2% per giorno di missione
+        
+        # L'esperienza aiuta meno a ridurre il rischio
+        experience_modifier = 0.05 - (exp * 0.005)  # -0.5% per livello di esperienza
+        
+        # Aggiungi modificatore basato sul livello di conoscenza del livello
+        intel_modifier = 0.1 - (knowledge_level * 0.015)  # -1.5% per livello di intel
+        
+        final_probability = (base_probability + mission_modifier - experience_modifier + intel_modifier)
+        
+        # Aumentato il range di probabilità
+        return max(0.05, min(0.75, final_probability))  # Limita tra 5% e 75%
+
+    def _row(self, intel, level_id: str) -> Optional[Tuple[int, int, List[float]]]:
+        level = intel.levels_intel.get(level_id)
+        if level is None:
+            return None
+        cached = self._rows.get(level_id)
+        if cached is not None and cached[0] == level.knowledge_level:
+            return cached
+        difficulty = intel.get_known_difficulty(level_id)
+        table = [
+            self.probability(difficulty, duration, exp, level.knowledge_level)
+            for duration in range(self.max_duration + 1)
+            for exp in range(self.MAX_EXP)
+        ]
+        cached = (level.knowledge_level, difficulty, table)
+        self._rows[level_id] = cached
+        return cached
+
+    def get(self, intel, level_id: str, duration: int, exp: int) -> Optional[float]:
+        """Rischio giornaliero in un livello; None se il livello non esiste"""
+        row = self._row(intel, level_id)
+        if row is None:
+            return None
+        knowledge_level, difficulty, table = row
+        if 0 <= duration <= self.max_duration and 0 <= exp < self.MAX_EXP:
+            return table[duration * self.MAX_EXP + exp]
+        return self.probability(difficulty, duration, exp, knowledge_level)
+
+    def survival(self, intel, level_id: Optional[str], duration: int, exp: int) -> float:
+        """Probabilità di sopravvivere a tutta la missione (1 senza livello)"""
+        risk = self.get(intel, level_id, duration, exp) if level_id else None
+        return 1.0 if risk is None else (1 - risk) ** duration
+
+    def clear(self):
+        self._rows.clear()
+
 class MissionManager:
-    def __init__(self):
+    def __init__(self, intel=None):
         self.missions = self.load_missions()
+        self.graph = MissionGraph(self.missions)
+        self.death_risk = DeathRiskTable(max((m.duration for m in self.missions), default=0))
         self.active_missions = []
         self.daily_missions = []  # Lista delle missioni giornaliere disponibili
+        self.verbose = True  # False nelle simulazioni: niente messaggi né attese di INVIO
+        self.counters = GameCounters()  # Sostituito da quello condiviso di GameState
+        
+        # Indici per la generazione giornaliera: missioni proponibili (mai
+        # proposte, non attive, con un livello idoneo) e frontiera delle
+        # catene, cioè quante missioni attive sbloccano ciascun successore
+        self._active_indices = set()
+        self._frontier: Counter = Counter()
+        self._offerable = SamplingPool(range(len(self.missions)))
+        
+        # Livelli idonei per ogni missione del catalogo, aggiornati quando
+        # cambia la conoscenza di un livello (vedi bind_intel)
+        self._intel = None
+        self._eligible: List[SamplingPool] = []
+        self._level_missions: Dict[str, List[int]] = {}
+        if intel is not None:
+            self.bind_intel(intel)
         self.generate_daily_missions()  # Genera le prime missioni giornaliere
         
+    def bind_intel(self, intel, rebuild: bool = True):
+        """Collega il sistema intel da cui dipendono i livelli idonei delle missioni"""
+        self._intel = intel
+        intel.add_knowledge_listener(self.on_knowledge_changed)
+        if rebuild:
+            self.on_knowledge_changed(intel, None)
+            
+    def on_knowledge_changed(self, intel, level_id: Optional[str]):
+        """Aggiorna i livelli idonei: solo le missioni che usano level_id, o tutte se None"""
+        if level_id is None:
+            all_levels = list(intel.levels_intel.keys())
+            self._level_missions = {}
+            self._eligible = []
+            for mission in self.missions:
+                candidates = all_levels if mission.valid_levels == "all" else (mission.valid_levels or [])
+                pool = SamplingPool()
+                for candidate in candidates:
+                    self._level_missions.setdefault(candidate, []).append(mission.catalog_index)
+                    if self._is_level_valid(mission, candidate, intel):
+                        pool.add(candidate)
+                self._eligible.append(pool)
+            self._rebuild_generation_index()
+            return
+            
+        for index in self._level_missions.get(level_id, ()):
+            if self._is_level_valid(self.missions[index], level_id, intel):
+                self._eligible[index].add(level_id)
+            else:
+                self._eligible[index].discard(level_id)
+            self._refresh_offerable(index)
+                
+    def has_eligible_level(self, mission: Mission) -> bool:
+        """False se la missione richiede un livello ma nessuno è ancora idoneo"""
+        if not mission.valid_levels or self._intel is None:
+            return True
+        return len(self._eligible[mission.catalog_index]) > 0
+        
+    def _refresh_offerable(self, index: int):
+        mission = self.missions[index]
+        if (index not in self._active_indices and mission.completed_today is None
+                and self.has_eligible_level(mission)):
+            self._offerable.add(index)
+        else:
+            self._offerable.discard(index)
+            
+    def _rebuild_generation_index(self):
+        """Ricalcola gli indici della generazione giornaliera dopo un cambio in blocco"""
+        self._active_indices = {m.catalog_index for m in self.active_missions}
+        self._frontier = Counter(
+            successor
+            for mission in self.active_missions
+            for successor in self.graph.frontier_next[mission.catalog_index]
+        )
+        # Come _refresh_offerable per ogni missione, senza una chiamata per indice
+        active, has_eligible_level = self._active_indices, self.has_eligible_level
+        self._offerable = SamplingPool(
+            index for index, mission in enumerate(self.missions)
+            if index not in active and mission.completed_today is None and has_eligible_level(mission)
+        )
+            
+    def set_active_missions(self, missions: List[Mission]):
+        """Sostituisce le missioni attive mantenendo aggiornata la frontiera delle catene"""
+        previous = self._active_indices
+        self.active_missions = list(missions)
+        self._active_indices = {m.catalog_index for m in self.active_missions}
+        for index in previous - self._active_indices:
+            for successor in self.graph.frontier_next[index]:
+                self._frontier[successor] -= 1
+                if self._frontier[successor] <= 0:
+                    del self._frontier[successor]
+            self._refresh_offerable(index)
+        for index in self._active_indices - previous:
+            self._frontier.update(self.graph.frontier_next[index])
+            self._refresh_offerable(index)
+        
     def generate_daily_missions(self, force=False):
         """Genera 8 nuove missioni giornaliere casuali, includendo missioni concatenate quando disponibili
         
@@ -63,43 +354,27 @@ class MissionManager:
         """
         # Rigenera solo se non ci sono missioni o se viene forzato
         if force or not self.daily_missions:
-            # Filtra le missioni escludendo quelle attive o completate
-            available_missions = [m for m in self.missions 
-                                if m not in self.active_missions and 
-                                not hasattr(m, 'completed_today')]
-            
-            # Cerca missioni concatenate attualmente disponibili
-            chain_missions = [m for m in self.missions 
-                            if hasattr(m, 'chain_mission') and m.chain_mission and 
-                            m.id in [am.chain_mission.get('next_mission') for am in self.active_missions 
-                                   if hasattr(am, 'chain_mission') and am.chain_mission]]
-            
-            # Rimuove le missioni concatenate non ancora sbloccate dalla pool disponibile
-            available_missions = [m for m in available_missions 
-                                if m not in chain_missions or 
-                                any(am.chain_mission and am.chain_mission.get('next_mission') == m.id 
-                                    for am in self.active_missions)]
-            
-            if available_missions:
-                # Assicura che le missioni concatenate disponibili siano incluse
+            # Le missioni proponibili (non attive, mai proposte, con un livello
+            # idoneo) sono già indicizzate: il costo dipende solo dagli slot
+            if self._offerable:
                 selected_missions = []
                 remaining_slots = 8
                 
-                # Aggiunge prima le missioni concatenate disponibili
-                for chain_mission in chain_missions:
-                    if chain_mission in available_missions and remaining_slots > 0:
-                        selected_missions.append(chain_mission)
-                        available_missions.remove(chain_mission)
+                # Aggiunge prima le missioni concatenate sbloccate da quelle attive
+                for index in sorted(self._frontier):
+                    if remaining_slots > 0 and index in self._offerable:
+                        selected_missions.append(self.missions[index])
+                        self._offerable.discard(index)
                         remaining_slots -= 1
                 
                 # Riempie i restanti slot con missioni casuali
-                if remaining_slots > 0 and available_missions:
-                    random_missions = random.sample(available_missions, 
-                                                 min(remaining_slots, len(available_missions)))
-                    selected_missions.extend(random_missions)
+                if remaining_slots > 0:
+                    selected_missions.extend(
+                        self.missions[index] for index in self._offerable.sample(remaining_slots))
                 
                 for mission in selected_missions:
                     mission.completed_today = False
+                    self._offerable.discard(mission.catalog_index)
                 self.daily_missions = selected_missions
         
     def load_missions(self) -> List[Mission]:
@@ -114,6 +389,8 @@ class MissionManager:
                     mission_data.setdefault("level_requirements", {"min_knowledge": 0, "max_difficulty": 5})
                     mission_data.setdefault("difficulty_multiplier", {})
                     missions.append(Mission(**mission_data))
+                for idx, mission in enumerate(missions):
+                    mission.catalog_index = idx
                 return missions
         except Exception as e:
             print(f"Errore nel caricamento delle missioni: {e}")
@@ -125,36 +402,46 @@ class MissionManager:
             return self.missions[number - 1]
         return None
         
-    def select_valid_level(self, mission: Mission, game_state) -> str:
-        """Seleziona un livello valido per la missione se possibile"""
-        # Se non ci sono requisiti di livello, restituisci None
-        if not mission.valid_levels or mission.valid_levels == []:
-            return None
+    @staticmethod
+    def _is_level_valid(mission: Mission, level_id: str, intel) -> bool:
+        level_info = intel.get_level_info(level_id)
+        if not level_info:
+            return False
             
-        valid_levels = []
-        all_levels = list(game_state.intel.levels_intel.keys())
+        # Verifica requisiti del livello se presenti
+        if mission.level_requirements:
+            if level_info["knowledge_level"] < mission.level_requirements["min_knowledge"]:
+                return False
+                
+            if "difficulty" in level_info:
+                if level_info["difficulty"] > mission.level_requirements["max_difficulty"]:
+                    return False
+        return True
         
-        # Determina i livelli validi
-        possible_levels = all_levels if mission.valid_levels == "all" else mission.valid_levels
+    def get_valid_levels(self, mission: Mission, game_state) -> List[str]:
+        """Livelli in cui la missione può svolgersi con le conoscenze attuali"""
+        # Se non ci sono requisiti di livello, nessun livello è valido
+        if not mission.valid_levels or mission.valid_levels == []:
+            return []
+            
+        intel = game_state.intel
+        if intel is self._intel:
+            return list(self._eligible[mission.catalog_index].items)
+            
+        # Sistema intel non collegato: verifica tutti i livelli possibili
+        possible_levels = list(intel.levels_intel.keys()) if mission.valid_levels == "all" else mission.valid_levels
+        return [level_id for level_id in possible_levels if self._is_level_valid(mission, level_id, intel)]
         
-        for level_id in possible_levels:
-            level_info = game_state.intel.get_level_info(level_id)
-            if not level_info:
-                continue
-                
-            # Verifica requisiti del livello se presenti
-            if mission.level_requirements:
-                knowledge_level = game_state.intel.levels_intel[level_id].knowledge_level
-                if knowledge_level < mission.level_requirements["min_knowledge"]:
-                    continue
-                    
-                if "difficulty" in level_info:
-                    if level_info["difficulty"] > mission.level_requirements["max_difficulty"]:
-                        continue
-                    
-            valid_levels.append(level_id)
+    def select_valid_level(self, mission: Mission, game_state) -> str:
+        """Seleziona un livello valido per la missione se possibile"""
+        if not mission.valid_levels:
+            return None
             
         # Se non ci sono livelli validi, la missione può procedere senza un livello specifico
+        if game_state.intel is self._intel:
+            return self._eligible[mission.catalog_index].choice()
+            
+        valid_levels = self.get_valid_levels(mission, game_state)
         if not valid_levels:
             return None
             
@@ -166,12 +453,9 @@ class MissionManager:
             return True, ""
             
         # Verifica missioni completate richieste
-        if "completed_missions" in mission.prerequisites:
-            for required_mission_id in mission.prerequisites["completed_missions"]:
-                completed = any(m.id == required_mission_id and m.completed 
-                              for m in self.missions)
-                if not completed:
-                    return False, f"Richiede il completamento della missione: {required_mission_id}"
+        for required_mission_id, indices in self.graph.requirements[mission.catalog_index]:
+            if not any(self.missions[index].completed for index in indices):
+                return False, f"Richiede il completamento della missione: {required_mission_id}"
         
         # Verifica prestigio minimo
         if "min_prestige" in mission.prerequisites:
@@ -180,25 +464,30 @@ class MissionManager:
                 
         # Verifica intel totale minimo
         if "min_intel_total" in mission.prerequisites:
-            total_intel = sum(level.intel_points for level in game_state.intel.levels_intel.values())
-            if total_intel < mission.prerequisites["min_intel_total"]:
+            if self.counters.total_intel < mission.prerequisites["min_intel_total"]:
                 return False, f"Richiede punti intel totali: {mission.prerequisites['min_intel_total']}"
                 
         # Verifica corruzione minima se presente
         if "min_corruption" in mission.prerequisites:
-            if not hasattr(game_state.stats, "corruption") or \
-               game_state.stats.corruption < mission.prerequisites["min_corruption"]:
+            if game_state.stats.corruption_level < mission.prerequisites["min_corruption"]:
                 return False, f"Richiede corruzione minima: {mission.prerequisites['min_corruption']}"
                 
         # Verifica agenti persi se richiesto
         if "lost_agents" in mission.prerequisites:
-            if not hasattr(game_state.stats, "lost_agents") or \
-               game_state.stats.lost_agents < mission.prerequisites["lost_agents"]:
+            if self.counters.lost_agents < mission.prerequisites["lost_agents"]:
                 return False, f"Richiede {mission.prerequisites['lost_agents']} agenti persi"
                 
         return True, ""
 
-    def start_mission(self, mission_number: int, agent_id: str, game_state) -> Dict:
+    def start_mission(self, mission_number: int, agent_id: str | Sequence[str], game_state,
+                      level_id: str = None) -> Dict:
+        """Avvia una missione giornaliera con l'agente o la squadra indicati
+        
+        Args:
+            agent_id: Id di un agente, oppure sequenza di id per una squadra
+                (da MIN_SQUAD a MAX_SQUAD agenti)
+            level_id: Livello in cui svolgerla; se None viene scelto a caso tra quelli validi
+        """
         if not 1 <= mission_number <= len(self.daily_missions):
             return {"success": False, "message": "Numero missione non valido"}
             
@@ -209,6 +498,20 @@ class MissionManager:
         if not prerequisites_met:
             return {"success": False, "message": f"Prerequisiti non soddisfatti: {error_message}"}
             
+        if level_id is not None and level_id not in self.get_valid_levels(mission, game_state):
+            return {"success": False, "message": "Livello non valido per questa missione"}
+            
+        # Verifica agenti, prima di togliere la missione da quelle offerte
+        agent_ids = (agent_id,) if isinstance(agent_id, str) else tuple(agent_id)
+        if len(agent_ids) != 1 and not MIN_SQUAD <= len(agent_ids) <= MAX_SQUAD:
+            return {"success": False,
+                    "message": f"Una squadra deve avere da {MIN_SQUAD} a {MAX_SQUAD} agenti"}
+        if len(set(agent_ids)) != len(agent_ids):
+            return {"success": False, "message": "Agente ripetuto nella squadra"}
+        agents = [game_state.personnel.get_agent(member) for member in agent_ids]
+        if any(not agent or agent.state != AgentStatus.AVAILABLE for agent in agents):
+            return {"success": False, "message": "Agente non disponibile"}
+            
         # Rimuove la missione dalle missioni giornaliere
         if mission in self.daily_missions:
             self.daily_missions.remove(mission)
@@ -216,13 +519,8 @@ class MissionManager:
             if not self.daily_missions:
                 self.generate_daily_missions(force=True)
             
-        # Verifica agente
-        agent = game_state.personnel.get_agent(agent_id)
-        if not agent or agent.status != "disponibile":
-            return {"success": False, "message": "Agente non disponibile"}
-            
         # Seleziona un livello valido se possibile
-        selected_level = self.select_valid_level(mission, game_state)
+        selected_level = level_id or self.select_valid_level(mission, game_state)
         level_difficulty = 1
         
         # Se c'è un livello selezionato, ottieni le sue informazioni
@@ -231,22 +529,27 @@ class MissionManager:
             if level_info:
                 level_difficulty = level_info.get("difficulty", 1)
                 
-        # Assegna agente alla missione
-        game_state.personnel.assign_mission(agent_id, mission.title)
+        # Assegna gli agenti alla missione
+        for member in agent_ids:
+            game_state.personnel.assign_mission(member, mission)
         
-        # Calcola ricompense basate sulla difficoltà (se c'è un livello) o usa valori base
-        mission.adjusted_rewards = mission.calculate_rewards(level_difficulty)
+        # Calcola ricompense basate sulla difficoltà (se c'è un livello) o usa valori base;
+        # una squadra modifica rischio e ricompense (vedi squads.py)
+        mission.risk_factor, reward_multiplier = agent_factors(agents)
+        mission.adjusted_rewards = scale_rewards(mission.calculate_rewards(level_difficulty),
+                                                 reward_multiplier)
         
-        mission.assigned_agent = agent_id
+        mission.assigned_agents = agent_ids
         mission.selected_level = selected_level
-        self.active_missions.append(mission)
+        self.set_active_missions(self.active_missions + [mission])
         
         # Prepara il messaggio di successo appropriato
+        names = ", ".join(agent.name for agent in agents)
         if selected_level and 'level_info' in locals():
-            success_message = f"Missione avviata con {agent.name} nel {level_info['name']}"
+            success_message = f"Missione avviata con {names} nel {level_info['name']}"
             level_name = level_info['name']
         else:
-            success_message = f"Missione avviata con {agent.name}"
+            success_message = f"Missione avviata con {names}"
             level_name = "nessun livello specifico"
 
         return {
@@ -258,23 +561,18 @@ class MissionManager:
         
     def calculate_death_probability(self, mission, agent, level_info):
         """Calcola la probabilità di morte dell'agente durante la missione"""
-        # Aumentata la probabilità base per ogni livello di difficoltà
-        base_probability = level_info.get("difficulty", 1) * 0.05  # 5% per livello di difficoltà
-        
-        # La durata della missione influisce maggiormente
-        mission_modifier = mission.duration * 0.02  # 2% per giorno di missione
-        
-        # L'esperienza aiuta meno a ridurre il rischio
-        experience_modifier = 0.05 - (agent.exp * 0.005)  # -0.5% per livello di esperienza
-        
-        # Aggiungi modificatore basato sul livello di conoscenza del livello
-        intel_level = level_info.get("knowledge_level", 0)
-        intel_modifier = 0.1 - (intel_level * 0.015)  # -1.5% per livello di intel
+        return DeathRiskTable.probability(level_info.get("difficulty", 1), mission.duration,
+                                          agent.exp, level_info.get("knowledge_level", 0))
         
-        final_probability = (base_probability + mission_modifier - experience_modifier + intel_modifier)
-        
-        # Aumentato il range di probabilità
-        return max(0.05, min(0.75, final_probability))  # Limita tra 5% e 75%
+    def get_risk_range(self, mission: Mission, agent, game_state) -> Optional[Tuple[float, float]]:
+        """Rischio giornaliero minimo e massimo dell'agente tra i livelli validi della missione"""
+        risks = [
+            self.death_risk.get(game_state.intel, level_id, mission.duration, agent.exp)
+            for level_id in self.get_valid_levels(mission, game_state)
+        ]
+        if not risks:
+            return None
+        return min(risks), max(risks)
 
     def check_chain_mission_requirements(self, mission: Mission, game_state) -> bool:
         """Verifica se i requisiti per sbloccare la prossima missione della catena sono soddisfatti"""
@@ -294,70 +592,87 @@ class MissionManager:
         if not mission.chain_mission or "next_mission" not in mission.chain_mission:
             return
             
-        next_mission_id = mission.chain_mission["next_mission"]
-        next_mission = next((m for m in self.missions if m.id == next_mission_id), None)
+        successors = self.graph.chain_next[mission.catalog_index]
+        next_mission = self.missions[successors[0]] if successors else None
         
         if next_mission and next_mission not in self.daily_missions:
             self.daily_missions.append(next_mission)
-            print(f"\n[bold green]Nuova missione sbloccata nella catena![/]")
-            print(f"Titolo: {next_mission.title}")
-            print(f"Descrizione: {next_mission.description}")
+            self._log(f"\n[bold green]Nuova missione sbloccata nella catena![/]")
+            self._log(f"Titolo: {next_mission.title}")
+            self._log(f"Descrizione: {next_mission.description}")
             if next_mission.prerequisites:
-                print("\nPrerequisiti:")
+                self._log("\nPrerequisiti:")
                 if "min_prestige" in next_mission.prerequisites:
-                    print(f"- Prestigio minimo richiesto: {next_mission.prerequisites['min_prestige']}")
+                    self._log(f"- Prestigio minimo richiesto: {next_mission.prerequisites['min_prestige']}")
                 if "min_intel_total" in next_mission.prerequisites:
-                    print(f"- Punti intel totali richiesti: {next_mission.prerequisites['min_intel_total']}")
-            print("\nQuesta missione è collegata alla catena di eventi in corso.")
-            print("Completala per svelare ulteriori misteri delle Backrooms.")
+                    self._log(f"- Punti intel totali richiesti: {next_mission.prerequisites['min_intel_total']}")
+            self._log("\nQuesta missione è collegata alla catena di eventi in corso.")
+            self._log("Completala per svelare ulteriori misteri delle Backrooms.")
+
+    def _log(self, message: str = ""):
+        if self.verbose:
+            print(message)
+
+    def _agent_lost(self, mission: Mission, agent, game_state):
+        """Morte di un agente in missione: effetti sulla base e sul livello"""
+        level_name = game_state.intel.levels_intel[mission.selected_level].name
+        self._log(f"\n[ALERT] L'agente {agent.name} è morto durante la missione '{mission.title}'")
+        self._log(f"Causa: Incidente fatale nel {level_name}")
+        
+        # Rimuovi l'agente
+        game_state.personnel.remove_agent(agent.id)
+        
+        # Impatto grave sul morale
+        morale_loss = 30 + (agent.level * 5)  # Più l'agente era esperto, più grave è la perdita
+        game_state.stats.adjust("morale", -morale_loss)
+        self._log(f"Il morale della base è crollato di {morale_loss} punti")
+        
+        # Perdita di prestigio
+        prestige_loss = 10 + (agent.level * 2)
+        game_state.stats.adjust("prestige", -prestige_loss)
+        self._log(f"Il prestigio della base è diminuito di {prestige_loss} punti")
+        
+        # Perdita di risorse per le operazioni di recupero
+        recovery_resources = {
+            "almond_water": 5 + mission.duration,
+            "med_supplies": 3 + mission.duration,
+            "supplies": 5 + mission.duration
+        }
+        for resource, amount in recovery_resources.items():
+            game_state.resources.modify(resource, -amount)
+            self._log(f"Persi {amount} {resource} nelle operazioni di recupero")
+            
+        # La morte di un agente può destabilizzare il livello
+        if random.random() < 0.3:  # 30% di chance
+            intel_loss = random.randint(10, 25)
+            game_state.intel.spend_intel(mission.selected_level, intel_loss)
+            self._log(f"La morte dell'agente ha destabilizzato il livello, persi {intel_loss} punti intel")
 
     def update_missions(self, game_state):
         completed = []
         for mission in self.active_missions:
             mission.days_left -= 1
             
-            # Controlla la possibilità di morte dell'agente ogni giorno
-            if mission.assigned_agent:
-                agent = game_state.personnel.get_agent(mission.assigned_agent)
-                level_info = game_state.intel.get_level_info(mission.selected_level)
-                
-                if agent and level_info:
-                    death_probability = self.calculate_death_probability(mission, agent, level_info)
-                    if random.random() < death_probability:
-                        # Effetti più severi per la morte di un agente
-                        print(f"\n[ALERT] L'agente {agent.name} è morto durante la missione '{mission.title}'")
-                        print(f"Causa: Incidente fatale nel {level_info['name']}")
-                        
-                        # Rimuovi l'agente
-                        game_state.personnel.remove_agent(mission.assigned_agent)
-                        
-                        # Impatto grave sul morale
-                        morale_loss = 30 + (agent.level * 5)  # Più l'agente era esperto, più grave è la perdita
-                        game_state.stats.morale -= morale_loss
-                        print(f"Il morale della base è crollato di {morale_loss} punti")
-                        
-                        # Perdita di prestigio
-                        prestige_loss = 10 + (agent.level * 2)
-                        game_state.stats.prestige -= prestige_loss
-                        print(f"Il prestigio della base è diminuito di {prestige_loss} punti")
-                        
-                        # Perdita di risorse per le operazioni di recupero
-                        recovery_resources = {
-                            "almond_water": 5 + mission.duration,
-                            "med_supplies": 3 + mission.duration,
-                            "supplies": 5 + mission.duration
-                        }
-                        for resource, amount in recovery_resources.items():
-                            game_state.resources.modify(resource, -amount)
-                            print(f"Persi {amount} {resource} nelle operazioni di recupero")
-                            
-                        # La morte di un agente può destabilizzare il livello
-                        if random.random() < 0.3:  # 30% di chance
-                            intel_loss = random.randint(10, 25)
-                            game_state.intel.levels_intel[mission.selected_level].intel_points -= intel_loss
-                            print(f"La morte dell'agente ha destabilizzato il livello, persi {intel_loss} punti intel")
+            # Controlla la possibilità di morte di ogni agente ogni giorno
+            if mission.assigned_agents and mission.selected_level:
+                survivors = []
+                for agent_id in mission.assigned_agents:
+                    agent = game_state.personnel.get_agent(agent_id)
+                    death_probability = None
+                    if agent:
+                        death_probability = self.death_risk.get(game_state.intel, mission.selected_level,
+                                                                mission.duration, agent.exp)
+                    if death_probability is not None and random.random() < death_probability * mission.risk_factor:
+                        self._agent_lost(mission, agent, game_state)
+                    else:
+                        survivors.append(agent_id)
                         
+                if len(survivors) < len(mission.assigned_agents):
+                    mission.assigned_agents = tuple(survivors)
+                    if not survivors:
+                        # Missione fallita: nessun agente è sopravvissuto
                         mission.completed = True
+                        self.counters.failed_missions += 1
                         completed.append(mission)
                         continue
             
@@ -366,22 +681,26 @@ class MissionManager:
                 completed.append(mission)
                 
                 # Assegna ricompense
-                if hasattr(mission, 'adjusted_rewards'):
-                    print(f"\nAssegnando ricompense per {mission.title}:")
+                if mission.adjusted_rewards is not None:
+                    self._log(f"\nAssegnando ricompense per {mission.title}:")
                     
                     # Risorse
                     for resource, amount in mission.adjusted_rewards.get("resources", {}).items():
                         success = game_state.resources.modify(resource, amount)
-                        print(f"- Risorsa {resource}: {amount} ({'successo' if success else 'fallito'})")
+                        self._log(f"- Risorsa {resource}: {amount} ({'successo' if success else 'fallito'})")
                     
                     # Statistiche
                     for stat, amount in mission.adjusted_rewards.get("stats", {}).items():
                         if hasattr(game_state.stats, stat):
-                            current = getattr(game_state.stats, stat)
-                            setattr(game_state.stats, stat, current + amount)
-                            print(f"- Statistica {stat}: +{amount} (nuovo valore: {getattr(game_state.stats, stat)})")
+                            game_state.stats.adjust(stat, amount)
+                            self._log(f"- Statistica {stat}: +{amount} (nuovo valore: {getattr(game_state.stats, stat)})")
                         else:
-                            print(f"- Statistica {stat} non trovata")
+                            self._log(f"- Statistica {stat} non trovata")
+                    
+                    # Contatori dei finali (documenti, frammenti, risonanza)
+                    for name, amount in mission.adjusted_rewards.get("counters", {}).items():
+                        self.counters.add(name, amount)
+                        self._log(f"- {name.replace('_', ' ').title()}: +{amount}")
                     
                     # Intel points per il livello specifico
                     if "intel_points" in mission.adjusted_rewards and mission.selected_level:
@@ -391,25 +710,23 @@ class MissionManager:
                             points,
                             f"Missione: {mission.title}"
                         )
-                        print(f"- Intel Points: +{points} per livello {mission.selected_level}")
+                        self._log(f"- Intel Points: +{points} per livello {mission.selected_level}")
                         
                         # Controlla se si può sbloccare la prossima missione della catena
                         if self.check_chain_mission_requirements(mission, game_state):
                             self.unlock_next_chain_mission(mission)
                 
-                # Libera l'agente se è sopravvissuto
-                if mission.assigned_agent:
-                    agent = game_state.personnel.get_agent(mission.assigned_agent)
-                    if agent:
-                        game_state.personnel.free_agent(mission.assigned_agent)
-                        # Aumenta l'esperienza dell'agente
-                        game_state.personnel.increase_agent_experience(mission.assigned_agent, 1)
+                # Libera gli agenti sopravvissuti e aumenta la loro esperienza
+                for agent_id in mission.assigned_agents:
+                    game_state.personnel.free_agent(agent_id)
+                game_state.personnel.gain_exp(mission.assigned_agents, 1)
                 
-                print("\nPremi INVIO per continuare...")
-                input()
-                print("\n")  # Aggiunge solo una riga vuota per separazione
+                if self.verbose:
+                    print("\nPremi INVIO per continuare...")
+                    input()
+                    print("\n")  # Aggiunge solo una riga vuota per separazione
                 
-        self.active_missions = [m for m in self.active_missions if not m.completed]
+        self.set_active_missions([m for m in self.active_missions if not m.completed])
         return completed
         
     def to_dict(self) -> Dict:
@@ -419,7 +736,8 @@ class MissionManager:
                     "id": m.id,
                     "days_left": m.days_left,
                     "completed": m.completed,
-                    "assigned_agent": m.assigned_agent,
+                    "assigned_agents": list(m.assigned_agents),
+                    "risk_factor": m.risk_factor,
                     "selected_level": m.selected_level
                 } for m in self.active_missions
             ],
@@ -429,23 +747,56 @@ class MissionManager:
     def from_dict(self, data: Dict):
         self.active_missions = []
         for mission_data in data["active_missions"]:
-            mission = next((m for m in self.missions if m.id == mission_data["id"]), None)
-            if mission:
+            indices = self.graph.by_id.get(mission_data["id"])
+            if indices:
+                mission = self.missions[indices[0]]
                 mission.days_left = mission_data["days_left"]
                 mission.completed = mission_data["completed"]
-                mission.assigned_agent = mission_data.get("assigned_agent")
+                mission.assigned_agents = tuple(mission_data.get("assigned_agents", ()))
+                mission.risk_factor = mission_data.get("risk_factor", 1.0)
                 mission.selected_level = mission_data.get("selected_level")
                 self.active_missions.append(mission)
+        self._rebuild_generation_index()
         
         # Ripristina le missioni giornaliere
         self.daily_missions = []
         if "daily_missions" in data:
             for mission_id in data["daily_missions"]:
-                mission = next((m for m in self.missions if m.id == mission_id), None)
-                if mission:
-                    self.daily_missions.append(mission)
+                indices = self.graph.by_id.get(mission_id)
+                if indices:
+                    self.daily_missions.append(self.missions[indices[0]])
         if not self.daily_missions:
             self.generate_daily_missions()
                 
+    def snapshot(self) -> tuple:
+        return (
+            tuple(m.get_state() for m in self.missions),
+            tuple(m.catalog_index for m in self.active_missions),
+            tuple(m.catalog_index for m in self.daily_missions)
+        )
+        
+    def restore(self, state: tuple):
+        mission_states, active, daily = state
+        for mission, mission_state in zip(self.missions, mission_states):
+            mission.set_state(mission_state)
+        self.active_missions = [self.missions[i] for i in active]
+        self.daily_missions = [self.missions[i] for i in daily]
+        self._rebuild_generation_index()
+        
+    def fork(self) -> "MissionManager":
+        """Copia con istanze di missione proprie; descrizioni e ricompense restano condivise"""
+        clone = shallow_copy(self)
+        clone.missions = [shallow_copy(m) for m in self.missions]
+        # Da ricollegare al sistema intel della copia (vedi GameState.fork)
+        clone._intel = None
+        clone._eligible = [pool.copy() for pool in self._eligible]
+        # Indici copiati, non ricalcolati: contengono solo indici del catalogo
+        clone._active_indices = set(self._active_indices)
+        clone._frontier = self._frontier.copy()
+        clone._offerable = self._offerable.copy()
+        clone.active_missions = [clone.missions[m.catalog_index] for m in self.active_missions]
+        clone.daily_missions = [clone.missions[m.catalog_index] for m in self.daily_missions]
+        return clone
+                
     def reset(self):
-        self.active_missions = []
+        self.set_active_missions([])
@@ -0,0 +1,116 @@
+from dataclasses import fields
+from operator import attrgetter
+from typing import Any, Callable, Optional
+
+# Chiamato con (oggetto osservato, nome del campo cambiato o ANY_FIELD se più d'uno)
+ChangeListener = Callable[[Any, str], None]
+
+ANY_FIELD = "*"  # Iscrizione a tutti i campi
+
+_UNSET = object()
+
+class Observable:
+    """Versioni per campo e iscrizioni alle modifiche.
+
+    Ogni scrittura che cambia un valore incrementa la versione del campo
+    (e quella complessiva, ANY_FIELD) e avvisa chi si è iscritto al campo
+    o a tutti i campi. Le cache possono così confrontare un intero invece
+    di rileggere e confrontare i valori.
+    """
+    __slots__ = ("_versions", "_listeners")
+
+    def _init_observers(self):
+        object.__setattr__(self, "_versions", {})
+        object.__setattr__(self, "_listeners", {})
+
+    def version(self, name: str = ANY_FIELD) -> int:
+        return self._versions.get(name, 0)
+
+    def subscribe(self, name: str, listener: ChangeListener):
+        self._listeners.setdefault(name, []).append(listener)
+
+    def unsubscribe(self, name: str, listener: ChangeListener):
+        listeners = self._listeners.get(name)
+        if listeners and listener in listeners:
+            listeners.remove(listener)
+
+    def _changed(self, name: str):
+        versions = self._versions
+        versions[name] = versions.get(name, 0) + 1
+        versions[ANY_FIELD] = versions.get(ANY_FIELD, 0) + 1
+        listeners = self._listeners
+        if listeners:
+            for listener in listeners.get(name, ()):
+                listener(self, name)
+            for listener in listeners.get(ANY_FIELD, ()):
+                listener(self, name)
+
+    def _changed_many(self, names):
+        """Come _changed per più campi modificati insieme.
+
+        Chi è iscritto a tutti i campi viene avvisato una volta sola, con
+        ANY_FIELD come nome del campo.
+        """
+        versions = self._versions
+        for name in names:
+            versions[name] = versions.get(name, 0) + 1
+        versions[ANY_FIELD] = versions.get(ANY_FIELD, 0) + 1
+        listeners = self._listeners
+        if listeners:
+            for name in names:
+                for listener in listeners.get(name, ()):
+                    listener(self, name)
+            for listener in listeners.get(ANY_FIELD, ()):
+                listener(self, ANY_FIELD)
+
+class ObservableFields(Observable):
+    """Dataclass osservabile: ogni assegnazione ai campi passa da __setattr__.
+
+    Le classi derivate chiamano _init_observers in __post_init__; le
+    assegnazioni del costruttore non generano notifiche.
+    """
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value):
+        if name in self._observed:
+            previous = getattr(self, name, _UNSET)
+            object.__setattr__(self, name, value)
+            if previous is not _UNSET and previous != value:
+                self._changed(name)
+        else:
+            object.__setattr__(self, name, value)
+
+    def adjust(self, name: str, amount, low: Optional[int] = None, high: Optional[int] = None):
+        """Somma amount al campo limitandolo a [low, high]; restituisce il nuovo valore"""
+        previous = getattr(self, name)
+        value = previous + amount
+        if low is not None and value < low:
+            value = low
+        if high is not None and value > high:
+            value = high
+        if value != previous:
+            # Come __setattr__, senza rileggere il valore precedente
+            object.__setattr__(self, name, value)
+            if name in self._observed:
+                self._changed(name)
+        return value
+
+    def snapshot(self) -> tuple:
+        return self._field_values(self)
+
+    def restore(self, state: tuple):
+        # In place: le iscrizioni restano valide e si avvisa solo dei campi cambiati
+        for name, value in zip(self._field_names, state):
+            setattr(self, name, value)
+
+def observed_fields(cls):
+    """Decoratore per le dataclass osservabili: registra i campi da notificare.
+
+    Nomi e lettura dei campi vengono preparati qui: snapshot e restore
+    non chiamano fields() a ogni copia.
+    """
+    names = tuple(f.name for f in fields(cls))
+    cls._observed = frozenset(names)
+    cls._field_names = names
+    cls._field_values = attrgetter(*names) if len(names) > 1 else (lambda obj: (getattr(obj, names[0]),))
+    return cls
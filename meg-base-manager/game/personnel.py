@@ -1,43 +1,16 @@
-from dataclasses import dataclass
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional
 import random
 import json
-
-@dataclass
-class Agent:
-    id: str
-    name: str
-    role: str
-    level: int = 1
-    exp: int = 0
-    morale: int = 70
-    status: str = "disponibile"
-    
-    # Abilità base
-    combat: int = 1      # Combattimento
-    research: int = 1    # Ricerca
-    survival: int = 1    # Sopravvivenza
-    diplomacy: int = 1   # Diplomazia
-    medical: int = 1     # Medicina
-    
-    def gain_exp(self, amount: int):
-        self.exp += amount
-        # Level up al raggiungimento di 100 exp
-        while self.exp >= 100:
-            self.level_up()
-            self.exp -= 100
-            
-    def level_up(self):
-        self.level += 1
-        # Incrementa casualmente un'abilità
-        abilities = ["combat", "research", "survival", "diplomacy", "medical"]
-        chosen = random.choice(abilities)
-        setattr(self, chosen, getattr(self, chosen) + 1)
+from .counters import GameCounters
+from .roster import ROLES, SKILLS, Agent, AgentStatus, Roster
 
 class Personnel:
     def __init__(self):
-        self.agents: List[Agent] = []
+        self.roster = Roster()
+        self._agents = None  # Viste create su richiesta, vedi agents
         self.max_agents = 10
+        self.next_agent_id = 1  # Numero del prossimo id: mai riusato, anche dopo morti e licenziamenti
+        self.counters = GameCounters()  # Sostituito da quello condiviso di GameState
         self.roles = self.load_roles()
         
         # Lista di nomi per la generazione casuale
@@ -56,10 +29,23 @@ class Personnel:
     def load_roles(self) -> Dict:
         with open("data/roles.json") as f:
             data = json.load(f)
+            for role in data["roles"]:
+                ROLES.register(role["id"], role["name"])
             return {role["id"]: role for role in data["roles"]}
+            
+    @property
+    def agents(self) -> List[Agent]:
+        """Agenti della base come viste sul roster (lista in sola lettura)"""
+        if self._agents is None:
+            self._agents = self.roster.views()
+        return self._agents
+        
+    def _roster_changed(self):
+        self._agents = None
+        self.counters.alive_agents = len(self.roster)
         
     def hire_agent(self, name: str, role_id: str) -> bool:
-        if len(self.agents) >= self.max_agents:
+        if len(self.roster) >= self.max_agents:
             return False
             
         if role_id not in self.roles:
@@ -69,91 +55,139 @@ class Personnel:
         base_stats = role_data["base_stats"]
         
         # Genera statistiche con base dal ruolo più variazione casuale
-        agent = Agent(
-            id=f"agent_{len(self.agents)+1}",
-            name=name,
-            role=role_data["name"],
-            level=1,
-            exp=0,
-            morale=random.randint(60, 100),
-            combat=base_stats["combat"] + random.randint(-1, 1),
-            research=base_stats["research"] + random.randint(-1, 1),
-            survival=base_stats["survival"] + random.randint(-1, 1),
-            diplomacy=base_stats["diplomacy"] + random.randint(-1, 1),
-            medical=base_stats["medical"] + random.randint(-1, 1)
-        )
-        self.agents.append(agent)
+        # (livello, esperienza, morale e abilità nell'ordine delle colonne)
+        morale = random.randint(60, 100)
+        skills = [base_stats[skill] + random.randint(-1, 1) for skill in SKILLS]
+        self.roster.append(f"agent_{self.next_agent_id}", name, ROLES.by_id[role_id],
+                           [1, 0, morale] + skills)
+        self.next_agent_id += 1
+        self._roster_changed()
         return True
         
     def fire_agent(self, agent_id: str) -> bool:
         """Licenzia volontariamente un agente"""
-        agent = self.get_agent(agent_id)
-        if agent:
-            self.agents.remove(agent)
+        row = self.roster.row_of(agent_id)
+        if row is not None:
+            self.roster.remove(row)
+            self._roster_changed()
             return True
         return False
         
     def remove_agent(self, agent_id: str) -> bool:
         """Rimuove un agente (per morte o altre cause forzate)"""
-        return self.fire_agent(agent_id)
+        if self.fire_agent(agent_id):
+            self.counters.lost_agents += 1
+            return True
+        return False
         
     def increase_agent_experience(self, agent_id: str, amount: int = 1) -> bool:
         """Aumenta l'esperienza di un agente"""
-        agent = self.get_agent(agent_id)
-        if agent:
-            agent.gain_exp(amount)
+        row = self.roster.row_of(agent_id)
+        if row is not None:
+            self.roster.add_exp((row,), amount)
             return True
         return False
         
+    def gain_exp(self, agent_ids: Iterable[str], amount: int):
+        """Aggiunge esperienza a più agenti in un solo passaggio sulle colonne"""
+        rows = (self.roster.row_of(agent_id) for agent_id in agent_ids)
+        self.roster.add_exp([row for row in rows if row is not None], amount)
+        
     def free_agent(self, agent_id: str) -> bool:
         """Libera un agente da una missione e lo rende disponibile"""
-        agent = self.get_agent(agent_id)
-        if agent:
-            agent.status = "disponibile"
+        row = self.roster.row_of(agent_id)
+        if row is not None:
+            self.roster.set_status(row, AgentStatus.AVAILABLE)
             return True
         return False
 
     def get_agent(self, agent_id: str) -> Agent:
-        return next((a for a in self.agents if a.id == agent_id), None)
-        
-    def assign_mission(self, agent_id: str, mission: str) -> bool:
-        agent = self.get_agent(agent_id)
-        if agent and agent.status == "disponibile":
-            agent.status = mission
+        row = self.roster.row_of(agent_id)
+        return None if row is None else self.roster.view(row)
+        
+    def count_role(self, role_id: str) -> int:
+        """Numero di agenti con il ruolo indicato (id di roles.json)"""
+        return self.roster.count_role(role_id)
+        
+    def assign_mission(self, agent_id: str, mission) -> bool:
+        """Assegna un agente disponibile all'istanza di missione indicata"""
+        row = self.roster.row_of(agent_id)
+        if row is not None and self.roster.statuses[row] == AgentStatus.AVAILABLE:
+            self.roster.set_status(row, AgentStatus.ON_MISSION, mission)
             return True
         return False
         
+    def link_missions(self, missions: Iterable):
+        """Ricollega gli agenti alle istanze delle missioni attive.
+
+        Serve dopo caricamenti, ripristini e copie della partita, quando
+        il roster conosce solo lo stato degli agenti.
+        """
+        roster = self.roster
+        for mission in missions:
+            if mission.completed:
+                continue  # Completata oggi: gli agenti sono già stati liberati
+            for agent_id in mission.assigned_agents:
+                row = roster.row_of(agent_id)
+                if row is not None:
+                    roster.set_status(row, AgentStatus.ON_MISSION, mission)
+        
+    def query(self, role: Optional[str] = None, status=None, min_skill: Optional[Dict[str, int]] = None,
+              order_by: Optional[str] = None, limit: Optional[int] = None) -> List[Agent]:
+        """Agenti che soddisfano tutti i filtri, calcolati sugli indici del roster.
+
+        Es. i tre medici disponibili di livello più alto con medical >= 4:
+        query(role="medic", status="available", min_skill={"medical": 4},
+        order_by="-level", limit=3)
+
+        Args:
+            role: Id del ruolo (roles.json)
+            status: AgentStatus o il suo nome ("available", "on_mission")
+            min_skill: Valore minimo per abilità (o livello, esperienza, morale)
+            order_by: Colonna di ordinamento, "-colonna" per l'ordine decrescente
+            limit: Numero massimo di agenti restituiti
+        """
+        if isinstance(status, str):
+            try:
+                status = AgentStatus[status.upper()]
+            except KeyError:
+                raise ValueError(f"Stato sconosciuto: {status}") from None
+        rows = self.roster.query(role, status, min_skill, order_by, limit)
+        return self.roster.views(rows)
+        
+    def best_available(self, skill: str, role_id: Optional[str] = None) -> Optional[Agent]:
+        """Agente disponibile con l'abilità più alta (es. il miglior medico: "medical", "medic")"""
+        row = self.roster.best_available(skill, role_id)
+        return None if row is None else self.roster.view(row)
+        
     def daily_update(self):
-        for agent in self.agents:
-            # Update morale
-            if random.random() < 0.1:  # 10% chance
-                change = random.randint(-5, 5)
-                agent.morale = max(0, min(100, agent.morale + change))
-                
-            # Random skill improvement
-            if random.random() < 0.05:  # 5% chance
-                abilities = ["combat", "research", "survival", "diplomacy", "medical"]
-                skill = random.choice(abilities)
-                current_value = getattr(agent, skill)
-                setattr(agent, skill, min(10, current_value + 1))
+        # Update morale: 10% di probabilità per agente
+        self.roster.shift_morale(0.1)
+        # Random skill improvement: 5% di probabilità per agente
+        self.roster.train_skills(0.05)
                 
     def to_dict(self) -> Dict:
         return {
-            "agents": [vars(agent) for agent in self.agents],
-            "max_agents": self.max_agents
+            "agents": [agent.to_dict() for agent in self.agents],
+            "max_agents": self.max_agents,
+            "next_agent_id": self.next_agent_id
         }
         
     def from_dict(self, data: Dict):
         self.max_agents = data["max_agents"]
-        self.agents = [Agent(**agent_data) for agent_data in data["agents"]]
+        self.next_agent_id = data["next_agent_id"]
+        self.roster = Roster()
+        for agent_data in data["agents"]:
+            self.roster.adopt(Agent(**agent_data))
+        self._roster_changed()
         
     def add_random_agent(self) -> bool:
         """Aggiunge un nuovo agente casuale quando si raggiunge un nuovo rank"""
-        if len(self.agents) >= self.max_agents:
+        if len(self.roster) >= self.max_agents:
             return False
             
         # Scegli un nome casuale non utilizzato
-        used_names = {agent.name.split()[0] for agent in self.agents}
+        used_names = {name.split()[0] for name in self.roster.names}
         available_names = [name for name in self.nomi if name not in used_names]
         
         if not available_names:
@@ -172,5 +206,15 @@ class Personnel:
         # Assumi il nuovo agente
         return self.hire_agent(nome_finale, ruolo)
         
+    def snapshot(self) -> tuple:
+        return (self.roster.snapshot(), self.max_agents, self.next_agent_id)
+        
+    def restore(self, state: tuple):
+        roster, self.max_agents, self.next_agent_id = state
+        self.roster = Roster.from_snapshot(roster)
+        self._roster_changed()
+        
     def reset(self):
-        self.agents = []
\ No newline at end of file
+        self.roster = Roster()
+        self.next_agent_id = 1
+        self._roster_changed()
\ No newline at end of file
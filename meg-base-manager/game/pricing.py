@@ -0,0 +1,216 @@
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional
+import random
+
+# Giorni di prezzi conservati per ogni bene e organizzazione
+HISTORY_DAYS = 30
+
+# Scorta di equilibrio di un'organizzazione: i beni rari sono pochi
+EQUILIBRIUM_STOCK = 60
+
+# Risposta dei prezzi a scorte e domanda
+STOCK_ELASTICITY = 0.5   # +50% di prezzo con il magazzino vuoto
+MIN_MULTIPLIER = 0.5
+MAX_MULTIPLIER = 2.0
+
+# Evoluzione giornaliera
+RESTOCK_RATE = 0.2       # Frazione della distanza dall'equilibrio recuperata ogni giorno
+DEMAND_REVERSION = 0.1   # Ritorno della domanda verso 1
+DEMAND_IMPACT = 0.2      # Peso dei volumi scambiati sulla domanda del giorno dopo
+DEMAND_NOISE = 0.03
+
+# Prezzo d'acquisto di un bene con un'organizzazione, senza domanda e offerta
+BasePrice = Callable[[Any, str], float]
+
+class SupplyDemand:
+    """Scorte e domanda di ogni organizzazione per ogni bene.
+
+    Come il Roster, i dati stanno in array piatti: una cella per coppia
+    organizzazione × bene (indice colonna * beni + riga del bene). Le
+    organizzazioni vengono aggiunte alla prima richiesta.
+
+    L'evoluzione giornaliera è pigra: advance sposta solo il giorno e
+    ogni colonna recupera i giorni mancanti quando viene letta o
+    scambiata. Il rumore della domanda ha un generatore proprio per
+    (seme, organizzazione, giorno): il risultato non dipende da quando
+    si leggono le colonne e le letture non consumano il generatore
+    globale della partita.
+
+    I prezzi giornalieri finiscono in un buffer circolare di HISTORY_DAYS
+    giorni per cella: la memoria resta fissa qualunque sia la durata della
+    partita.
+    """
+    def __init__(self, goods: Mapping, base_price: BasePrice, seed: Optional[int] = None):
+        self.goods = tuple(goods)
+        self.good_index = {good_id: i for i, good_id in enumerate(self.goods)}
+        self._trade_goods = tuple(goods.values())
+        self._base_price = base_price
+        self._equilibrium = array("d", (EQUILIBRIUM_STOCK / good.rarity for good in goods.values()))
+        self.organizations: Dict[str, int] = {}
+        self.stock = array("d")
+        self.demand = array("d")
+        self.volume = array("d")  # Acquisti netti della giornata (vendite negative)
+        self.history = array("l")
+        self.synced = array("l")  # Per colonna: giorni già applicati alle celle
+        self.day = 0  # Giorni trascorsi: il prossimo prezzo va nello slot day % HISTORY_DAYS
+        self.seed = random.getrandbits(32) if seed is None else seed
+        self._rows: Dict[int, List[float]] = {}  # Moltiplicatori per colonna aggiornata
+
+    def column(self, organization_id: str) -> int:
+        """Colonna dell'organizzazione, allineata al giorno corrente"""
+        column = self.organizations.get(organization_id)
+        if column is None:
+            # Una colonna nuova parte dall'equilibrio del primo giorno di gioco
+            column = self._add_column(organization_id, 0)
+        if self.synced[column] != self.day:
+            self._sync(organization_id, column)
+        return column
+
+    def _add_column(self, organization_id: str, synced: int) -> int:
+        column = self.organizations[organization_id] = len(self.organizations)
+        self.stock.extend(self._equilibrium)
+        self.demand.extend([1.0] * len(self.goods))
+        self.volume.frombytes(bytes(8 * len(self.goods)))
+        self.history.extend([0] * (len(self.goods) * HISTORY_DAYS))
+        self.synced.append(synced)
+        return column
+
+    def register(self, organization_ids: Iterable[str]):
+        for organization_id in organization_ids:
+            self.column(organization_id)
+
+    def advance(self):
+        """Fine giornata: le colonne si aggiorneranno alla prossima lettura"""
+        self.day += 1
+
+    def _sync(self, organization_id: str, column: int):
+        """Applica alla colonna i giorni trascorsi dall'ultimo aggiornamento"""
+        start = column * len(self.goods)
+        base_prices = [self._base_price(good, organization_id) for good in self._trade_goods]
+        recorded = self.day - HISTORY_DAYS  # I giorni precedenti uscirebbero comunque dallo storico
+        for day in range(self.synced[column], self.day):
+            self._step(start, self._noise(organization_id, day), day if day >= recorded else None, base_prices)
+        self.synced[column] = self.day
+        self._rows.pop(column, None)
+
+    def _noise(self, organization_id: str, day: int) -> random.Random:
+        # Il seme è una stringa: stabile tra processi, a differenza di hash() sugli id
+        return random.Random(f"{self.seed}:{organization_id}:{day}")
+
+    def _step(self, start: int, rng: random.Random, day: Optional[int], base_prices: List[float]):
+        """Un giorno di riassortimento e nuova domanda; con day registra i prezzi di quel giorno"""
+        equilibrium = self._equilibrium
+        stock, demand, volume = self.stock, self.demand, self.volume
+        gauss = rng.gauss
+        for g in range(len(self.goods)):
+            cell = start + g
+            target = equilibrium[g]
+            value = (demand[cell] + DEMAND_REVERSION * (1 - demand[cell])
+                     + DEMAND_IMPACT * volume[cell] / target + gauss(0, DEMAND_NOISE))
+            demand[cell] = min(MAX_MULTIPLIER, max(MIN_MULTIPLIER, value))
+            stock[cell] += RESTOCK_RATE * (target - stock[cell])
+            volume[cell] = 0.0
+        if day is not None:
+            slot = day % HISTORY_DAYS
+            for g, multiplier in enumerate(self._multipliers(start)):
+                self.history[(start + g) * HISTORY_DAYS + slot] = int(base_prices[g] * multiplier)
+
+    def _multipliers(self, start: int) -> List[float]:
+        equilibrium = self._equilibrium
+        stock, demand = self.stock, self.demand
+        row = []
+        for g in range(len(self.goods)):
+            cell = start + g
+            scarcity = (equilibrium[g] - stock[cell]) / equilibrium[g]
+            multiplier = demand[cell] * (1 + STOCK_ELASTICITY * scarcity)
+            row.append(min(MAX_MULTIPLIER, max(MIN_MULTIPLIER, multiplier)))
+        return row
+
+    def multipliers(self, organization_id: str) -> List[float]:
+        """Moltiplicatori di prezzo dei beni per un'organizzazione, nell'ordine di goods.
+
+        La lista resta in cache finché la colonna non cambia: non va modificata.
+        """
+        column = self.column(organization_id)
+        row = self._rows.get(column)
+        if row is None:
+            row = self._rows[column] = self._multipliers(column * len(self.goods))
+        return row
+
+    def record_trade(self, organization_id: str, good_id: str, quantity: int, is_buying: bool):
+        """Comprare dall'organizzazione svuota il suo magazzino, venderle lo riempie"""
+        column = self.column(organization_id)
+        cell = column * len(self.goods) + self.good_index[good_id]
+        amount = quantity if is_buying else -quantity
+        self.stock[cell] = max(0.0, self.stock[cell] - amount)
+        self.volume[cell] += amount
+        self._rows.pop(column, None)
+
+    def price_history(self, organization_id: str, good_id: str) -> List[int]:
+        """Prezzi registrati di un bene, dal più vecchio al più recente"""
+        if organization_id not in self.organizations:
+            return []
+        column = self.column(organization_id)
+        start = (column * len(self.goods) + self.good_index[good_id]) * HISTORY_DAYS
+        slot = self.day % HISTORY_DAYS
+        cells = self.history[start + slot:start + HISTORY_DAYS] + self.history[start:start + slot]
+        # Gli zeri sono giorni precedenti alla prima registrazione dell'organizzazione
+        return [price for price in cells if price]
+
+    def to_dict(self) -> Dict:
+        goods = len(self.goods)
+        self.register(self.organizations)  # Le colonne rimaste indietro si aggiornano
+        return {
+            "day": self.day,
+            "seed": self.seed,
+            "organizations": {
+                org_id: {
+                    good_id: {
+                        "stock": self.stock[column * goods + g],
+                        "demand": self.demand[column * goods + g],
+                        "volume": self.volume[column * goods + g],
+                        "history": self.price_history(org_id, good_id),
+                    }
+                    for g, good_id in enumerate(self.goods)
+                }
+                for org_id, column in self.organizations.items()
+            }
+        }
+
+    def from_dict(self, data: Dict):
+        self.day = data.get("day", 0)
+        self.seed = data["seed"]
+        goods = len(self.goods)
+        for org_id, cells in data.get("organizations", {}).items():
+            column = self._add_column(org_id, self.day)  # Il salvataggio è aggiornato al suo giorno
+            for good_id, cell_data in cells.items():
+                g = self.good_index.get(good_id)
+                if g is None:
+                    continue
+                cell = column * goods + g
+                self.stock[cell] = cell_data["stock"]
+                self.demand[cell] = cell_data["demand"]
+                self.volume[cell] = cell_data["volume"]
+                # I prezzi salvati occupano gli slot dei giorni precedenti a day
+                recorded = cell_data["history"][-HISTORY_DAYS:]
+                start = cell * HISTORY_DAYS
+                for i, price in enumerate(recorded):
+                    day = self.day - len(recorded) + i
+                    self.history[start + day % HISTORY_DAYS] = price
+
+    def snapshot(self) -> tuple:
+        # Colonne allineate: una lettura dei prezzi non cambia lo snapshot
+        self.register(self.organizations)
+        return (tuple(self.organizations), self.stock.tobytes(), self.demand.tobytes(),
+                self.volume.tobytes(), self.history.tobytes(), self.synced.tobytes(), self.day,
+                self.seed)
+
+    def restore(self, state: tuple):
+        organizations, stock, demand, volume, history, synced, self.day, self.seed = state
+        self.organizations = {org_id: column for column, org_id in enumerate(organizations)}
+        self.stock = array("d", stock)
+        self.demand = array("d", demand)
+        self.volume = array("d", volume)
+        self.history = array("l", history)
+        self.synced = array("l", synced)
+        self._rows = {}
@@ -1,62 +1,237 @@
-from typing import Dict
+from array import array
+from typing import Dict, Iterator, List, Mapping
+from .observable import Observable
+from .snapshots import shallow_copy
 
-class Resources:
+class ResourceRegistry:
+    """Nomi delle risorse e loro posizione fissa negli array di Resources.
+
+    Gli indici non cambiano mai: vettori di produzione, effetti e
+    consumi possono essere calcolati una volta e riusati su qualunque
+    partita (anche copie e simulazioni).
+    """
+
+    def __init__(self, names):
+        self.names: List[str] = []
+        self.index: Dict[str, int] = {}
+        for name in names:
+            self.register(name)
+
+    def register(self, name: str) -> int:
+        if name not in self.index:
+            self.index[name] = len(self.names)
+            self.names.append(name)
+        return self.index[name]
+
+    def vector(self, amounts: Mapping[str, float]) -> array:
+        """Vettore nell'ordine del registro; i nomi che non sono risorse vengono ignorati"""
+        vector = array("d", bytes(8 * len(self.names)))
+        for name, amount in amounts.items():
+            i = self.index.get(name)
+            if i is not None:
+                vector[i] += amount
+        return vector
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name) -> bool:
+        return name in self.index
+
+RESOURCES = ResourceRegistry(("almond_water", "food", "medical", "fuel", "supplies"))
+
+def _as_number(value: float):
+    # Gli array tengono float: le quantità intere tornano int per UI e salvataggi
+    return int(value) if value.is_integer() else value
+
+class ResourceView(Mapping):
+    """Vista in sola lettura nome -> quantità su un array di Resources"""
+
+    def __init__(self, values: array):
+        self._values = values
+
+    def __getitem__(self, name: str):
+        i = RESOURCES.index[name]
+        return _as_number(self._values[i]) if i < len(self._values) else 0
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(RESOURCES.names)
+
+    def __len__(self) -> int:
+        return len(RESOURCES)
+
+    def __contains__(self, name) -> bool:
+        return name in RESOURCES.index
+
+    # Iterazione diretta sull'array, senza passare da __getitem__ per ogni nome
+    def values(self) -> List:
+        return [_as_number(value) for value in self._values]
+
+    def items(self) -> List:
+        return list(zip(RESOURCES.names, self.values()))
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+class Resources(Observable):
+    """Scorte della base.
+
+    Quantità e consumi stanno in array allineati al registro RESOURCES,
+    così consumo giornaliero, produzione ed effetti in blocco sono una
+    sola operazione sul vettore (apply_deltas). Le quantità si leggono da
+    resources (vista in sola lettura) o con get, e si modificano solo con
+    modify o apply_deltas: ogni risorsa ha una propria versione e i
+    sottosistemi possono iscriversi alle sue modifiche.
+    """
     def __init__(self):
-        self.resources = {
+        self._init_observers()
+        self._amounts = RESOURCES.vector({
             "almond_water": 100,  # Acqua di mandorle
             "food": 100,         # Cibo
             "medical": 50,       # Forniture mediche
             "fuel": 75,          # Carburante
             "supplies": 50       # Rifornimenti generici
-        }
-        self.consumption_rates = {
+        })
+        self._set_rates({
             "almond_water": 2,
             "food": 3,
             "medical": 1,
             "fuel": 2,
             "supplies": 1
-        }
-        
+        })
+
+    @property
+    def resources(self) -> Mapping[str, float]:
+        if len(self._amounts) < len(RESOURCES.names):
+            self._fit()
+        return ResourceView(self._amounts)
+
+    @property
+    def consumption_rates(self) -> Mapping[str, float]:
+        if len(self._rates) < len(RESOURCES.names):
+            self._fit()
+        return ResourceView(self._rates)
+
+    def _set_rates(self, rates: Mapping[str, float]):
+        self._rates = RESOURCES.vector(rates)
+        self._consumption = array("d", (-rate for rate in self._rates))
+
+    def _fit(self):
+        """Allinea gli array al registro se nel frattempo sono state registrate altre risorse"""
+        missing = len(RESOURCES) - len(self._amounts)
+        if missing > 0:
+            padding = bytes(8 * missing)
+            self._amounts.frombytes(padding)
+            self._rates.frombytes(padding)
+            self._consumption.frombytes(padding)
+
     def get(self, resource: str, default: int = 0) -> int:
         """
         Ottiene il valore di una risorsa, restituendo il valore di default se non esiste
-        
+
         Args:
             resource: Il nome della risorsa da ottenere
             default: Il valore da restituire se la risorsa non esiste
-            
+
         Returns:
             int: La quantità della risorsa
         """
         if not isinstance(default, int):
             default = 0
-        return self.resources.get(str(resource), default)
-        
+        i = RESOURCES.index.get(str(resource))
+        if i is None:
+            return default
+        if i >= len(self._amounts):
+            return 0
+        value = self._amounts[i]
+        return int(value) if value.is_integer() else value
+
     def modify(self, resource: str, amount: int) -> bool:
-        if resource not in self.resources:
+        i = RESOURCES.index.get(resource)
+        if i is None:
             return False
-            
-        new_value = self.resources[resource] + amount
+        if i >= len(self._amounts):
+            self._fit()
+
+        new_value = self._amounts[i] + amount
         if new_value < 0:
             return False
-            
-        self.resources[resource] = new_value
+
+        if amount:
+            self._amounts[i] = new_value
+            self._changed(resource)
         return True
-        
+
+    def apply_deltas(self, deltas: array) -> int:
+        """Applica un vettore di variazioni allineato al registro.
+
+        Come modify, una risorsa che scenderebbe sotto zero resta invariata.
+        Restituisce il numero di risorse non modificate per questo motivo.
+        """
+        if len(self._amounts) < len(RESOURCES.names):
+            self._fit()
+        amounts, names = self._amounts, RESOURCES.names
+        rejected = 0
+        changed = []
+        for i, delta in enumerate(deltas):
+            if delta:
+                new_value = amounts[i] + delta
+                if new_value < 0:
+                    rejected += 1
+                else:
+                    amounts[i] = new_value
+                    changed.append(names[i])
+        if changed:
+            # Una sola notifica per chi osserva tutte le risorse
+            self._changed_many(changed)
+        return rejected
+
+    def _replace(self, amounts: array):
+        """Sostituisce tutte le scorte avvisando solo delle risorse cambiate"""
+        previous = self._amounts
+        self._amounts = amounts
+        self._fit()
+        changed = [name for i, name in enumerate(RESOURCES.names)
+                   if (previous[i] if i < len(previous) else 0) != amounts[i]]
+        if changed:
+            self._changed_many(changed)
+
     def daily_update(self):
         """Applica il consumo giornaliero delle risorse"""
-        for resource, rate in self.consumption_rates.items():
-            self.modify(resource, -rate)
-            
+        self.apply_deltas(self._consumption)
+
     def to_dict(self) -> Dict:
         return {
-            "resources": self.resources.copy(),
-            "consumption_rates": self.consumption_rates.copy()
+            "resources": dict(self.resources),
+            "consumption_rates": dict(self.consumption_rates)
         }
-        
+
     def from_dict(self, data: Dict):
-        self.resources = data["resources"]
-        self.consumption_rates = data["consumption_rates"]
-        
+        for name in data["resources"]:
+            RESOURCES.register(name)
+        self._set_rates(data["consumption_rates"])
+        self._replace(RESOURCES.vector(data["resources"]))
+
+    def snapshot(self) -> tuple:
+        return (self._amounts[:], self._rates[:])
+
+    def restore(self, state: tuple):
+        amounts, rates = state
+        self._rates = rates[:]
+        self._consumption = array("d", (-rate for rate in rates))
+        self._replace(amounts[:])
+
+    def fork(self) -> "Resources":
+        """Copia per GameState.fork: scorte e iscrizioni proprie"""
+        clone = shallow_copy(self)
+        clone._init_observers()
+        clone._amounts = self._amounts[:]
+        clone._rates = self._rates[:]
+        clone._consumption = self._consumption[:]
+        return clone
+
     def reset(self):
-        self.__init__()
+        defaults = Resources()
+        self._rates = defaults._rates
+        self._consumption = defaults._consumption
+        self._replace(defaults._amounts)
@@ -0,0 +1,633 @@
+from array import array
+from bisect import bisect_left, insort
+from enum import IntEnum
+import heapq
+import math
+import random
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Set
+
+SKILLS = ("combat", "research", "survival", "diplomacy", "medical")
+# Colonne numeriche del roster: livello, esperienza, morale e abilità
+COLUMNS = ("level", "exp", "morale") + SKILLS
+
+STATUS_AVAILABLE = "disponibile"
+STATUS_ON_MISSION = "in missione"  # Etichetta se la missione non è (ancora) collegata
+
+class AgentStatus(IntEnum):
+    """Codici della colonna degli stati del roster"""
+    AVAILABLE = 0
+    ON_MISSION = 1
+
+# Colonne con un indice ordinato: quelle che cambiano di rado
+RANKED = ("level",) + SKILLS
+ANY_ROLE = -1  # Chiave degli indici ordinati che raccoglie tutti i ruoli
+
+class RoleTable:
+    """Codifica numerica dei ruoli, condivisa da tutti i roster.
+
+    Ogni ruolo ha un codice, l'id del catalogo (roles.json) e il nome
+    mostrato. I salvataggi contengono solo il nome: un nome sconosciuto
+    viene registrato usandolo anche come id.
+    """
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self.by_id: Dict[str, int] = {}
+        self.by_name: Dict[str, int] = {}
+
+    def register(self, role_id: str, name: str) -> int:
+        code = self.by_id.get(role_id)
+        if code is None:
+            code = self.by_id[role_id] = len(self.ids)
+            self.ids.append(role_id)
+            self.names.append(name)
+        self.by_name.setdefault(name, code)
+        return code
+
+    def code_for_name(self, name: str) -> int:
+        code = self.by_name.get(name)
+        return self.register(name, name) if code is None else code
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+ROLES = RoleTable()
+
+# Fino a questo numero di righe sampled_rows tira per ogni riga
+SMALL_SAMPLE = 16
+
+def sampled_rows(count: int, probability: float) -> Iterator[int]:
+    """Righe estratte ognuna con la stessa probabilità, in ordine crescente.
+
+    Invece di un tiro per riga si estrae direttamente la distanza dalla
+    prossima riga estratta (distribuzione geometrica): il costo dipende
+    dalle righe estratte, non dalla dimensione del roster.
+    """
+    if probability <= 0:
+        return
+    if count <= SMALL_SAMPLE:
+        # Con poche righe un tiro per riga costa meno dei logaritmi
+        for row in range(count):
+            if random.random() < probability:
+                yield row
+        return
+    log_miss = math.log(1 - probability) if probability < 1 else None
+    row = -1
+    while True:
+        row += 1
+        if log_miss is not None:
+            row += int(math.log(1.0 - random.random()) / log_miss)
+        if row >= count:
+            return
+        yield row
+
+def _column_property(name: str) -> property:
+    def get(self):
+        return self._roster.columns[name][self._row]
+
+    def set(self, value):
+        self._roster.set_value(name, self._row, value)
+
+    return property(get, set)
+
+class Agent:
+    """Vista su una riga di un Roster.
+
+    Un Agent creato direttamente ha un roster privato di una riga; quando
+    entra in una base i valori vengono copiati nel roster della base.
+    Una vista resta valida finché l'agente è nel roster: se viene
+    rimosso, la vista conserva i suoi ultimi valori in un roster proprio.
+    """
+    __slots__ = ("_roster", "_row")
+
+    def __init__(self, id: str, name: str, role: str, level: int = 1, exp: int = 0,
+                 morale: int = 70, status: str = STATUS_AVAILABLE, combat: int = 1,
+                 research: int = 1, survival: int = 1, diplomacy: int = 1, medical: int = 1):
+        # status è l'etichetta dei salvataggi: la missione viene ricollegata
+        # dopo il caricamento (Personnel.link_missions)
+        code = AgentStatus.AVAILABLE if status == STATUS_AVAILABLE else AgentStatus.ON_MISSION
+        roster = Roster()
+        roster.append(id, name, ROLES.code_for_name(role),
+                      (level, exp, morale, combat, research, survival, diplomacy, medical), code)
+        self._roster = roster
+        self._row = 0
+        roster._views[0] = self
+
+    @classmethod
+    def _view(cls, roster: "Roster", row: int) -> "Agent":
+        view = object.__new__(cls)
+        view._roster = roster
+        view._row = row
+        return view
+
+    level = _column_property("level")
+    exp = _column_property("exp")
+    morale = _column_property("morale")
+    combat = _column_property("combat")
+    research = _column_property("research")
+    survival = _column_property("survival")
+    diplomacy = _column_property("diplomacy")
+    medical = _column_property("medical")
+
+    @property
+    def id(self) -> str:
+        return self._roster.ids[self._row]
+
+    @property
+    def name(self) -> str:
+        return self._roster.names[self._row]
+
+    @property
+    def role(self) -> str:
+        """Nome del ruolo mostrato al giocatore"""
+        return ROLES.names[self._roster.roles[self._row]]
+
+    @property
+    def role_id(self) -> str:
+        """Id del ruolo nel catalogo (roles.json)"""
+        return ROLES.ids[self._roster.roles[self._row]]
+
+    @property
+    def state(self) -> AgentStatus:
+        return AgentStatus(self._roster.statuses[self._row])
+
+    @property
+    def mission(self) -> Optional[Any]:
+        """Istanza della missione in corso, None se disponibile"""
+        return self._roster.missions[self._row]
+
+    @property
+    def status(self) -> str:
+        """"disponibile" oppure il titolo della missione in corso"""
+        return self._roster.status_label(self._row)
+
+    def gain_exp(self, amount: int):
+        self._roster.add_exp((self._row,), amount)
+
+    def level_up(self):
+        self._roster.level_up(self._row)
+
+    def to_dict(self) -> Dict:
+        roster, row = self._roster, self._row
+        data = {"id": self.id, "name": self.name, "role": self.role}
+        for name in ("level", "exp", "morale"):
+            data[name] = roster.columns[name][row]
+        data["status"] = self.status
+        for name in SKILLS:
+            data[name] = roster.columns[name][row]
+        return data
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{key}={value!r}" for key, value in self.to_dict().items())
+        return f"Agent({fields})"
+
+_ROW_NUMBERS = array("l")
+
+def _row_numbers(count: int) -> array:
+    """Array 0, 1, 2, ... lungo almeno count, condiviso: da copiare a fette"""
+    if len(_ROW_NUMBERS) < count:
+        _ROW_NUMBERS.extend(range(len(_ROW_NUMBERS), max(count, 2 * len(_ROW_NUMBERS))))
+    return _ROW_NUMBERS
+
+class RosterIndex:
+    """Indici secondari di un Roster.
+
+    available: numeri di serie degli agenti disponibili
+    by_role: codice del ruolo -> numeri di serie
+    ranked: colonna di RANKED -> codice del ruolo (o ANY_ROLE) -> chiavi
+        (valore, -serie) degli agenti disponibili, in ordine crescente
+
+    Gli indici usano il numero di serie (Roster.serials) e non la riga:
+    una rimozione sposta le righe successive ma non le loro chiavi, e
+    l'indice si aggiorna togliendo solo l'agente uscito. A parità di
+    valore vince la serie più bassa (l'agente assunto prima), quindi il
+    migliore è sempre l'ultima chiave della lista.
+    """
+
+    def __init__(self, roster: "Roster"):
+        self.available: Set[int] = set()
+        self.by_role: Dict[int, Set[int]] = {}
+        self.ranked: Dict[str, Dict[int, list]] = {name: {} for name in RANKED}
+        serials = roster.serials
+        available_rows = []
+        for row, code in enumerate(roster.roles):
+            self.by_role.setdefault(code, set()).add(serials[row])
+            if roster.statuses[row] == AgentStatus.AVAILABLE:
+                self.available.add(serials[row])
+                available_rows.append(row)
+        # Costruzione in blocco: un solo ordinamento per lista
+        for name, by_code in self.ranked.items():
+            column = roster.columns[name]
+            for row in available_rows:
+                key = (column[row], -serials[row])
+                by_code.setdefault(ANY_ROLE, []).append(key)
+                by_code.setdefault(roster.roles[row], []).append(key)
+            for keys in by_code.values():
+                keys.sort()
+
+    def add_row(self, roster: "Roster", row: int):
+        self.by_role.setdefault(roster.roles[row], set()).add(roster.serials[row])
+        if roster.statuses[row] == AgentStatus.AVAILABLE:
+            self.enter(roster, row)
+
+    def remove_row(self, roster: "Roster", row: int):
+        """Toglie l'agente della riga, prima che Roster.remove la cancelli"""
+        serial = roster.serials[row]
+        if serial in self.available:
+            self.leave(roster, row)
+        self.by_role[roster.roles[row]].discard(serial)
+
+    def enter(self, roster: "Roster", row: int):
+        """L'agente della riga diventa disponibile"""
+        serial = roster.serials[row]
+        self.available.add(serial)
+        code = roster.roles[row]
+        for name, by_code in self.ranked.items():
+            key = (roster.columns[name][row], -serial)
+            insort(by_code.setdefault(ANY_ROLE, []), key)
+            insort(by_code.setdefault(code, []), key)
+
+    def leave(self, roster: "Roster", row: int):
+        """L'agente della riga non è più disponibile"""
+        serial = roster.serials[row]
+        self.available.discard(serial)
+        code = roster.roles[row]
+        for name, by_code in self.ranked.items():
+            key = (roster.columns[name][row], -serial)
+            self._discard(by_code[ANY_ROLE], key)
+            self._discard(by_code[code], key)
+
+    def value_changed(self, roster: "Roster", row: int, name: str, previous: int):
+        serial = roster.serials[row]
+        if serial not in self.available:
+            return
+        by_code = self.ranked[name]
+        key = (roster.columns[name][row], -serial)
+        for keys in (by_code[ANY_ROLE], by_code[roster.roles[row]]):
+            self._discard(keys, (previous, -serial))
+            insort(keys, key)
+
+    @staticmethod
+    def _discard(keys: list, key: tuple):
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            del keys[i]
+
+    def keys(self, name: str, role_code: int = ANY_ROLE, minimum: Optional[int] = None) -> list:
+        """Chiavi degli agenti disponibili con name almeno pari a minimum"""
+        keys = self.ranked[name].get(role_code, [])
+        if minimum is None:
+            return keys
+        return keys[bisect_left(keys, (minimum, -math.inf)):]
+
+    def best(self, name: str, role_code: int = ANY_ROLE) -> Optional[int]:
+        """Numero di serie del migliore disponibile"""
+        keys = self.ranked[name].get(role_code)
+        return -keys[-1][1] if keys else None
+
+    def at_least(self, name: str, value: int, role_code: int = ANY_ROLE) -> List[int]:
+        """Numeri di serie dei disponibili con name almeno pari a value, dal migliore"""
+        return [-negated for _, negated in reversed(self.keys(name, role_code, value))]
+
+class Roster:
+    """Agenti di una base per colonne (struct of arrays).
+
+    Livello, esperienza, morale e abilità stanno in array di interi, ruolo
+    e stato in array di codici: gli aggiornamenti giornalieri lavorano
+    direttamente sulle colonne e gli oggetti Agent sono solo viste,
+    create quando servono. Il conteggio degli agenti per ruolo è tenuto
+    aggiornato a ogni ingresso e uscita; gli indici secondari (index)
+    vengono costruiti alla prima richiesta e poi aggiornati a ogni
+    modifica, rimozioni comprese.
+
+    Ogni riga ha un numero di serie crescente che non cambia quando le
+    righe precedenti vengono rimosse: indici e id -> agente usano quello,
+    e la riga si ritrova con una ricerca binaria in serials.
+    """
+
+    def __init__(self):
+        self.columns: Dict[str, array] = {name: array("l") for name in COLUMNS}
+        self.roles = array("h")
+        self.statuses = array("b")
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self.missions: List[Optional[Any]] = []  # Istanza della missione in corso
+        self.role_counts: List[int] = []         # Agenti per codice di ruolo
+        self.serials = array("q")                # Crescenti lungo le righe
+        self._next_serial = 0
+        self._views: List[Optional[Agent]] = []
+        self._serial_of: Optional[Dict[str, int]] = None  # id -> serie, costruito alla prima ricerca
+        self._row_lookup: Optional[array] = None  # Vedi rows_at
+        self._repeated_ids = False  # Con id ripetuti una rimozione ricostruisce _serial_of
+        self._index: Optional[RosterIndex] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def index(self) -> RosterIndex:
+        if self._index is None:
+            self._index = RosterIndex(self)
+        return self._index
+
+    def append(self, id: str, name: str, role_code: int, values: Sequence[int],
+               status: AgentStatus = AgentStatus.AVAILABLE, mission: Optional[Any] = None) -> int:
+        """Aggiunge una riga (values nell'ordine di COLUMNS) e ne restituisce l'indice"""
+        for column, value in zip(self.columns.values(), values):
+            column.append(value)
+        self.roles.append(role_code)
+        self.statuses.append(status)
+        self.ids.append(id)
+        self.names.append(name)
+        self.missions.append(mission)
+        self.serials.append(self._next_serial)
+        self._next_serial += 1
+        self._views.append(None)
+        self._count_role(role_code, 1)
+        row = len(self.ids) - 1
+        lookup = self._row_lookup
+        if lookup is not None:
+            if len(lookup) == self.serials[row] - self.serials[0]:
+                lookup.append(row)  # La nuova serie segue l'ultima
+            else:
+                self._row_lookup = None
+        if self._serial_of is not None:
+            self._remember_id(id, self.serials[row])
+        if self._index is not None:
+            self._index.add_row(self, row)
+        return row
+
+    def adopt(self, agent: Agent) -> int:
+        """Copia nel roster un agente creato altrove"""
+        source, row = agent._roster, agent._row
+        return self.append(source.ids[row], source.names[row], source.roles[row],
+                           [column[row] for column in source.columns.values()],
+                           source.statuses[row], source.missions[row])
+
+    def remove(self, row: int):
+        """Rimuove una riga mantenendo l'ordine; la vista dell'agente rimosso si stacca"""
+        view = self._views[row]
+        if view is not None:
+            detached = Roster()
+            detached.adopt(view)
+            view._roster, view._row = detached, 0
+            detached._views[0] = view
+        self._count_role(self.roles[row], -1)
+        if self._index is not None:
+            self._index.remove_row(self, row)
+        if self._serial_of is not None:
+            if self._repeated_ids:
+                self._serial_of = None  # Un altro agente con lo stesso id può prendere il posto
+            elif self._serial_of.get(self.ids[row]) == self.serials[row]:
+                del self._serial_of[self.ids[row]]
+        for column in self.columns.values():
+            del column[row]
+        del self.roles[row]
+        del self.statuses[row]
+        del self.ids[row]
+        del self.names[row]
+        del self.missions[row]
+        del self.serials[row]
+        self._row_lookup = None
+        del self._views[row]
+        for view in self._views[row:]:
+            if view is not None:
+                view._row -= 1
+
+    def _count_role(self, code: int, delta: int):
+        if code >= len(self.role_counts):
+            self.role_counts.extend([0] * (code + 1 - len(self.role_counts)))
+        self.role_counts[code] += delta
+
+    def _remember_id(self, id: str, serial: int):
+        # Con id ripetuti vale la prima riga, come una ricerca lineare
+        if self._serial_of.setdefault(id, serial) != serial:
+            self._repeated_ids = True
+
+    def row_of(self, agent_id: str) -> Optional[int]:
+        if self._serial_of is None:
+            self._serial_of = {}
+            self._repeated_ids = False
+            for id, serial in zip(self.ids, self.serials):
+                self._remember_id(id, serial)
+        serial = self._serial_of.get(agent_id)
+        return None if serial is None else self.row_at(serial)
+
+    def row_at(self, serial: int) -> int:
+        """Riga del numero di serie (che deve essere nel roster)"""
+        serials = self.serials
+        # Senza rimozioni prima di questa riga la serie è consecutiva alla prima
+        row = serial - serials[0]
+        if row < len(serials) and serials[row] == serial:
+            return row
+        return bisect_left(serials, serial)
+
+    def rows_at(self, serials: Iterable[int]) -> List[int]:
+        """row_at per molti numeri di serie"""
+        table = self.serials
+        if not table:
+            return []
+        first = table[0]
+        if table[-1] - first == len(table) - 1:
+            return [serial - first for serial in serials]  # Nessuna rimozione in mezzo
+        lookup = self._row_lookup
+        if lookup is None:
+            # Tabella serie -> riga, valida fino alla prossima rimozione. Si
+            # riempie per tratti senza buchi, trovati dividendo a metà:
+            # con poche rimozioni il costo è quello di qualche copia
+            lookup = self._row_lookup = array("l", [0]) * (table[-1] - first + 1)
+            rows = _row_numbers(len(table))
+            spans = [(0, len(table) - 1)]
+            while spans:
+                low, high = spans.pop()
+                if table[high] - table[low] == high - low:
+                    start = table[low] - first
+                    lookup[start:start + high - low + 1] = rows[low:high + 1]
+                else:
+                    middle = (low + high) // 2
+                    spans += ((low, middle), (middle + 1, high))
+        return [lookup[serial - first] for serial in serials]
+
+    def view(self, row: int) -> Agent:
+        view = self._views[row]
+        if view is None:
+            view = self._views[row] = Agent._view(self, row)
+        return view
+
+    def views(self, rows: Optional[Iterable[int]] = None) -> List[Agent]:
+        if rows is None:
+            rows = range(len(self.ids))
+        return [self.view(row) for row in rows]
+
+    def set_value(self, name: str, row: int, value: int):
+        column = self.columns[name]
+        previous = column[row]
+        column[row] = value
+        if self._index is not None and name in RANKED and previous != value:
+            self._index.value_changed(self, row, name, previous)
+
+    def status_label(self, row: int) -> str:
+        if self.statuses[row] == AgentStatus.AVAILABLE:
+            return STATUS_AVAILABLE
+        mission = self.missions[row]
+        return STATUS_ON_MISSION if mission is None else mission.title
+
+    def set_status(self, row: int, status: AgentStatus, mission: Optional[Any] = None):
+        previous = self.statuses[row]
+        self.statuses[row] = status
+        self.missions[row] = mission if status != AgentStatus.AVAILABLE else None
+        if self._index is not None and previous != status:
+            if status == AgentStatus.AVAILABLE:
+                self._index.enter(self, row)
+            elif previous == AgentStatus.AVAILABLE:
+                self._index.leave(self, row)
+
+    def count_role(self, role_id: str) -> int:
+        code = ROLES.by_id.get(role_id)
+        if code is None or code >= len(self.role_counts):
+            return 0
+        return self.role_counts[code]
+
+    def query(self, role_id: Optional[str] = None, status: Optional[AgentStatus] = None,
+              minimums: Optional[Mapping[str, int]] = None, order_by: Optional[str] = None,
+              limit: Optional[int] = None) -> List[int]:
+        """Righe che soddisfano tutti i filtri.
+
+        minimums: colonna -> valore minimo. order_by è una colonna, con "-"
+        davanti per l'ordine decrescente; senza order_by le righe restano
+        nell'ordine del roster.
+
+        Per gli agenti disponibili i candidati vengono dagli indici
+        ordinati: con un limite e un ordine decrescente su una colonna di
+        RANKED l'indice si scorre dal migliore fermandosi a limit righe,
+        altrimenti si parte dalla soglia minima più selettiva.
+        """
+        if limit is not None and limit <= 0:
+            return []
+        minimums = dict(minimums or {})
+        descending = bool(order_by) and order_by.startswith("-")
+        order_column = order_by.lstrip("-") if order_by else None
+        for name in list(minimums) + [order_column]:
+            if name is not None and name not in self.columns:
+                raise ValueError(f"Colonna sconosciuta: {name}")
+        code = ANY_ROLE
+        if role_id is not None:
+            code = ROLES.by_id.get(role_id)
+            if code is None:
+                return []
+        columns = self.columns
+
+        if status == AgentStatus.AVAILABLE:
+            index = self.index
+            if descending and limit is not None and order_column in RANKED:
+                keys = index.keys(order_column, code, minimums.pop(order_column, None))
+                checks = [(columns[name], value) for name, value in minimums.items()]
+                rows = []
+                for _, negated in reversed(keys):
+                    row = self.row_at(-negated)
+                    for column, value in checks:
+                        if column[row] < value:
+                            break
+                    else:
+                        rows.append(row)
+                        if len(rows) == limit:
+                            break
+                return rows
+            selective = None
+            for name, value in minimums.items():
+                if name in RANKED:
+                    keys = index.keys(name, code, value)
+                    if selective is None or len(keys) < len(selective[1]):
+                        selective = (name, keys)
+            if selective is not None:
+                del minimums[selective[0]]
+                candidates = self.rows_at(-negated for _, negated in selective[1])
+            elif code == ANY_ROLE:
+                candidates = self.rows_at(index.available)
+            else:
+                candidates = self.rows_at(-negated for _, negated in index.keys(RANKED[0], code))
+        else:
+            if code == ANY_ROLE:
+                candidates = range(len(self.ids))
+            else:
+                candidates = self.rows_at(self.index.by_role.get(code, ()))
+            if status is not None:
+                statuses = self.statuses
+                candidates = [row for row in candidates if statuses[row] == status]
+
+        for name, value in minimums.items():
+            column = columns[name]
+            candidates = [row for row in candidates if column[row] >= value]
+        if order_column is None:
+            return sorted(candidates) if limit is None else heapq.nsmallest(limit, candidates)
+        column = columns[order_column]
+        if descending:
+            key = lambda row: (-column[row], row)
+        else:
+            key = lambda row: (column[row], row)
+        if limit is None:
+            return sorted(candidates, key=key)
+        return heapq.nsmallest(limit, candidates, key=key)
+
+    def best_available(self, skill: str, role_id: Optional[str] = None) -> Optional[int]:
+        """Riga dell'agente disponibile con l'abilità più alta, eventualmente per ruolo"""
+        code = ANY_ROLE if role_id is None else ROLES.by_id.get(role_id)
+        serial = None if code is None else self.index.best(skill, code)
+        return None if serial is None else self.row_at(serial)
+
+    def shift_morale(self, probability: float, low: int = -5, high: int = 5):
+        """Variazione casuale del morale per le righe estratte con la probabilità data"""
+        morale = self.columns["morale"]
+        for row in sampled_rows(len(self.ids), probability):
+            morale[row] = max(0, min(100, morale[row] + random.randint(low, high)))
+
+    def train_skills(self, probability: float, cap: int = 10):
+        """+1 a un'abilità casuale per le righe estratte con la probabilità data"""
+        columns = self.columns
+        for row in sampled_rows(len(self.ids), probability):
+            skill = random.choice(SKILLS)
+            value = columns[skill][row]
+            if value < cap:
+                self.set_value(skill, row, value + 1)
+
+    def add_exp(self, rows: Iterable[int], amount: int):
+        """Aggiunge esperienza alle righe indicate; ogni 100 punti un livello"""
+        exp = self.columns["exp"]
+        for row in rows:
+            total = exp[row] + amount
+            if total >= 100:
+                levels, total = divmod(total, 100)
+                for _ in range(levels):
+                    self.level_up(row)
+            exp[row] = total
+
+    def level_up(self, row: int):
+        self.set_value("level", row, self.columns["level"][row] + 1)
+        # Incrementa casualmente un'abilità
+        skill = random.choice(SKILLS)
+        self.set_value(skill, row, self.columns[skill][row] + 1)
+
+    def snapshot(self) -> tuple:
+        # Le missioni non entrano nello snapshot: sono istanze della partita
+        # di origine e vengono ricollegate da Personnel.link_missions
+        return (tuple(column[:] for column in self.columns.values()), self.roles[:],
+                self.statuses[:], tuple(self.ids), tuple(self.names))
+
+    @classmethod
+    def from_snapshot(cls, state: tuple) -> "Roster":
+        """Roster nuovo dallo snapshot: le viste del roster precedente restano sul vecchio stato"""
+        columns, roles, statuses, ids, names = state
+        roster = cls()
+        roster.columns = {name: column[:] for name, column in zip(COLUMNS, columns)}
+        roster.roles = roles[:]
+        roster.statuses = statuses[:]
+        roster.ids = list(ids)
+        roster.names = list(names)
+        roster.missions = [None] * len(ids)
+        roster.serials = array("q", range(len(ids)))
+        roster._next_serial = len(ids)
+        roster._views = [None] * len(ids)
+        for code in roles:
+            roster._count_role(code, 1)
+        return roster
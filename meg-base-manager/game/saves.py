@@ -1,23 +1,234 @@
 import os
 import json
-from typing import List
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
 from pathlib import Path
 
-class SaveManager:
-    def __init__(self):
-        self.saves_dir = Path("saves")
+class SaveStore:
+    """Interfaccia comune dei backend dei salvataggi: slot per nome, dati come dizionari"""
+
+    def get_saves(self) -> List[str]:
+        raise NotImplementedError
+
+    def save_exists(self, name: str) -> bool:
+        raise NotImplementedError
+
+    def delete_save(self, name: str) -> bool:
+        raise NotImplementedError
+
+    def write_save(self, name: str, data: Dict) -> str:
+        """Scrive lo slot e restituisce dove è finito (da mostrare al giocatore)"""
+        raise NotImplementedError
+
+    def read_save(self, name: str) -> Dict:
+        """Legge uno slot; solleva FileNotFoundError se non esiste"""
+        raise NotImplementedError
+
+
+class SaveManager(SaveStore):
+    """Salvataggi come file JSON sparsi nella cartella saves/"""
+
+    def __init__(self, saves_dir: str = "saves"):
+        self.saves_dir = Path(saves_dir)
         self.saves_dir.mkdir(exist_ok=True)
-        
+
     def get_saves(self) -> List[str]:
         """Returns list of save file names without extension"""
         return [f.stem for f in self.saves_dir.glob("*.json")]
-        
+
     def save_exists(self, name: str) -> bool:
         return (self.saves_dir / f"{name}.json").exists()
-        
+
     def delete_save(self, name: str) -> bool:
         try:
             (self.saves_dir / f"{name}.json").unlink()
             return True
         except FileNotFoundError:
             return False
+
+    def write_save(self, name: str, data: Dict) -> str:
+        """Scrive il salvataggio in modo atomico e restituisce il percorso"""
+        save_path = self.saves_dir / f"{name}.json"
+        # Scrittura su file temporaneo + rename: un lettore concorrente
+        # vede sempre il vecchio file o quello nuovo, mai uno a metà
+        tmp_path = self.saves_dir / f".{name}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, save_path)
+        return str(save_path)
+
+    def read_save(self, name: str) -> Dict:
+        """Legge un salvataggio; solleva FileNotFoundError se non esiste"""
+        save_path = self.saves_dir / f"{name}.json"
+        if not save_path.exists():
+            raise FileNotFoundError(f"File di salvataggio non trovato: {save_path}")
+        with open(save_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+class SQLiteSaveManager(SaveStore):
+    """Salvataggi in un unico database SQLite (modalità WAL).
+
+    Una riga per slot: le sezioni dei sottosistemi sono salvate come blob
+    JSON separati, mentre versione, giorno, prestigio, morale e data di
+    modifica sono colonne indicizzate per elencare gli slot senza
+    decodificare i blob.
+    """
+
+    SECTIONS = ("stats", "resources", "personnel", "missions", "intel",
+                "defense", "diplomacy", "market", "counters", "endings")
+
+    def __init__(self, db_path: str = "saves/saves.db", timeout: float = 30.0):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.timeout = timeout
+        with self._connect() as conn:
+            # WAL: i lettori non bloccano lo scrittore e viceversa
+            conn.execute("PRAGMA journal_mode=WAL")
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS saves ("
+                "name TEXT PRIMARY KEY, "
+                "version INTEGER NOT NULL DEFAULT 0, "
+                "day INTEGER NOT NULL DEFAULT 0, "
+                "prestige INTEGER NOT NULL DEFAULT 0, "
+                "morale INTEGER NOT NULL DEFAULT 0, "
+                "updated_at REAL NOT NULL)"
+            )
+            self._ensure_section_columns(conn)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_saves_version ON saves(version)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_saves_updated ON saves(updated_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_saves_day ON saves(day)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_saves_prestige ON saves(prestige)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Una connessione per operazione, chiusa a fine transazione.
+
+        Evita di condividere connessioni tra sessioni o thread diversi;
+        il commit avviene all'uscita dal blocco, il rollback in caso di errore.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout)
+        try:
+            conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _ensure_section_columns(self, conn: sqlite3.Connection):
+        """Aggiunge le colonne blob mancanti (sezioni introdotte dopo la creazione del db)"""
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(saves)")}
+        if "version" not in existing:
+            conn.execute("ALTER TABLE saves ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        for section in self.SECTIONS:
+            if section not in existing:
+                conn.execute(f"ALTER TABLE saves ADD COLUMN {section} BLOB")
+
+    def _encode_row(self, name: str, data: Dict) -> tuple:
+        stats = data.get("stats", {})
+        blobs = tuple(
+            json.dumps(data[section], ensure_ascii=False).encode("utf-8")
+            if section in data else None
+            for section in self.SECTIONS
+        )
+        return (name, data.get("version", 0), stats.get("day", 0),
+                stats.get("prestige", 0), stats.get("morale", 0), time.time()) + blobs
+
+    def _decode_row(self, version: int, row: tuple) -> Dict:
+        data = {
+            section: json.loads(blob)
+            for section, blob in zip(self.SECTIONS, row)
+            if blob is not None
+        }
+        if version:
+            data["version"] = version
+        return data
+
+    def _upsert_sql(self) -> str:
+        columns = ("name", "version", "day", "prestige", "morale", "updated_at") + self.SECTIONS
+        updates = ", ".join(f"{c}=excluded.{c}" for c in columns[1:])
+        return (f"INSERT INTO saves ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * len(columns))}) "
+                f"ON CONFLICT(name) DO UPDATE SET {updates}")
+
+    def get_saves(self) -> List[str]:
+        """Nomi degli slot, dal più recente"""
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute(
+                "SELECT name FROM saves ORDER BY updated_at DESC")]
+
+    def get_saves_info(self) -> List[Dict]:
+        """Metadati degli slot senza leggere i blob delle sezioni"""
+        with self._connect() as conn:
+            return [
+                {"name": name, "version": version, "day": day, "prestige": prestige,
+                 "morale": morale, "updated_at": updated_at}
+                for name, version, day, prestige, morale, updated_at in conn.execute(
+                    "SELECT name, version, day, prestige, morale, updated_at "
+                    "FROM saves ORDER BY updated_at DESC")
+            ]
+
+    def get_saves_below_version(self, version: int) -> List[str]:
+        """Slot salvati con un formato più vecchio di version (usa l'indice)"""
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute(
+                "SELECT name FROM saves WHERE version < ?", (version,))]
+
+    def save_exists(self, name: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM saves WHERE name = ?", (name,)).fetchone() is not None
+
+    def delete_save(self, name: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM saves WHERE name = ?", (name,)).rowcount > 0
+
+    def write_save(self, name: str, data: Dict) -> str:
+        with self._connect() as conn:
+            conn.execute(self._upsert_sql(), self._encode_row(name, data))
+        return f"{self.db_path}:{name}"
+
+    def read_save(self, name: str) -> Dict:
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT version, {', '.join(self.SECTIONS)} FROM saves WHERE name = ?",
+                (name,)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"Salvataggio non trovato: {self.db_path}:{name}")
+        return self._decode_row(row[0], row[1:])
+
+    def import_json_dir(self, saves_dir: str = "saves") -> Dict:
+        """Importa tutti i file JSON di una cartella in un'unica transazione"""
+        rows = []
+        failed = []
+        for path in sorted(Path(saves_dir).glob("*.json")):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    rows.append(self._encode_row(path.stem, json.load(f)))
+            except (OSError, json.JSONDecodeError) as e:
+                failed.append(f"{path.name}: {e}")
+        with self._connect() as conn:
+            conn.executemany(self._upsert_sql(), rows)
+        return {"imported": len(rows), "failed": failed}
+
+    def export_json_dir(self, saves_dir: str = "saves") -> Dict:
+        """Esporta ogni slot come file JSON compatibile con SaveManager"""
+        target = SaveManager(saves_dir)
+        exported = 0
+        with self._connect() as conn:
+            cursor = conn.execute(f"SELECT name, version, {', '.join(self.SECTIONS)} FROM saves")
+            for row in cursor:
+                target.write_save(row[0], self._decode_row(row[1], row[2:]))
+                exported += 1
+        return {"exported": exported}
+
+
+def create_save_manager() -> SaveStore:
+    """Sceglie il backend dei salvataggi (variabile MEG_SAVE_BACKEND: json o sqlite)"""
+    backend = os.environ.get("MEG_SAVE_BACKEND", "json").lower()
+    if backend == "sqlite":
+        return SQLiteSaveManager(os.environ.get("MEG_SAVE_DB", "saves/saves.db"))
+    return SaveManager(os.environ.get("MEG_SAVE_DIR", "saves"))
@@ -0,0 +1,120 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Tuple
+
+_COPIERS: Dict[type, Callable] = {}
+
+def _slot_names(cls) -> Tuple[str, ...]:
+    names = []
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get("__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name not in ("__dict__", "__weakref__"):
+                names.append(name)
+    return tuple(names)
+
+def _make_copier(cls) -> Callable:
+    """Genera la funzione di copia di una classe, come fa dataclasses per __init__.
+
+    Con __slots__ non c'è un __dict__ da copiare in blocco: gli attributi
+    vengono copiati uno per uno con accessi diretti.
+    """
+    lines = ["def copy(obj):", "    clone = new(cls)"]
+    if cls.__dictoffset__:
+        lines.append("    clone.__dict__.update(obj.__dict__)")
+    # __setattr__ personalizzati (frozen, osservabili) non devono scattare sulla copia
+    plain = cls.__setattr__ is object.__setattr__
+    for name in _slot_names(cls):
+        lines.append(f"    clone.{name} = obj.{name}" if plain
+                     else f"    set_attr(clone, {name!r}, obj.{name})")
+    lines.append("    return clone")
+    namespace = {"new": object.__new__, "cls": cls, "set_attr": object.__setattr__}
+    exec("\n".join(lines), namespace)
+    return namespace["copy"]
+
+def _copy_partial(obj):
+    """Copia lenta per gli oggetti con qualche slot mai assegnato"""
+    cls = obj.__class__
+    clone = object.__new__(cls)
+    if cls.__dictoffset__:
+        clone.__dict__.update(obj.__dict__)
+    for name in _slot_names(cls):
+        try:
+            object.__setattr__(clone, name, object.__getattribute__(obj, name))
+        except AttributeError:
+            pass
+    return clone
+
+def shallow_copy(obj):
+    """Copia superficiale più rapida di copy.copy per oggetti semplici.
+
+    Snapshot e fork copiano migliaia di oggetti al secondo: saltare il
+    protocollo di copy (__reduce_ex__) rende la copia diverse volte più veloce.
+    """
+    cls = obj.__class__
+    copier = _COPIERS.get(cls)
+    if copier is None:
+        copier = _COPIERS[cls] = _make_copier(cls)
+    try:
+        return copier(obj)
+    except AttributeError:
+        return _copy_partial(obj)
+
+@dataclass(frozen=True)
+class GameSnapshot:
+    """Copia dello stato mutabile di una partita.
+
+    I cataloghi (eventi, missioni, livelli, strutture, beni) non vengono
+    copiati: i sottosistemi salvano solo ciò che cambia durante il gioco.
+    """
+    stats: tuple
+    current_level: str
+    resources: tuple
+    personnel: tuple
+    events: tuple
+    missions: tuple
+    defense: tuple
+    intel: tuple
+    diplomacy: tuple
+    market: tuple
+    counters: tuple
+    endings: tuple
+
+class UndoHistory:
+    """Pile di annulla/ripeti costruite sugli snapshot della partita"""
+
+    def __init__(self, limit: int = 50):
+        self._undo: Deque[GameSnapshot] = deque(maxlen=limit)
+        self._redo: List[GameSnapshot] = []
+
+    def record(self, before: GameSnapshot, game_state) -> bool:
+        """Registra un'azione se ha modificato lo stato rispetto a before"""
+        if before == game_state.snapshot():
+            return False
+        self._undo.append(before)
+        self._redo.clear()
+        return True
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def undo(self, game_state) -> bool:
+        if not self._undo:
+            return False
+        self._redo.append(game_state.snapshot())
+        game_state.restore(self._undo.pop())
+        return True
+
+    def redo(self, game_state) -> bool:
+        if not self._redo:
+            return False
+        self._undo.append(game_state.snapshot())
+        game_state.restore(self._redo.pop())
+        return True
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
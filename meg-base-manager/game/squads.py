@@ -0,0 +1,64 @@
+from typing import Dict, Iterable, Mapping, Tuple
+
+# Agenti per missione: uno solo oppure una squadra
+MIN_SQUAD = 2
+MAX_SQUAD = 6
+
+# Abilità che proteggono tutta la squadra: conta il valore migliore tra i membri
+PROTECTIVE_SKILLS = ("combat", "survival", "medical")
+SKILL_PROTECTION = 0.02  # Riduzione del rischio per punto di abilità protettiva
+MIN_RISK_FACTOR = 0.4
+
+# Sinergie di ruolo, come DefenseStructure.specialist_bonus: ogni ruolo
+# presente nella squadra (contato una volta) applica il suo moltiplicatore
+RISK_SYNERGY: Dict[str, float] = {
+    "medic": 0.8,
+    "combat_specialist": 0.85,
+    "survivalist": 0.9,
+    "scout": 0.95,
+}
+REWARD_SYNERGY: Dict[str, float] = {
+    "researcher": 1.15,
+    "explorer": 1.1,
+    "diplomat": 1.1,
+    "engineer": 1.1,
+    "scout": 1.05,
+    "psychologist": 1.05,
+}
+
+def squad_factors(role_ids: Iterable[str], best_skills: Mapping[str, int]) -> Tuple[float, float]:
+    """Moltiplicatori di una squadra: (rischio giornaliero, ricompense).
+
+    best_skills contiene, per ogni abilità, il valore migliore tra i membri.
+    """
+    risk = 1 - SKILL_PROTECTION * sum(best_skills.get(skill, 0) for skill in PROTECTIVE_SKILLS)
+    reward = 1.0
+    for role_id in set(role_ids):
+        risk *= RISK_SYNERGY.get(role_id, 1.0)
+        reward *= REWARD_SYNERGY.get(role_id, 1.0)
+    return max(MIN_RISK_FACTOR, risk), reward
+
+def agent_factors(agents) -> Tuple[float, float]:
+    """squad_factors per una lista di agenti; un agente da solo non ha modificatori"""
+    if len(agents) < MIN_SQUAD:
+        return 1.0, 1.0
+    best_skills = {skill: max(getattr(agent, skill) for agent in agents) for skill in PROTECTIVE_SKILLS}
+    return squad_factors((agent.role_id for agent in agents), best_skills)
+
+def scale_rewards(rewards: Dict, multiplier: float) -> Dict:
+    """Ricompense (formato di Mission.calculate_rewards) moltiplicate; le perdite restano invariate"""
+    if multiplier == 1:
+        return rewards
+
+    def scale(amount):
+        return int(amount * multiplier) if amount > 0 else amount
+
+    scaled = {
+        "resources": {name: scale(amount) for name, amount in rewards.get("resources", {}).items()},
+        "stats": {name: scale(amount) for name, amount in rewards.get("stats", {}).items()},
+    }
+    if "intel_points" in rewards:
+        scaled["intel_points"] = scale(rewards["intel_points"])
+    if "counters" in rewards:
+        scaled["counters"] = rewards["counters"]  # Pezzi unici: la squadra non li moltiplica
+    return scaled
@@ -1,16 +1,24 @@
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
+from rich.live import Live
 from rich import box
 import random
 from .base import GameState
-from .saves import SaveManager
+from .saves import create_save_manager
+from .snapshots import UndoHistory
+from .advisor import MissionAdvisor
+from .assignment import AssignmentSolver, SquadPlanner
 
 class UI:
     def __init__(self, console: Console, game: GameState):
         self.console = console
         self.game = game
-        self.save_manager = SaveManager()
+        self.save_manager = create_save_manager()
+        self.history = UndoHistory()
+        self.advisor = None  # Creato al primo uso: avvia un pool di processi
+        self.solver = AssignmentSolver()
+        self.squads = SquadPlanner(self.solver)
         
     def show_welcome(self):
         self.console.print(Panel(
@@ -40,6 +48,8 @@ class UI:
         self.console.print("7. Mercato")
         self.console.print("8. Avanza Giorno")
         self.console.print("9. Salva")
+        self.console.print("U. Annulla ultima azione")
+        self.console.print("R. Ripeti azione annullata")
         self.console.print("0. Torna al Menu")
         
     def show_stats(self):
@@ -142,6 +152,117 @@ class UI:
             self.console.print("\n")
             self.console.print(active_table)
         
+    def show_mission_advice(self, budget_ms: float = 200):
+        """Stima sopravvivenza, ricompense e rischio per ogni missione × agente disponibile"""
+        if self.advisor is None:
+            self.advisor = MissionAdvisor()
+            
+        def build_table(estimates) -> Table:
+            table = Table(title="Consiglio Missioni")
+            table.add_column("#", style="dim")
+            table.add_column("Missione", style="cyan")
+            table.add_column("Agente")
+            table.add_column("Rischio/Giorno", justify="right")
+            table.add_column("Sopravvivenza", justify="right")
+            table.add_column("Ricompense Attese")
+            table.add_column("Rischio Base", justify="right", style="red")
+            table.add_column("Simulazioni", justify="right", style="dim")
+            for estimate in sorted(estimates.values(),
+                                   key=lambda e: (e.mission_number, -e.survival_chance)):
+                rewards = ", ".join(
+                    f"{key.replace('_', ' ').title()}: {value:+.0f}"
+                    for key, value in estimate.expected_rewards.items() if abs(value) >= 0.5
+                )
+                survival = estimate.survival_chance
+                color = "green" if survival >= 0.8 else "yellow" if survival >= 0.5 else "red"
+                table.add_row(
+                    str(estimate.mission_number),
+                    estimate.mission_title,
+                    estimate.agent_name,
+                    self.format_risk(estimate.daily_risk),
+                    f"[{color}]{survival:.0%}[/]",
+                    rewards or "-",
+                    f"{estimate.base_risk:.1f}",
+                    str(estimate.samples)
+                )
+            return table
+            
+        # Le stime arrivano per gradi: la tabella si aggiorna a ogni nuovo risultato
+        with Live(build_table({}), console=self.console, refresh_per_second=10) as live:
+            for estimates in self.advisor.stream(self.game, budget_ms):
+                live.update(build_table(estimates))
+                
+    @staticmethod
+    def format_risk(risk_range) -> str:
+        """Intervallo di rischio giornaliero, es. '12%' o '10-25%'"""
+        if risk_range is None:
+            return "-"
+        low, high = risk_range
+        if round(low * 100) == round(high * 100):
+            return f"{low:.0%}"
+        return f"{low * 100:.0f}-{high:.0%}"
+        
+    def show_squad_suggestions(self, mission_number: int) -> list:
+        """Mostra le squadre migliori per la missione e le restituisce"""
+        squads = self.squads.suggest(self.game, mission_number)
+        if not squads:
+            return []
+        table = Table(title="Squadre Consigliate")
+        table.add_column("#", style="dim")
+        table.add_column("Agenti", style="cyan")
+        table.add_column("Livello")
+        table.add_column("Rischio", justify="right")
+        table.add_column("Ricompense", justify="right")
+        table.add_column("Sopravvivenza", justify="right")
+        table.add_column("Valore Atteso", justify="right", style="green")
+        for idx, squad in enumerate(squads, 1):
+            level_info = self.game.intel.get_level_info(squad.level_id) if squad.level_id else None
+            table.add_row(
+                f"S{idx}",
+                ", ".join(squad.agent_names),
+                level_info["name"] if level_info else "-",
+                f"×{squad.risk_factor:.2f}",
+                f"×{squad.reward_multiplier:.2f}",
+                f"{squad.survival_chance:.0%}",
+                f"{squad.expected_value:.1f}"
+            )
+        self.console.print(table)
+        return squads
+        
+    def auto_assign_missions(self):
+        """Propone la migliore assegnazione agenti → missioni e la avvia se confermata"""
+        assignments = self.solver.solve(self.game)
+        if not assignments:
+            self.show_error("Nessuna assegnazione conveniente: agenti o missioni non disponibili.")
+            return
+            
+        table = Table(title="Assegnazione Proposta")
+        table.add_column("#", style="dim")
+        table.add_column("Missione", style="cyan")
+        table.add_column("Agente")
+        table.add_column("Livello")
+        table.add_column("Sopravvivenza", justify="right")
+        table.add_column("Valore Atteso", justify="right", style="green")
+        for assignment in assignments:
+            level_info = self.game.intel.get_level_info(assignment.level_id) if assignment.level_id else None
+            table.add_row(
+                str(assignment.mission_number),
+                assignment.mission_title,
+                assignment.agent_name,
+                level_info["name"] if level_info else "-",
+                f"{assignment.survival_chance:.0%}",
+                f"{assignment.expected_value:.1f}"
+            )
+        self.console.print(table)
+        
+        if self.get_input("Avviare queste missioni? (s/n) ").lower() != "s":
+            return
+        for result in self.solver.apply(self.game, assignments):
+            if result["success"]:
+                self.console.print(f"[green]{result['message']}[/]")
+            else:
+                self.show_error(result["message"])
+                
     def get_input(self, prompt: str = "> ") -> str:
         try:
             return self.console.input(prompt)
@@ -175,18 +296,34 @@ class UI:
             
         save_name = self.get_input("\nNome del salvataggio da caricare: ")
         try:
-            self.game.load_game(save_name)
+            self.game.load_game(save_name, self.save_manager)
             self.run_game()
         except ValueError as e:
             self.show_error(str(e))
             
     def run_game(self):
+        self.history.clear()
         while True:
             self.show_stats()
             self.show_game_menu()
             choice = self.get_input()
             
-            if choice == "1":
+            # Le voci 3-8 aprono menu con azioni che possono modificare la partita.
+            # Se l'utente si limita a consultarli lo stato non cambia e la
+            # cronologia non registra nulla
+            before = self.game.snapshot() if choice in ("3", "4", "5", "6", "7", "8") else None
+            
+            if choice.lower() == "u":
+                if self.history.undo(self.game):
+                    self.console.print("[yellow]Ultima azione annullata[/]")
+                else:
+                    self.show_error("Nessuna azione da annullare")
+            elif choice.lower() == "r":
+                if self.history.redo(self.game):
+                    self.console.print("[yellow]Azione ripristinata[/]")
+                else:
+                    self.show_error("Nessuna azione da ripetere")
+            elif choice == "1":
                 self.show_resources()
             elif choice == "2":
                 self.show_personnel()
@@ -195,7 +332,9 @@ class UI:
                 
                 self.console.print("\n[bold cyan]Azioni Missioni[/]")
                 self.console.print("1. Avvia Nuova Missione")
-                self.console.print("2. Torna al Menu")
+                self.console.print("2. Consiglio Missioni (simulazione)")
+                self.console.print("3. Assegnazione Automatica")
+                self.console.print("4. Torna al Menu")
                 
                 mission_choice = self.get_input()
                 
@@ -203,28 +342,54 @@ class UI:
                     try:
                         mission_number = int(self.get_input("Inserisci il numero della missione: "))
                         
-                        # Mostra agenti disponibili
+                        # Mostra agenti disponibili con il rischio giornaliero sulla missione scelta
                         self.console.print("\nAgenti Disponibili:")
-                        available_agents = [agent for agent in self.game.personnel.agents if agent.status == "disponibile"]
+                        available_agents = self.game.personnel.query(status="available")
+                        missions = self.game.missions
+                        mission = (missions.daily_missions[mission_number - 1]
+                                   if 1 <= mission_number <= len(missions.daily_missions) else None)
                         for idx, agent in enumerate(available_agents, 1):
-                            self.console.print(f"{idx}. {agent.name} ({agent.role})")
+                            risk = missions.get_risk_range(mission, agent, self.game) if mission else None
+                            risk_text = f" - rischio giornaliero {self.format_risk(risk)}" if risk else ""
+                            self.console.print(f"{idx}. {agent.name} ({agent.role}){risk_text}")
                             
                         if not available_agents:
                             self.show_error("Nessun agente disponibile per la missione.")
                             return
                             
-                        agent_num = int(self.get_input("\nSeleziona il numero dell'agente: "))
-                        if 1 <= agent_num <= len(available_agents):
-                            agent_id = available_agents[agent_num - 1].id
-                            result = self.game.missions.start_mission(mission_number, agent_id, self.game)
+                        squads = self.show_squad_suggestions(mission_number) if mission else []
+                        choice_text = self.get_input(
+                            "\nSeleziona il numero dell'agente (più numeri separati da virgola per una squadra"
+                            + (f", S1-S{len(squads)} per una squadra consigliata" if squads else "") + "): ")
+                        level_id = None
+                        agent_ids = None  # Resta None se la scelta non è valida
+                        if choice_text.strip().lower().startswith("s") and squads:
+                            squad_num = int(choice_text.strip()[1:])
+                            if 1 <= squad_num <= len(squads):
+                                agent_ids = squads[squad_num - 1].agent_ids
+                                level_id = squads[squad_num - 1].level_id
+                            else:
+                                self.show_error("Numero squadra non valido.")
+                        else:
+                            numbers = [int(part) for part in choice_text.split(",")]
+                            if all(1 <= number <= len(available_agents) for number in numbers):
+                                agent_ids = [available_agents[number - 1].id for number in numbers]
+                            else:
+                                self.show_error("Numero agente non valido.")
+                        if agent_ids is not None:
+                            agent_id = agent_ids[0] if len(agent_ids) == 1 else agent_ids
+                            result = self.game.missions.start_mission(mission_number, agent_id, self.game,
+                                                                      level_id=level_id)
                             if result["success"]:
                                 self.console.print(f"[green]{result['message']}[/]")
                             else:
                                 self.show_error(result["message"])
-                        else:
-                            self.show_error("Numero agente non valido.")
                     except ValueError:
                         self.show_error("Inserisci un numero valido.")
+                elif mission_choice == "2":
+                    self.show_mission_advice()
+                elif mission_choice == "3":
+                    self.auto_assign_missions()
                         
             elif choice == "4":
                 self.show_defense()
@@ -269,14 +434,20 @@ class UI:
                 self.show_daily_report()
             elif choice == "9":
                 save_name = self.get_input("Nome del salvataggio: ")
-                self.game.save_game(save_name)
-                self.console.print("[green]Gioco salvato![/]")
+                try:
+                    self.game.save_game(save_name, self.save_manager)
+                    self.console.print("[green]Gioco salvato![/]")
+                except ValueError as e:
+                    self.show_error(str(e))
             elif choice == "0":
                 if self.confirm_exit():
                     break
             else:
                 self.show_error("Scelta non valida")
                 
+            if before is not None:
+                self.history.record(before, self.game)
+                
     def show_help(self):
         self.console.print(Panel(
             "[italic]Note trovate su un vecchio terminale delle Backrooms...[/]\n\n"
@@ -379,37 +550,37 @@ class UI:
                 if not info:
                     continue
                 
-            table = Table(title=f"Intel: {info['name']}")
-            table.add_column("Informazione", style="cyan")
-            table.add_column("Dettaglio")
+                table = Table(title=f"Intel: {info['name']}")
+                table.add_column("Informazione", style="cyan")
+                table.add_column("Dettaglio")
             
-            table.add_row(
-                "Livello Conoscenza",
-                f"{info['knowledge_level']}/5"
-            )
+                table.add_row(
+                    "Livello Conoscenza",
+                    f"{info['knowledge_level']}/5"
+                )
             
-            table.add_row("Descrizione", info['description'])
+                table.add_row("Descrizione", info['description'])
             
-            if "difficulty" in info:
-                table.add_row("Difficoltà", str(info['difficulty']))
-                table.add_row("Livello Pericolo", info['danger_level'])
+                if "difficulty" in info:
+                    table.add_row("Difficoltà", str(info['difficulty']))
+                    table.add_row("Livello Pericolo", info['danger_level'])
                 
-            if "entities" in info:
-                table.add_row("Entità", ", ".join(info['entities']))
+                if "entities" in info:
+                    table.add_row("Entità", ", ".join(info['entities']))
                 
-            if "resources" in info:
-                table.add_row("Risorse", ", ".join(info['resources']))
+                if "resources" in info:
+                    table.add_row("Risorse", ", ".join(info['resources']))
                 
-            if "special_items" in info:
-                table.add_row("Oggetti Speciali", ", ".join(info['special_items']))
+                if "special_items" in info:
+                    table.add_row("Oggetti Speciali", ", ".join(info['special_items']))
                 
-            if "discovered_secrets" in info:
-                secrets = info['discovered_secrets']
-                if secrets:
-                    table.add_row("Segreti Scoperti", "\n".join(secrets))
+                if "discovered_secrets" in info:
+                    secrets = info['discovered_secrets']
+                    if secrets:
+                        table.add_row("Segreti Scoperti", "\n".join(secrets))
                     
-            self.console.print("\n")
-            self.console.print(table)
+                self.console.print("\n")
+                self.console.print(table)
 
     def show_diplomacy(self):
         """Mostra il sistema diplomatico e permette interazioni con altre organizzazioni"""
@@ -524,10 +695,11 @@ class UI:
             mission_table.add_column("Giorni Rimasti")
             
             for mission in self.game.missions.active_missions:
-                agent = self.game.personnel.get_agent(mission.assigned_agent)
+                agents = [self.game.personnel.get_agent(agent_id) for agent_id in mission.assigned_agents]
+                names = ", ".join(agent.name for agent in agents if agent)
                 mission_table.add_row(
                     mission.title,
-                    agent.name if agent else "N/A",
+                    names or "N/A",
                     str(mission.days_left)
                 )
             
@@ -545,6 +717,21 @@ class UI:
             
             self.console.print("\n")
             self.console.print(event_table)
+            
+        # Avanzamento verso i finali
+        endings_table = Table(title="Verso i Finali")
+        endings_table.add_column("Finale", style="magenta")
+        endings_table.add_column("Condizioni", justify="right")
+        endings_table.add_column("Avanzamento", justify="right")
+        for entry in self.game.endings.get_progress(self.game):
+            ending = entry["ending"]
+            endings_table.add_row(
+                f"{ending.title}{' ✓' if ending.triggered else ''}",
+                f"{entry['met']}/{entry['total']}",
+                f"{entry['progress']:.0%}"
+            )
+        self.console.print("\n")
+        self.console.print(endings_table)
 
     def show_market(self):
         """Mostra l'interfaccia del mercato per il commercio con le organizzazioni"""
@@ -598,25 +785,38 @@ class UI:
                     goods_table.add_column("Nome", style="cyan")
                     goods_table.add_column("Prezzo", justify="right")
                     goods_table.add_column("Rarità", justify="center")
+                    goods_table.add_column("Tendenza", justify="center")
+                    goods_table.add_column("Rischio", justify="right")
                     goods_table.add_column("Effetti Speciali")
 
                     available_goods = []
+                    prices = self.game.market.quote_catalog(org_id, is_buying=(choice == "1"))
+                    risks = self.game.market.risk_table(self.game)[org_id]
                     for good_id, good in self.game.market.trade_goods.items():
                         if choice == "2" and self.game.resources.get(good_id) <= 0:
                             continue
 
-                        price = self.game.market.get_price(good_id, org_id, is_buying=(choice == "1"))
+                        price = prices[good_id]
                         effects = []
                         if good.special_effects:
                             for effect, value in good.special_effects.items():
                                 effects.append(f"{effect}: {value:+}")
 
+                        # Confronto con il prezzo di acquisto di una settimana fa
+                        history = self.game.market.price_history(good_id, org_id)[-7:]
+                        trend = "-"
+                        if len(history) > 1:
+                            trend = ("[red]▲[/]" if history[-1] > history[0]
+                                     else "[green]▼[/]" if history[-1] < history[0] else "=")
+
                         available_goods.append((good_id, good))
                         goods_table.add_row(
                             str(len(available_goods)),
                             good.name,
                             str(price),
                             "⭐" * good.rarity,
+                            trend,
+                            f"{risks[good_id][0]:.0%}",
                             "\n".join(effects) if effects else "-"
                         )
 
@@ -0,0 +1,23 @@
+import contextlib
+import io
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # I cataloghi vengono letti da data/ con percorsi relativi
+
+from game.base import GameState
+
+@pytest.fixture
+def game():
+    """Partita nuova con seme fisso e messaggi silenziati"""
+    random.seed(0)
+    game = GameState()
+    with contextlib.redirect_stdout(io.StringIO()):
+        game.new_game()
+    game.missions.verbose = False
+    return game
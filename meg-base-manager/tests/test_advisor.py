@@ -0,0 +1,15 @@
+import random
+
+from game.advisor import MissionAdvisor
+
+def test_advice_leaves_game_rng_alone(game):
+    state = random.getstate()
+    estimates = MissionAdvisor(workers=0).estimate(game, budget_ms=10000)
+    assert estimates and all(e.samples for e in estimates.values())
+    assert random.getstate() == state
+
+def test_first_pass_stops_at_deadline(game):
+    advisor = MissionAdvisor(workers=0)
+    assert advisor.estimate(game, budget_ms=0) == {}
+    # Un giro interrotto non resta in cache: la richiesta successiva lo completa
+    assert advisor.estimate(game, budget_ms=10000)
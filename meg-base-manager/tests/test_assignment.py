@@ -0,0 +1,38 @@
+import itertools
+import random
+
+import pytest
+
+from game.assignment import AssignmentSolver, hungarian
+
+def brute_force(cost):
+    """Costo minimo provando tutte le assegnazioni righe -> colonne distinte"""
+    rows = range(len(cost))
+    return min(sum(cost[i][p[i]] for i in rows)
+               for p in itertools.permutations(range(len(cost[0])), len(cost)))
+
+def test_hungarian_matches_brute_force():
+    rng = random.Random(1)
+    for _ in range(200):
+        n = rng.randint(1, 5)
+        m = rng.randint(n, 7)
+        cost = [[rng.uniform(-5, 5) for _ in range(m)] for _ in range(n)]
+        columns = hungarian(cost)
+        assert len(set(columns)) == n
+        assert sum(cost[i][j] for i, j in enumerate(columns)) == pytest.approx(brute_force(cost))
+
+def test_hungarian_with_ties_and_integers():
+    cost = [[1, 1, 1], [1, 1, 1], [0, 5, 5]]
+    columns = hungarian(cost)
+    assert sorted(columns) == [0, 1, 2]
+    assert sum(cost[i][j] for i, j in enumerate(columns)) == 2
+
+def test_hungarian_rejects_more_rows_than_columns():
+    with pytest.raises(ValueError):
+        hungarian([[1], [2]])
+
+def test_solver_assigns_each_agent_and_mission_once(game):
+    assignments = AssignmentSolver().solve(game)
+    assert len({a.agent_id for a in assignments}) == len(assignments)
+    assert len({a.mission_number for a in assignments}) == len(assignments)
+    assert assignments and all(a.expected_value > 0 for a in assignments)
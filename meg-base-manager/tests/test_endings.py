@@ -0,0 +1,88 @@
+import contextlib
+import io
+
+import pytest
+
+from game.squads import scale_rewards
+
+def test_no_ending_on_new_game(game):
+    assert not game.endings.check_endings(game)["triggered"]
+
+def test_survival_needs_resources(game):
+    """Con tutte le risorse a zero la base non è prospera: niente finale di sopravvivenza"""
+    game.stats.day = 60
+    game.stats.prestige = 80
+    game.stats.morale = 75
+    for name in game.resources.resources:
+        game.resources.modify(name, -game.resources.get(name))
+    assert not game.endings.check_endings(game)["triggered"]
+
+    game.resources.modify("supplies", 100)
+    result = game.endings.check_endings(game)
+    assert result["triggered"] and result["ending"].id == "survival"
+
+def complete(game, mission_id: str, reward_multiplier: float = 1.0):
+    """Porta a termine una missione del catalogo senza rischi"""
+    mission = next(m for m in game.missions.missions if m.id == mission_id)
+    mission.adjusted_rewards = scale_rewards(mission.calculate_rewards(1), reward_multiplier)
+    mission.days_left, mission.selected_level, mission.assigned_agents = 1, None, ()
+    game.missions.set_active_missions([mission])
+    game.missions.update_missions(game)
+
+def test_rewards_feed_ending_counters(game):
+    complete(game, "archive_secrets", reward_multiplier=1.5)
+    complete(game, "ancient_knowledge")
+    assert game.counters.classified_documents == 2
+    for _ in range(5):
+        game.events.effects["level_omega_reality_breach"](game)
+    assert (game.counters.reality_fragments, game.counters.dream_resonance) == (50, 115)
+
+def reach_survival(game):
+    game.stats.day, game.stats.prestige, game.stats.morale = 60, 80, 75
+
+def reach_collapse(game):
+    game.stats.morale, game.stats.prestige = 10, 5
+    for name in game.resources.resources:
+        game.resources.modify(name, -game.resources.get(name))
+    for agent in list(game.personnel.agents)[2:]:
+        game.personnel.remove_agent(agent.id)
+
+def reach_truth(game):
+    game.intel.add_intel_points("level_18", 500)
+    for secret in ("origine", "archivio", "velo"):
+        game.intel.discover_secret("level_18", secret)
+    complete(game, "archive_secrets")
+    complete(game, "ancient_knowledge")
+    game.resources.modify("supplies", 10000)
+    game.resources.modify("fuel", 10000)
+    game.resources.modify("medical", 10000)
+    lab = list(game.defense.available_structures).index("research_lab") + 1
+    assert game.defense.build_structure(lab, game)["success"]
+
+def reach_horror(game):
+    game.stats.corruption_level = 80
+    for name, amount in (("entity_encounters", 30), ("failed_missions", 8),
+                         ("lost_agents", 3), ("dark_events", 5)):
+        game.counters.add(name, amount)
+
+def reach_ascension(game):
+    game.intel.add_intel_points("level_omega", 10)
+    complete(game, "omega_breach")
+    complete(game, "temporal_convergence")
+    for _ in range(3):
+        game.events.effects["level_omega_reality_breach"](game)
+    game.counters.add("temporal_anomalies", 3)
+    game.counters.add("transcendence_events", 2)
+
+@pytest.mark.parametrize("ending_id, reach", [
+    ("survival", reach_survival),
+    ("collapse", reach_collapse),
+    ("truth", reach_truth),
+    ("horror", reach_horror),
+    ("ascension", reach_ascension),
+])
+def test_every_ending_can_be_reached(game, ending_id, reach):
+    with contextlib.redirect_stdout(io.StringIO()):
+        reach(game)
+    result = game.endings.check_endings(game)
+    assert result["triggered"] and result["ending"].id == ending_id
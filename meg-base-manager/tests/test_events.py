@@ -0,0 +1,10 @@
+from game.events import Event
+
+def test_adhoc_events_apply_their_own_effects(game):
+    """Due infiltrazioni con lo stesso id non condividono gli effetti compilati"""
+    for amount in (5, 12):
+        before = game.resources.get("supplies")
+        game.events.trigger_event(Event(
+            "infiltration", "Infiltrazione", "test", {"resources": {"supplies": -amount}}
+        ), game)
+        assert before - game.resources.get("supplies") == amount
@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+from game.diplomacy import DiplomaticSystem
+from game.factions import MIN_PROPAGATED, FactionGraph
+
+RELATIONS = {"a": {"b": -0.3, "c": 0.5}, "b": {"c": 0.2}, "c": {}}
+
+def dense(changes, relations=RELATIONS):
+    """Lo stesso prodotto vettore × matrice su dizionari annidati"""
+    totals = {}
+    for org_id, change in changes.items():
+        for neighbor, weight in relations.get(org_id, {}).items():
+            totals[neighbor] = totals.get(neighbor, 0.0) + weight * change
+    return {org_id: total for org_id, total in totals.items() if abs(total) >= MIN_PROPAGATED}
+
+def test_propagate_matches_dense_product():
+    graph = FactionGraph("abc", RELATIONS)
+    rng = random.Random(4)
+    for _ in range(50):
+        changes = {org_id: rng.uniform(-10, 10) for org_id in rng.sample("abc", rng.randint(1, 3))}
+        assert graph.propagate(changes) == pytest.approx(dense(changes))
+    assert graph.neighbors("a") == {"b": -0.3, "c": 0.5}
+    assert graph.propagate({"x": 5}) == {}
+
+def test_graph_rejects_unknown_and_self_edges():
+    with pytest.raises(ValueError):
+        FactionGraph("ab", {"a": {"z": 0.1}})
+    with pytest.raises(ValueError):
+        FactionGraph("ab", {"a": {"a": 0.1}})
+
+def test_relation_changes_reach_neighbors_next_day():
+    diplomacy = DiplomaticSystem()
+    diplomacy.embassy_built = True
+    neighbors = diplomacy.graph.neighbors("meg")
+    before = {org_id: org.attitude for org_id, org in diplomacy.organizations.items()}
+    diplomacy.modify_relation("meg", 10)
+    assert {org_id: org.attitude for org_id, org in diplomacy.organizations.items()
+            if org_id != "meg"} == {org_id: a for org_id, a in before.items() if org_id != "meg"}
+
+    induced = diplomacy.propagate_relations()
+    assert induced == pytest.approx({org_id: weight * 10 for org_id, weight in neighbors.items()})
+    for org_id, amount in induced.items():
+        expected = max(0, min(100, before[org_id] + amount))
+        assert diplomacy.organizations[org_id].attitude == pytest.approx(expected)
+    # Le variazioni indotte non si propagano a loro volta
+    assert diplomacy.propagate_relations() == {}
@@ -0,0 +1,55 @@
+import contextlib
+import io
+
+import pytest
+
+def trading_partner(game) -> str:
+    """Con l'ambasciata gli scambi cambiano anche le relazioni"""
+    game.diplomacy.embassy_built = True
+    return next(iter(game.diplomacy.organizations))
+
+def test_unknown_organization_changes_nothing(game):
+    before = game.snapshot()
+    result = game.market.trade_basket("nessuno", [("medical", 1, True)], game)
+    assert not result["success"]
+    assert game.snapshot() == before
+
+def test_sales_pay_for_purchases(game):
+    """Il saldo è netto: le vendite dell'ordine coprono gli acquisti"""
+    org_id = trading_partner(game)
+    resources = game.resources
+    resources.modify("supplies", -resources.get("supplies"))
+    resources.modify("medical", 10 - resources.get("medical"))
+    revenue = int(game.market.quote_catalog(org_id, False)["medical"] * 10 * 0.8)
+    fuel_price = game.market.quote_catalog(org_id)["fuel"]
+    quantity = revenue // fuel_price
+    assert quantity > 0
+
+    # Da solo l'acquisto non è coperto
+    assert not game.market.trade_basket(org_id, [("fuel", quantity, True)], game)["success"]
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = game.market.trade_basket(org_id, [("medical", 10, False), ("fuel", quantity, True)], game)
+    assert result["success"]
+    assert (result["revenue"], result["cost"]) == (revenue, quantity * fuel_price)
+    assert resources.get("supplies") == revenue - quantity * fuel_price
+    assert resources.get("medical") == 0
+
+def test_basket_risk_combines_lines(game, monkeypatch):
+    """L'ordine è scoperto se almeno una riga lo sarebbe: 1 − ∏(1 − rᵢ)"""
+    org_id = trading_partner(game)
+    market = game.market
+    monkeypatch.setattr("game.market.random.random", lambda: 1.0)  # Nessuna infiltrazione
+    goods = ["reality_stabilizer", "ancient_text", "crimson_weapon"]
+    game.resources.modify("supplies", 100000)
+    trades_before = market.daily_trades
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = market.trade_basket(org_id, [(good_id, 1, True) for good_id in goods], game)
+    assert result["success"]
+
+    # Protezione con l'attitudine dopo lo scambio, come nel calcolo dell'ordine
+    protection = market._trade_protection(org_id, game)
+    safe = 1.0
+    for k, good_id in enumerate(goods, start=1):
+        safe *= 1 - market._infiltration_risk(market.trade_goods[good_id], trades_before + k, protection)
+    assert result["infiltration_risk"] == pytest.approx(1 - safe)
+    assert market.daily_trades == trades_before + len(goods)
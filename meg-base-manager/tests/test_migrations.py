@@ -0,0 +1,81 @@
+import contextlib
+import copy
+import io
+import json
+
+from game.base import GameState
+from game.migrations import SAVE_VERSION, migrate_save
+from game.saves import SaveManager
+
+def as_v1(data):
+    """Lo stesso salvataggio nel formato v1, senza i campi aggiunti dopo"""
+    old = copy.deepcopy(data)
+    old["version"] = 1
+    del old["counters"]
+    del old["endings"]
+    del old["stats"]["corruption_level"]
+    del old["market"]["supply"]
+    del old["diplomacy"]["pending_changes"]
+    del old["personnel"]["next_agent_id"]
+    for mission in old["missions"]["active_missions"]:
+        agents = mission.pop("assigned_agents")
+        del mission["risk_factor"]
+        mission["assigned_agent"] = agents[0] if agents else None
+    return old
+
+def loaded(data) -> GameState:
+    game = GameState()
+    with contextlib.redirect_stdout(io.StringIO()):
+        game.from_dict(data)
+    return game
+
+def test_v1_save_migrates_and_round_trips(game):
+    mission = game.missions.daily_missions[0]
+    agent = game.personnel.agents[0]
+    with contextlib.redirect_stdout(io.StringIO()):
+        game.missions.start_mission(1, agent.id, game)
+        game.advance_day()
+    current = game.to_dict()
+
+    migrated, upgraded = migrate_save(json.loads(json.dumps(as_v1(current))))
+    assert upgraded and migrated["version"] == SAVE_VERSION
+    restored = loaded(migrated)
+    assert restored.stats.snapshot()[:3] == game.stats.snapshot()[:3]
+    assert restored.resources.resources == game.resources.resources
+    assert [a.id for a in restored.personnel.agents] == [a.id for a in game.personnel.agents]
+    assert ([(m.id, m.assigned_agents) for m in restored.missions.active_missions]
+            == [(m.id, m.assigned_agents) for m in game.missions.active_missions])
+    if mission in game.missions.active_missions:
+        assert restored.personnel.get_agent(agent.id).mission is not None
+    # I contatori derivati si ricalcolano, quelli storici partono da zero
+    assert restored.counters.alive_agents == game.counters.alive_agents
+    assert restored.counters.total_intel == game.counters.total_intel
+
+    # Un salvataggio già aggiornato resta uguale a ogni caricamento
+    saved = restored.to_dict()
+    assert migrate_save(copy.deepcopy(saved)) == (saved, False)
+    assert loaded(copy.deepcopy(saved)).to_dict() == saved
+
+def test_load_game_rewrites_old_save(game, tmp_path):
+    saves = SaveManager(str(tmp_path))
+    saves.write_save("vecchio", as_v1(game.to_dict()))
+    restored = GameState()
+    with contextlib.redirect_stdout(io.StringIO()):
+        restored.load_game("vecchio", saves)
+    assert saves.read_save("vecchio")["version"] == SAVE_VERSION
+
+def test_repeated_agent_ids_are_renumbered(game):
+    # Prima della v8 l'id dipendeva dal numero di agenti: dopo una morte si ripeteva
+    data = copy.deepcopy(game.to_dict())
+    data["version"] = 7
+    del data["personnel"]["next_agent_id"]
+    agents = data["personnel"]["agents"]
+    del agents[1]
+    agents.append(dict(agents[-1], name="Quinn", status="Missione fantasma"))
+    migrated, _ = migrate_save(data)
+    ids = [agent["id"] for agent in migrated["personnel"]["agents"]]
+    assert ids == ["agent_1", "agent_3", "agent_4", "agent_5", "agent_6"]
+    assert migrated["personnel"]["agents"][-1]["status"] == "disponibile"
+    restored = loaded(migrated)
+    restored.personnel.hire_agent("Sam", "medic")
+    assert restored.personnel.agents[-1].id == "agent_7"
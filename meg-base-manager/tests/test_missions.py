@@ -0,0 +1,55 @@
+from game.missions import MissionManager
+
+def mission_by_id(game, mission_id):
+    return next(m for m in game.missions.missions if m.id == mission_id)
+
+def raise_knowledge(game, level_id, knowledge):
+    while game.intel.levels_intel[level_id].knowledge_level < knowledge:
+        game.intel.add_intel_points(level_id, 100, "test")
+
+def test_mission_with_level_requirements_starts(game):
+    # hound_tracking: level_0 o level_1, conoscenza minima 3
+    mission = mission_by_id(game, "hound_tracking")
+    assert game.missions.get_valid_levels(mission, game) == []
+
+    raise_knowledge(game, "level_0", 3)
+    assert game.missions.get_valid_levels(mission, game) == ["level_0"]
+
+    game.missions.daily_missions = [mission]
+    agent = game.personnel.agents[0]
+    result = game.missions.start_mission(1, agent.id, game, level_id="level_0")
+    assert result["success"], result["message"]
+    assert mission.selected_level == "level_0"
+    assert mission in game.missions.active_missions
+
+def test_level_requirements_rejects_ineligible_level(game):
+    mission = mission_by_id(game, "hound_tracking")
+    raise_knowledge(game, "level_0", 3)
+    game.missions.daily_missions = [mission]
+    result = game.missions.start_mission(1, game.personnel.agents[0].id, game, level_id="level_1")
+    assert not result["success"]
+    assert game.missions.daily_missions == [mission]
+
+def test_eligible_pool_matches_full_scan(game):
+    """I livelli idonei mantenuti incrementalmente coincidono con la verifica completa"""
+    raise_knowledge(game, "level_0", 4)
+    raise_knowledge(game, "level_2", 5)
+    for mission in game.missions.missions:
+        pooled = sorted(game.missions.get_valid_levels(mission, game))
+        if not mission.valid_levels:
+            continue
+        candidates = (list(game.intel.levels_intel) if mission.valid_levels == "all"
+                      else mission.valid_levels)
+        scanned = sorted(level_id for level_id in candidates
+                         if MissionManager._is_level_valid(mission, level_id, game.intel))
+        assert pooled == scanned, mission.id
+
+def test_graph_reverse_edges_mirror_forward_edges(game):
+    graph = game.missions.graph
+    forward_chain = {(i, j) for i, successors in enumerate(graph.chain_next) for j in successors}
+    reverse_chain = {(i, j) for j, predecessors in enumerate(graph.chain_prev) for i in predecessors}
+    assert forward_chain == reverse_chain
+    forward_required = {(i, j) for i, requirements in enumerate(graph.requirements)
+                        for _, required in requirements for j in required}
+    reverse_required = {(i, j) for j, dependents in enumerate(graph.required_by) for i in dependents}
+    assert forward_required == reverse_required
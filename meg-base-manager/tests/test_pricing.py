@@ -0,0 +1,83 @@
+import contextlib
+import io
+import random
+
+import pytest
+
+from game.market import Market
+from game.pricing import HISTORY_DAYS, MAX_MULTIPLIER, MIN_MULTIPLIER
+
+ORG = "mu"  # Qualsiasi id: le colonne si aggiungono alla prima lettura
+
+def played(days: int, read_every_day: bool, seed: int = 5) -> Market:
+    random.seed(seed)
+    market = Market()
+    market.supply.column(ORG)
+    good_id = next(iter(market.trade_goods))
+    for day in range(days):
+        if day == 3:
+            market.supply.record_trade(ORG, good_id, 4, True)
+        if read_every_day:
+            market.supply.column(ORG)
+        market.daily_update()
+    market.supply.column(ORG)
+    return market
+
+def test_lazy_sync_matches_daily_sync():
+    """Recuperare i giorni alla lettura dà gli stessi valori di aggiornarli ogni giorno"""
+    eager, lazy = played(12, True), played(12, False)
+    assert list(lazy.supply.stock) == pytest.approx(list(eager.supply.stock))
+    assert list(lazy.supply.demand) == pytest.approx(list(eager.supply.demand))
+    for good_id in eager.trade_goods:
+        assert lazy.price_history(good_id, ORG) == eager.price_history(good_id, ORG)
+
+def test_long_gap_keeps_history_and_bounds():
+    eager, lazy = played(HISTORY_DAYS * 3, True), played(HISTORY_DAYS * 3, False)
+    assert list(lazy.supply.stock) == pytest.approx(list(eager.supply.stock))
+    assert list(lazy.supply.demand) == pytest.approx(list(eager.supply.demand))
+    assert all(MIN_MULTIPLIER <= value <= MAX_MULTIPLIER for value in lazy.supply.demand)
+    for good_id in lazy.trade_goods:
+        assert len(lazy.price_history(good_id, ORG)) == HISTORY_DAYS
+
+def test_quotes_follow_supply_and_bonus():
+    random.seed(2)
+    market = Market()
+    good_id = next(iter(market.trade_goods))
+    for _ in range(3):
+        market.supply.record_trade(ORG, good_id, 5, True)
+        market.daily_update()
+        for is_buying in (True, False):
+            quotes = market.quote_catalog(ORG, is_buying)
+            assert quotes == {g: market.get_price(g, ORG, is_buying) for g in market.trade_goods}
+    before = market.get_price(good_id, ORG)
+    market.set_organization_bonus(good_id, ORG, 2.0)
+    assert market.get_price(good_id, ORG) > before
+    assert market.quote_catalog(ORG)[good_id] == market.get_price(good_id, ORG)
+
+def view_market(game):
+    """Quello che mostra UI.show_market, senza scambiare"""
+    for org_id in game.diplomacy.organizations:
+        game.market.quote_catalog(org_id)
+        game.market.quote_catalog(org_id, False)
+        for good_id in game.market.trade_goods:
+            game.market.price_history(good_id, org_id)
+
+def test_viewing_prices_leaves_game_unchanged(game):
+    for _ in range(3):
+        game.advance_day()
+    before, state = game.snapshot(), random.getstate()
+    view_market(game)
+    assert random.getstate() == state
+    assert game.snapshot() == before
+
+def test_viewing_prices_does_not_change_outcomes(game):
+    watcher = game.fork()
+    with contextlib.redirect_stdout(io.StringIO()):
+        random.seed(9)
+        for _ in range(30):
+            game.advance_day()
+        random.seed(9)
+        for _ in range(30):
+            view_market(watcher)
+            watcher.advance_day()
+    assert watcher.to_dict() == game.to_dict()
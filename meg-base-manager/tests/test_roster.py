@@ -0,0 +1,77 @@
+import random
+
+from game.roster import SKILLS, AgentStatus
+
+QUERIES = [
+    dict(status="available"),
+    dict(status="on_mission"),
+    dict(role="medic", status="available", order_by="-medical", limit=1),
+    dict(status="available", min_skill={"combat": 2}, order_by="-combat", limit=3),
+    dict(min_skill={"survival": 2, "morale": 70}),
+    dict(role="scout", order_by="level"),
+]
+
+def linear(personnel, role=None, status=None, min_skill=None, order_by=None, limit=None):
+    """La stessa interrogazione come scansione delle viste"""
+    state = AgentStatus[status.upper()] if status else None
+    agents = [
+        a for a in personnel.agents
+        if (role is None or a.role_id == role)
+        and (state is None or a.state == state)
+        and all(getattr(a, name) >= value for name, value in (min_skill or {}).items())
+    ]
+    if order_by:
+        name = order_by.lstrip("-")
+        agents.sort(key=lambda a: getattr(a, name), reverse=order_by.startswith("-"))
+    return agents[:limit]
+
+def assert_consistent(personnel):
+    for query in QUERIES:
+        found = personnel.query(**query)
+        expected = linear(personnel, **query)
+        order_by = query.get("order_by")
+        if order_by:
+            # A parità di valore l'ordine può cambiare: si confrontano i valori
+            name = order_by.lstrip("-")
+            assert [getattr(a, name) for a in found] == [getattr(a, name) for a in expected], query
+        else:
+            assert [a.id for a in found] == [a.id for a in expected], query
+    for skill in SKILLS:
+        best = personnel.best_available(skill)
+        available = [a for a in personnel.agents if a.state == AgentStatus.AVAILABLE]
+        if available:
+            assert getattr(best, skill) == max(getattr(a, skill) for a in available)
+
+def test_query_matches_scan_after_hire_and_death(game):
+    personnel = game.personnel
+    personnel.max_agents = 30
+    rng = random.Random(3)
+    personnel.query(status="available")  # Indici costruiti prima delle modifiche
+    index = personnel.roster.index
+    for step in range(60):
+        action = rng.random()
+        agents = personnel.agents
+        if action < 0.4:
+            personnel.add_random_agent()
+        elif action < 0.6 and agents:
+            personnel.remove_agent(rng.choice(agents).id)  # Morte in missione
+        elif action < 0.8 and agents:
+            agent = rng.choice(agents)
+            if agent.state == AgentStatus.AVAILABLE:
+                personnel.assign_mission(agent.id, game.missions.missions[0])
+            else:
+                personnel.free_agent(agent.id)
+        else:
+            personnel.daily_update()  # Morale e abilità cambiano a caso
+        assert_consistent(personnel)
+        assert game.counters.alive_agents == len(personnel.agents)
+    assert personnel.roster.index is index  # Aggiornati, mai ricostruiti
+
+def test_hire_after_death_gets_new_id(game):
+    personnel = game.personnel
+    personnel.remove_agent(personnel.agents[1].id)
+    personnel.hire_agent("Quinn", "scout")
+    ids = [a.id for a in personnel.agents]
+    assert len(set(ids)) == len(ids)
+    hired = personnel.agents[-1]
+    assert personnel.get_agent(hired.id) is hired
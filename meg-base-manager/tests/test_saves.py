@@ -0,0 +1,63 @@
+import json
+import sqlite3
+
+from game.migrations import SAVE_VERSION, migrate_save, migrate_sqlite_store
+from game.saves import SaveManager, SQLiteSaveManager
+
+def test_sqlite_round_trip(game, tmp_path):
+    store = SQLiteSaveManager(str(tmp_path / "saves.db"))
+    data = game.to_dict()
+    store.write_save("slot", data)
+    assert store.read_save("slot") == data
+    assert store.get_saves() == ["slot"]
+    info = store.get_saves_info()[0]
+    assert (info["version"], info["day"]) == (SAVE_VERSION, game.stats.day)
+    assert store.delete_save("slot") and not store.save_exists("slot")
+
+def test_json_dir_import_export_round_trip(game, tmp_path):
+    saves = SaveManager(str(tmp_path / "json"))
+    first = game.to_dict()
+    game.stats.day = 12
+    second = game.to_dict()
+    saves.write_save("primo", first)
+    saves.write_save("secondo", second)
+    (tmp_path / "json" / "rotto.json").write_text("{", encoding="utf-8")
+
+    store = SQLiteSaveManager(str(tmp_path / "saves.db"))
+    summary = store.import_json_dir(str(tmp_path / "json"))
+    assert summary["imported"] == 2 and len(summary["failed"]) == 1
+    assert store.export_json_dir(str(tmp_path / "out")) == {"exported": 2}
+    exported = SaveManager(str(tmp_path / "out"))
+    assert exported.read_save("primo") == first
+    assert exported.read_save("secondo") == second
+
+def test_old_database_gains_section_columns(tmp_path):
+    """Un database creato prima di versione e sezioni recenti si aggiorna all'apertura"""
+    db_path = tmp_path / "saves.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE saves (name TEXT PRIMARY KEY, day INTEGER NOT NULL DEFAULT 0, "
+                     "prestige INTEGER NOT NULL DEFAULT 0, morale INTEGER NOT NULL DEFAULT 0, "
+                     "updated_at REAL NOT NULL, stats BLOB, resources BLOB)")
+        conn.execute("INSERT INTO saves (name, day, updated_at, stats) VALUES (?, ?, ?, ?)",
+                     ("vecchio", 3, 0.0, json.dumps({"day": 3}).encode("utf-8")))
+    conn.close()
+
+    store = SQLiteSaveManager(str(db_path))
+    with sqlite3.connect(db_path) as conn:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(saves)")}
+    conn.close()
+    assert {"version"} | set(SQLiteSaveManager.SECTIONS) <= columns
+    assert store.read_save("vecchio") == {"stats": {"day": 3}}
+
+def test_saves_below_version_are_migrated(game, tmp_path):
+    store = SQLiteSaveManager(str(tmp_path / "saves.db"))
+    current = game.to_dict()
+    old = migrate_save(dict(current, version=SAVE_VERSION - 1))[0]
+    old["version"] = SAVE_VERSION - 1
+    store.write_save("attuale", current)
+    store.write_save("vecchio", old)
+    assert store.get_saves_below_version(SAVE_VERSION) == ["vecchio"]
+
+    assert migrate_sqlite_store(store) == {"migrated": 1, "failed": []}
+    assert store.get_saves_below_version(SAVE_VERSION) == []
+    assert store.read_save("vecchio")["version"] == SAVE_VERSION
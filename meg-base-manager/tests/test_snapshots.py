@@ -0,0 +1,47 @@
+import contextlib
+import io
+
+from game.snapshots import UndoHistory
+
+def advance(game, days: int = 1):
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(days):
+            game.advance_day()
+
+def test_fork_leaves_original_unchanged(game):
+    before = game.snapshot()
+    branch = game.fork()
+    assert branch.snapshot() == before
+    advance(branch, 10)
+    assert branch.stats.day == game.stats.day + 10
+    assert game.snapshot() == before
+
+def test_undo_redo_around_advance_day(game):
+    history = UndoHistory()
+    before = game.snapshot()
+    advance(game)
+    assert history.record(before, game)
+    after = game.snapshot()
+
+    assert history.undo(game) and game.snapshot() == before
+    assert history.redo(game) and game.snapshot() == after
+    assert not history.can_redo()
+    # Dopo un'azione nuova non si può più ripetere ciò che era stato annullato
+    assert history.undo(game)
+    advance(game, 2)
+    history.record(before, game)
+    assert not history.can_redo()
+
+def test_viewing_prices_is_not_recorded(game):
+    """Consultare il mercato non crea voci nella cronologia"""
+    history = UndoHistory()
+    advance(game, 3)
+    before = game.snapshot()
+    market = game.market
+    for org_id in game.diplomacy.organizations:
+        market.quote_catalog(org_id)
+        market.quote_catalog(org_id, is_buying=False)
+        for good_id in market.trade_goods:
+            market.price_history(good_id, org_id)
+    assert not history.record(before, game)
+    assert not history.can_undo()